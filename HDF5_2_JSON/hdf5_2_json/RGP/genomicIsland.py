@@ -9,10 +9,10 @@ import argparse
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.region import Region
-from ppanggolin.formats import checkPangenomeInfo, writePangenome, ErasePangenome
-from ppanggolin.utils import restricted_float
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.region import Region
+from hdf5_2_json.formats import checkPangenomeInfo, writePangenome, ErasePangenome
+from hdf5_2_json.utils import restricted_float
 
 
 class MatriceNode:
@@ -48,9 +48,10 @@ def extractRGP(contig, node, ID, naming):
     return new_region
 
 
-def rewriteMatrix(contig, matrix, index, persistent, continuity, multi):
+def rewriteMatrix(contig, matrix, index, persistent, continuity, persistentGenes):
     """
         ReWrite the matrice from the given index of the node that started a region.
+        persistentGenes tells, for each gene of the contig, whether it is persistent and not multigenic.
     """
     prev = matrix[index]
     index += 1
@@ -61,7 +62,7 @@ def rewriteMatrix(contig, matrix, index, persistent, continuity, multi):
         nextNode = matrix[index]
         nbPerc = 0
         while nextNode.state:  # while the old state is not 0, recompute the scores.
-            if nextNode.gene.family.namedPartition == "persistent" and nextNode.gene.family not in multi:
+            if persistentGenes[index]:
                 modif = -pow(persistent, nbPerc)
                 nbPerc += 1
             else:
@@ -83,15 +84,16 @@ def rewriteMatrix(contig, matrix, index, persistent, continuity, multi):
             nextNode = matrix[index]
 
 
-def initMatrices(contig, persistent_penalty, variable_gain, multi):
-    """initialize the vector of score/state nodes"""
+def initMatrices(contig, persistent_penalty, variable_gain, persistentGenes):
+    """initialize the vector of score/state nodes.
+    persistentGenes tells, for each gene of the contig, whether it is persistent and not multigenic."""
     mat = []
     prev = None
     nbPerc = 0
     zeroInd = None
     curr_state = None
-    for gene in contig.genes:
-        if gene.family.namedPartition == "persistent" and gene.family not in multi:
+    for gene, persistent in zip(contig.genes, persistentGenes):
+        if persistent:
             modif = -pow(persistent_penalty, nbPerc)
             nbPerc += 1
         else:
@@ -123,7 +125,7 @@ def initMatrices(contig, persistent_penalty, variable_gain, multi):
                 # The whole sequence is a rgp, so we're stopping the iteration now, otherwise we'll loop indefinitely
                 break
 
-            if matNode.gene.family.namedPartition == "persistent" and matNode.gene.family not in multi:
+            if persistentGenes[c]:
                 modif = -pow(persistent_penalty, nbPerc)
                 nbPerc += 1
             else:
@@ -137,7 +139,7 @@ def initMatrices(contig, persistent_penalty, variable_gain, multi):
     return mat
 
 
-def mkRegions(contig, matrix, min_length, min_score, persistent, continuity, multi, naming="contig"):
+def mkRegions(contig, matrix, min_length, min_score, persistent, continuity, persistentGenes, naming="contig"):
     # processing matrix and 'emptying' it to get the regions.
     def maxIndexNode(lst):
         """gets the last node with the highest score from a list of matriceNode"""
@@ -160,19 +162,22 @@ def mkRegions(contig, matrix, min_length, min_score, persistent, continuity, mul
         new_region.score = val
         if (new_region[0].stop - new_region[-1].start) > min_length:
             contigRegions.add(new_region)
-        rewriteMatrix(contig, matrix, index, persistent, continuity, multi)
+        rewriteMatrix(contig, matrix, index, persistent, continuity, persistentGenes)
         val, index = maxIndexNode(matrix)
     return contigRegions
 
 
-def compute_org_rgp(organism, persistent_penalty, variable_gain, min_length, min_score, multigenics, naming="contig"):
+def compute_org_rgp(organism, persistent_penalty, variable_gain, min_length, min_score, columns, persistentGenes,
+                    naming="contig"):
+    """persistentGenes tells, for each row of the gene columns, whether the gene is persistent and not multigenic"""
     orgRegions = set()
     for contig in organism.contigs:
         if len(contig.genes) != 0:  # some contigs have no coding genes...
             # can definitely multiprocess this part, as not THAT much information is needed...
-            matrix = initMatrices(contig, persistent_penalty, variable_gain, multigenics)
+            contigPersistent = persistentGenes[columns.contigRows(contig)].tolist()
+            matrix = initMatrices(contig, persistent_penalty, variable_gain, contigPersistent)
             orgRegions |= mkRegions(contig, matrix, min_length, min_score, persistent_penalty, variable_gain,
-                                    multigenics, naming=naming)
+                                    contigPersistent, naming=naming)
     return orgRegions
 
 
@@ -210,11 +215,14 @@ def predictRGP(pangenome, force=False, persistent_penalty=3, variable_gain=1, mi
     multigenics = pangenome.get_multigenics(dup_margin)
     logging.getLogger().info("Compute Regions of Genomic Plasticity ...")
     namingScheme = testNamingScheme(pangenome)
+    columns = pangenome.getGeneColumns()
+    persistentGenes = columns.familyMask(fam is not None and fam.namedPartition == "persistent"
+                                         and fam not in multigenics for fam in columns.families)
     bar = tqdm(pangenome.organisms, unit="genomes", disable=disable_bar)
     for org in bar:
-        pangenome.addRegions(compute_org_rgp(org, persistent_penalty, variable_gain, min_length, min_score, multigenics,
-                                             naming=namingScheme))
-    logging.getLogger().info(f"Predicted {len(pangenome.regions)} RGP")
+        pangenome.addRegions(compute_org_rgp(org, persistent_penalty, variable_gain, min_length, min_score, columns,
+                                             persistentGenes, naming=namingScheme))
+    logging.getLogger().info(f"Predicted {pangenome.number_of_regions()} RGP")
 
     # save parameters and save status
     pangenome.parameters["RGP"] = {}
@@ -11,10 +11,10 @@ import os
 import networkx as nx
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.region import Spot
-from ppanggolin.formats import checkPangenomeInfo, writePangenome, ErasePangenome
-from ppanggolin.utils import mkOutdir
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.region import Spot
+from hdf5_2_json.formats import checkPangenomeInfo, writePangenome, ErasePangenome
+from hdf5_2_json.utils import mkOutdir
 
 
 def compBorder(border1, border2, overlapping_match, exact_match, set_size):
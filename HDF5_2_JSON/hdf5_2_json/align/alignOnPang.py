@@ -9,10 +9,10 @@ import argparse
 from collections import defaultdict
 
 # local libraries
-from ppanggolin.formats import checkPangenomeInfo
-from ppanggolin.utils import mkOutdir, read_compressed_or_not
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.figures.draw_spot import drawSelectedSpots, subgraph
+from hdf5_2_json.formats import checkPangenomeInfo
+from hdf5_2_json.utils import mkOutdir, read_compressed_or_not
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.figures.draw_spot import drawSelectedSpots, subgraph
 
 
 def createdb(fileObj, tmpdir):
@@ -12,11 +12,11 @@ import time
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.annotate import annotate_organism, read_fasta, get_dna_sequence
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.genome import Organism, Gene, RNA
-from ppanggolin.utils import read_compressed_or_not, mkFilename, min_one
-from ppanggolin.formats import writePangenome
+from hdf5_2_json.annotate import annotate_organism, read_fasta, get_dna_sequence
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.genome import Organism, Gene, RNA
+from hdf5_2_json.utils import read_compressed_or_not, mkFilename, min_one
+from hdf5_2_json.formats import writePangenome, appendPangenome, getGeneIDs, addCompressionArgs, setCompression
 
 
 def detect_filetype(filename):
@@ -371,19 +371,21 @@ def readAnnoFile(organism_name, filename, circular_contigs, pseudo):
             "Wrong file type provided. This looks like a fasta file. You may be able to use --fasta instead.")
 
 
-def choseGeneIdentifiers(pangenome):
+def choseGeneIdentifiers(pangenome, existingIDs=None):
     """
         Parses the pangenome genes to decide whether to use local_identifiers or ppanggolin generated gene identifiers.
         If the local identifiers are unique within the pangenome they are picked, otherwise ppanggolin ones are used.
+        existingIDs are the identifiers of the genes already in the pangenome file, when genomes are appended to it.
         :return: Boolean stating True if local identifiers are used, and False otherwise
         :rtype: Bool
     """
+    existingIDs = set() if existingIDs is None else existingIDs
     geneID2local = {}
     local2geneID = {}
     for gene in pangenome.genes:
         geneID2local[gene.ID] = gene.local_identifier
         local2geneID[gene.local_identifier] = gene.ID 
-        if len(local2geneID) != len(geneID2local):
+        if len(local2geneID) != len(geneID2local) or gene.local_identifier in existingIDs:
             #then, there are non unique local identifiers
             return False
     #if we reach this line, local identifiers are unique within the pangenome
@@ -393,7 +395,7 @@ def choseGeneIdentifiers(pangenome):
     pangenome._mkgeneGetter()#re-build the gene getter
     return True
 
-def readAnnotations(pangenome, organisms_file, cpu, pseudo=False, disable_bar=False):
+def readAnnotations(pangenome, organisms_file, cpu, pseudo=False, existingIDs=None, disable_bar=False):
     logging.getLogger().info("Reading " + organisms_file + " the list of organism files ...")
 
     pangenome.status["geneSequences"] = "Computed"
@@ -415,7 +417,7 @@ def readAnnotations(pangenome, organisms_file, cpu, pseudo=False, disable_bar=Fa
     bar.close()
 
     #decide whether or not we use local ids or ppanggolin ids.
-    used_local_identifiers = choseGeneIdentifiers(pangenome)
+    used_local_identifiers = choseGeneIdentifiers(pangenome, existingIDs)
     if used_local_identifiers:
         logging.getLogger().info("gene identifiers used in the provided annotation files were unique, PPanGGOLiN will use them.")
     else:
@@ -444,9 +446,9 @@ def getGeneSequencesFromFastas(pangenome, fasta_file):
         with read_compressed_or_not(elements[1]) as currFastaFile:
             fastaDict[org] = read_fasta(org, currFastaFile)
     if not set(pangenome.organisms) <= set(fastaDict.keys()):
-        missing = len(pangenome.organisms) - len(set(pangenome.organisms) & set(fastaDict.keys()))
+        missing = pangenome.number_of_organisms() - len(set(pangenome.organisms) & set(fastaDict.keys()))
         raise Exception(f"Not all of your pangenome's organisms are present within the provided fasta file. "
-                        f"{missing} are missing (out of {len(pangenome.organisms)}).")
+                        f"{missing} are missing (out of {pangenome.number_of_organisms()}).")
 
     for org in pangenome.organisms:
         try:
@@ -507,14 +509,24 @@ def annotatePangenome(pangenome, fastaList, tmpdir, cpu, translation_table="11",
 def launch(args):
     if not any([args.fasta, args.anno]):
         raise Exception("At least one of --fasta or --anno must be given")
-    filename = mkFilename(args.basename, args.output, args.force)
     pangenome = Pangenome()
+    existingIDs = None
+    if args.append is not None:
+        pangenome.addFile(args.append)
+        if pangenome.status["genomesAnnotated"] != "inFile":
+            raise Exception(f"The pangenome in file '{args.append}' has no genomes to append to. "
+                            f"See the 'annotate' subcommand without --append.")
+        existingIDs = getGeneIDs(pangenome)
+    else:
+        filename = mkFilename(args.basename, args.output, args.force)
+        setCompression(pangenome, args.compression, args.table_compression)
     if args.fasta is not None and args.anno is None:
         annotatePangenome(pangenome, args.fasta, tmpdir=args.tmpdir, cpu=args.cpu,
                           translation_table=args.translation_table, kingdom=args.kingdom, norna=args.norna,
                           overlap=args.overlap, contig_filter=args.contig_filter, disable_bar=args.disable_prog_bar)
     elif args.anno is not None:
-        readAnnotations(pangenome, args.anno, cpu=args.cpu, pseudo=args.use_pseudo, disable_bar=args.disable_prog_bar)
+        readAnnotations(pangenome, args.anno, cpu=args.cpu, pseudo=args.use_pseudo, existingIDs=existingIDs,
+                        disable_bar=args.disable_prog_bar)
         if pangenome.status["geneSequences"] == "No":
             if args.fasta:
                 getGeneSequencesFromFastas(pangenome, args.fasta)
@@ -524,7 +536,10 @@ def launch(args):
                 logging.getLogger().warning("You will be able to proceed with your analysis ONLY if you provide "
                                             "the clustering results in the next step.")
 
-    writePangenome(pangenome, filename, args.force, disable_bar=args.disable_prog_bar)
+    if args.append is not None:
+        appendPangenome(pangenome, disable_bar=args.disable_prog_bar)
+    else:
+        writePangenome(pangenome, filename, args.force, disable_bar=args.disable_prog_bar)
 
 
 def syntaSubparser(subparser):
@@ -560,5 +575,11 @@ def syntaSubparser(subparser):
                           help="In the context of provided annotation, use this option to read pseudogenes. "
                                "(Default behavior is to ignore them)")
     optional.add_argument("--contig_filter", required=False, default=1, type=min_one, help=argparse.SUPPRESS)
+    optional.add_argument("--append", required=False, type=str, default=None,
+                          help="An existing pangenome .h5 file to which the genomes are added, instead of writing a "
+                               "new one. What was computed from the former genomes (graph, partitions, RGP, spots and "
+                               "modules) is erased. The gene families are kept, see 'cluster --append' to give one to "
+                               "the new genes.")
 
+    addCompressionArgs(optional)
     return parser
@@ -9,8 +9,8 @@ import ast
 from collections import defaultdict
 
 # local libraries
-from ppanggolin.genome import Organism, Gene, RNA
-from ppanggolin.utils import is_compressed, read_compressed_or_not
+from hdf5_2_json.genome import Organism, Gene, RNA
+from hdf5_2_json.utils import is_compressed, read_compressed_or_not
 
 
 def reverse_complement(seq):
@@ -14,11 +14,11 @@ from networkx import Graph
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.genome import Gene
-from ppanggolin.utils import read_compressed_or_not, restricted_float
-from ppanggolin.formats import writePangenome, checkPangenomeInfo, getGeneSequencesFromFile, \
-    writeGeneSequencesFromAnnotations, ErasePangenome
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.genome import Gene
+from hdf5_2_json.utils import read_compressed_or_not, restricted_float
+from hdf5_2_json.formats import writePangenome, checkPangenomeInfo, getGeneSequencesFromFile, \
+    writeGeneSequencesFromAnnotations, ErasePangenome, readPangenome, appendClusters
 
 
 def alignRep(faaFile, tmpdir, cpu, coverage, identity):
@@ -141,7 +141,7 @@ def read_gene2fam(pangenome, gene2fam, disable_bar=False):
 
     link = True if pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"] else False
     if link:
-        if len(gene2fam) != len(pangenome.genes):  # then maybe there are genes with identical IDs
+        if len(gene2fam) != pangenome.number_of_genes():  # then maybe there are genes with identical IDs
             raise Exception("Something unexpected happened during clustering "
                             "(have less genes clustered than genes in the pangenome). "
                             "A probable reason is that two genes in two different organisms have the same IDs;"
@@ -236,6 +236,100 @@ def clustering(pangenome, tmpdir, cpu, defrag=True, code="11", coverage=0.8, ide
     pangenome.parameters["cluster"]["read_clustering_from_file"] = False
 
 
+def readUnclusteredGenes(pangenome, disable_bar=False):
+    """
+        Reads the annotations and the gene families of a pangenome file to which genomes were appended with
+        'annotate --append', and returns the genes that have no gene family yet.
+    """
+    if pangenome.status["unclusteredGenes"] != "inFile":
+        raise Exception("All of the genes of your pangenome have a gene family. The --append option only clusters the "
+                        "genes of the genomes appended with 'annotate --append'.")
+    readPangenome(pangenome, annotation=True, geneFamilies=True, disable_bar=disable_bar)
+    genes = [gene for gene in pangenome.genes if gene.family is None]
+    logging.getLogger().info(f"{len(genes)} genes of the appended genomes have no gene family")
+    return genes
+
+
+def alignToFamilies(sequences, repFile, tmpdir, cpu, code, coverage, identity):
+    """
+        Aligns the translated gene sequences to the representative sequences of the gene families, and returns the
+        gene family of the best hit of each gene that has one.
+    """
+    seqNucdb = tmpdir.name + '/appended_nucleotid_db'
+    cmd = ["mmseqs", "createdb", sequences.name, seqNucdb]
+    logging.getLogger().debug(" ".join(cmd))
+    logging.getLogger().info("Creating sequence database...")
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    seqdb = tmpdir.name + '/appended_aa_db'
+    cmd = ["mmseqs", "translatenucs", seqNucdb, seqdb, "--threads", str(cpu), "--translation-table", code]
+    logging.getLogger().debug(" ".join(cmd))
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    repdb = tmpdir.name + '/family_rep_db'
+    cmd = ["mmseqs", "createdb", repFile, repdb]
+    logging.getLogger().debug(" ".join(cmd))
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    alndb = tmpdir.name + '/appended_alignment_db'
+    cmd = ["mmseqs", "search", seqdb, repdb, alndb, tmpdir.name, "-a", "--min-seq-id", str(identity), "-c",
+           str(coverage), "--threads", str(cpu)]
+    logging.getLogger().debug(" ".join(cmd))
+    logging.getLogger().info("Aligning the genes to the gene family representatives...")
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    outfile = tmpdir.name + '/appended_families.tsv'
+    cmd = ["mmseqs", "convertalis", seqdb, repdb, alndb, outfile, "--format-output", "query,target,bits"]
+    logging.getLogger().debug(" ".join(cmd))
+    logging.getLogger().info("Extracting alignments...")
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    bestHits = {}
+    with open(outfile, "r") as alnFile:
+        for line in alnFile:
+            query, target, bits = line.replace("ppanggolin_", "").split()
+            if query not in bestHits or float(bits) > bestHits[query][1]:
+                bestHits[query] = (target, float(bits))
+    return {gene: fam for gene, (fam, _) in bestHits.items()}
+
+
+def clusterAppended(pangenome, tmpdir, cpu, code="11", coverage=0.8, identity=0.8, mode="1", disable_bar=False):
+    """
+        Gives a gene family to the genes of the genomes appended to a pangenome file with 'annotate --append'. The
+        genes that align to the representative sequence of a gene family of the file join it, the others are clustered
+        in new gene families. The gene families of the file are not modified otherwise.
+    """
+    genes = readUnclusteredGenes(pangenome, disable_bar=disable_bar)
+    if pangenome.status["geneSequences"] != "inFile":
+        raise Exception("The pangenome does not include gene sequences, thus it is impossible to cluster the genes of "
+                        "the appended genomes. Provide their clustering results with --clusters.")
+    if pangenome.status["geneFamilySequences"] != "Loaded":
+        raise Exception("The gene families of the pangenome have no representative sequences to align the genes of "
+                        "the appended genomes to. Provide their clustering results with --clusters.")
+    newtmpdir = tempfile.TemporaryDirectory(dir=tmpdir)
+    sequenceFile = open(newtmpdir.name + '/appended_sequences', "w")
+    getGeneSequencesFromFile(pangenome.file, sequenceFile, [gene.ID for gene in genes], add="ppanggolin_",
+                             disable_bar=disable_bar)
+    repFile = newtmpdir.name + '/family_representatives.fasta'
+    with open(repFile, "w") as repFasta:
+        for fam in pangenome.geneFamilies:
+            repFasta.write(">ppanggolin_" + fam.name + "\n" + fam.sequence + "\n")
+    gene2fam = alignToFamilies(sequenceFile, repFile, newtmpdir, cpu, code, coverage, identity)
+    sequenceFile.close()
+    for geneID, family in gene2fam.items():
+        pangenome.getGeneFamily(family).addGene(pangenome.getGene(geneID))
+    logging.getLogger().info(f"{len(gene2fam)} genes joined a gene family of the pangenome")
+
+    remaining = [gene.ID for gene in genes if gene.family is None]
+    if len(remaining) > 0:
+        logging.getLogger().info(f"Clustering the {len(remaining)} remaining genes...")
+        sequenceFile = open(newtmpdir.name + '/nucleotid_sequences', "w")
+        getGeneSequencesFromFile(pangenome.file, sequenceFile, remaining, add="ppanggolin_", disable_bar=disable_bar)
+        rep, tsv = firstClustering(sequenceFile, newtmpdir, cpu, code, coverage, identity, mode)
+        sequenceFile.close()
+        read_fam2seq(pangenome, read_faa(rep))
+        for geneID, (family, is_frag) in read_tsv(tsv)[0].items():
+            geneObj = pangenome.getGene(geneID)
+            geneObj.is_fragment = is_frag
+            pangenome.addGeneFamily(family).addGene(geneObj)
+    newtmpdir.cleanup()
+
+
 def mkLocal2Gene(pangenome):
     """
         Creates a dictionary that stores local identifiers, if all local identifiers are unique (and if they exist)
@@ -255,13 +349,20 @@ def mkLocal2Gene(pangenome):
     return localDict
 
 
-def readClustering(pangenome, families_tsv_file, infer_singletons=False, force=False, disable_bar=False):
+def readClustering(pangenome, families_tsv_file, infer_singletons=False, force=False, append=False,
+                   disable_bar=False):
     """
         Creates the pangenome, the gene families and the genes with an associated gene family.
         Reads a families tsv file from mmseqs2 output and adds the gene families and the genes to the pangenome.
+        With append, only the genes of the genomes appended with 'annotate --append' are given a gene family, the
+        others keep the one they have in the pangenome file.
     """
-    checkPangenomeFormerClustering(pangenome, force)
-    checkPangenomeInfo(pangenome, needAnnotations=True, disable_bar=disable_bar)
+    if append:
+        nbGenes = len(readUnclusteredGenes(pangenome, disable_bar=disable_bar))
+    else:
+        checkPangenomeFormerClustering(pangenome, force)
+        checkPangenomeInfo(pangenome, needAnnotations=True, disable_bar=disable_bar)
+        nbGenes = pangenome.number_of_genes()
 
     logging.getLogger().info("Reading " + families_tsv_file + " the gene families file ...")
     filesize = os.stat(families_tsv_file).st_size
@@ -284,7 +385,7 @@ def readClustering(pangenome, families_tsv_file, infer_singletons=False, force=F
                 geneObj = pangenome.getGene(gene_id)
             except KeyError:
                 geneObj = localDict.get(gene_id)
-            if geneObj is not None:
+            if geneObj is not None and (not append or geneObj.family is None):
                 nbGeneWithFam += 1
                 fam = pangenome.addGeneFamily(fam_id)
                 geneObj.is_fragment = True if is_frag == "F" else False
@@ -295,7 +396,7 @@ def readClustering(pangenome, families_tsv_file, infer_singletons=False, force=F
             raise Exception(f"line {lineCounter} of the file '{families_tsv_file.name}' raised an error.")
     bar.close()
     families_tsv_file.close()
-    if nbGeneWithFam < len(pangenome.genes):  # not all genes have an associated cluster
+    if nbGeneWithFam < nbGenes:  # not all genes have an associated cluster
         if nbGeneWithFam == 0:
             raise Exception("No gene ID in the cluster file matched any gene ID from the annotation step."
                             " Please ensure that the annotations that you loaded previously and the clustering results "
@@ -305,9 +406,11 @@ def readClustering(pangenome, families_tsv_file, infer_singletons=False, force=F
             if infer_singletons:
                 inferSingletons(pangenome)
             else:
-                raise Exception(f"Some genes ({len(pangenome.genes) - nbGeneWithFam}) did not have an associated "
+                raise Exception(f"Some genes ({nbGenes - nbGeneWithFam}) did not have an associated "
                                 f"cluster. Either change your cluster file so that each gene has a cluster, "
                                 f"or use the --infer_singletons option to infer a cluster for each non-clustered gene.")
+    if append:  # the gene families are appended to those of the file, which were computed with their own parameters
+        return
     pangenome.status["genesClustered"] = "Computed"
     if frag:  # if there was fragment information in the file.
         pangenome.status["defragmented"] = "Computed"
@@ -320,6 +423,15 @@ def launch(args):
     """ launch the clustering step"""
     pangenome = Pangenome()
     pangenome.addFile(args.pangenome)
+    if args.append:
+        if args.clusters is None:
+            clusterAppended(pangenome, args.tmpdir, args.cpu, code=args.translation_table, coverage=args.coverage,
+                            identity=args.identity, mode=args.mode, disable_bar=args.disable_prog_bar)
+        else:
+            readClustering(pangenome, args.clusters, args.infer_singletons, append=True,
+                           disable_bar=args.disable_prog_bar)
+        appendClusters(pangenome, disable_bar=args.disable_prog_bar)
+        return
     if args.clusters is None:
         clustering(pangenome, args.tmpdir, args.cpu, defrag=not args.no_defrag, code=args.translation_table,
                    coverage=args.coverage, identity=args.identity, mode=args.mode, force=args.force,
@@ -351,6 +463,11 @@ def clusterSubparser(subparser):
     optional.add_argument("--infer_singletons", required=False, action="store_true",
                           help="When reading a clustering result with --clusters, if a gene is not in the provided file"
                                " it will be placed in a cluster where the gene is the only member.")
+    optional.add_argument("--append", required=False, action="store_true",
+                          help="Only give a gene family to the genes of the genomes appended with 'annotate --append'. "
+                               "They join the gene family of the pangenome whose representative sequence they align "
+                               "to, or are clustered in new gene families (or their families are read from "
+                               "--clusters). The other gene families are kept.")
     optional.add_argument("--mode", required=False, default="1", choices=["0", "1", "2", "3"],
                           help="the cluster mode of MMseqs2. 0: Setcover, 1: single linkage (or connected component),"
                                " 2: CD-HIT-like, 3: CD-HIT-like (lowmem)")
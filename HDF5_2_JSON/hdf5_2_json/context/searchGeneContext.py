@@ -13,11 +13,11 @@ import networkx as nx
 import pandas as pd
 
 # local libraries
-from ppanggolin.formats import checkPangenomeInfo
-from ppanggolin.utils import mkOutdir, restricted_float, add_gene, connected_components
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.align.alignOnPang import get_seq2pang, projectPartition
-from ppanggolin.geneFamily import GeneFamily
+from hdf5_2_json.formats import checkPangenomeInfo
+from hdf5_2_json.utils import mkOutdir, restricted_float, add_gene, connected_components
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.align.alignOnPang import get_seq2pang, projectPartition
+from hdf5_2_json.geneFamily import GeneFamily
 
 
 class GeneContext:
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 # coding: utf8
 
-# default libraries
-from collections import defaultdict
-
-
 class Edge:
     """The Edge class represents an edge between two gene families in the pangenome graph. It is associated with all the organisms in which the neighborship is found, and all the involved genes as well.
 
     :param sourceGene: a first gene to initialize the edge
-    :type sourceGene: :class:`ppanggolin.genome.Gene`
+    :type sourceGene: :class:`hdf5_2_json.genome.Gene`
     :param targetGene: a second gene to initialize the edge
-    :type targetGene: :class:`ppanggolin.genome.Gene`
+    :type targetGene: :class:`hdf5_2_json.genome.Gene`
     """
+    __slots__ = ("source", "target", "_genes")
 
     def __init__(self, sourceGene, targetGene):
         if sourceGene.family is None:
@@ -25,37 +22,60 @@ class Edge:
         self.target = targetGene.family
         self.source._edges[self.target] = self
         self.target._edges[self.source] = self
-        self.organisms = defaultdict(list)
+        # the genes of the pairs in a single flat list (source gene, target gene, source gene, ...), instead of a list
+        # of tuples per organism: the organisms are found from the genes when they are asked for
+        self._genes = []
         self.addGenes(sourceGene, targetGene)
 
+    @property
+    def organisms(self):
+        """
+
+        :return: A dictionnary of the Organisms in which the edge is found, with organisms as key and the list of the pairs of genes as value. It is built on each call.
+        :rtype: dict[:class:`hdf5_2_json.genome.Organism`, list[tuple[:class:`hdf5_2_json.genome.Gene`, :class:`hdf5_2_json.genome.Gene`]]]
+        """
+        orgDict = {}
+        for sourceGene, targetGene in self.genePairs:
+            orgDict.setdefault(sourceGene.organism, []).append((sourceGene, targetGene))
+        return orgDict
+
     def getOrgDict(self):
         """
 
         :return: A dictionnary of the Organisms in which the edge is found, with organisms as key and an iterable of the pairs of genes as value
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, tuple[:class:`ppanggolin.genome.Gene`, :class:`ppanggolin.genome.Gene`]]
+        :rtype: dict[:class:`hdf5_2_json.genome.Organism`, list[tuple[:class:`hdf5_2_json.genome.Gene`, :class:`hdf5_2_json.genome.Gene`]]]
         """
         return self.organisms
 
+    def number_of_organisms(self):
+        """
+
+        :return: The number of organisms in which the edge is found
+        :rtype: int
+        """
+        return len({gene.organism for gene in self._genes[::2]})
+
     @property
     def genePairs(self):
         """
         
         :return: A list of all the gene pairs of the Edge
-        :rtype: list[tuple[:class:`ppanggolin.genome.Gene`, :class:`ppanggolin.genome.Gene`]]
+        :rtype: list[tuple[:class:`hdf5_2_json.genome.Gene`, :class:`hdf5_2_json.genome.Gene`]]
         """
-        return [gene_pair for gene_list in self.organisms.values() for gene_pair in gene_list]
+        return list(zip(self._genes[::2], self._genes[1::2]))
 
     def addGenes(self, sourceGene, targetGene):
         """Adds genes to the edge. They are supposed to be on the same organism.
 
         :param sourceGene: a source gene to add to the edge
-        :type sourceGene: :class:`ppanggolin.genome.Gene`
+        :type sourceGene: :class:`hdf5_2_json.genome.Gene`
         :param targetGene: a target gene to add to the edge
-        :type targetGene: :class:`ppanggolin.genome.Gene`
+        :type targetGene: :class:`hdf5_2_json.genome.Gene`
         :raises Exception: If the genes are not on the same organism.
         """
         org = sourceGene.organism
         if org != targetGene.organism:
             raise Exception(
                 f"You tried to create an edge between two genes that are not even in the same organism ! (genes are '{sourceGene.ID}' and '{targetGene.ID}')")
-        self.organisms[org].append((sourceGene, targetGene))
+        self._genes.append(sourceGene)
+        self._genes.append(targetGene)
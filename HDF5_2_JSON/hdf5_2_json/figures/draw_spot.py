@@ -9,9 +9,9 @@ import random
 from math import pi
 
 # local libraries
-from ppanggolin.utils import jaccard_similarities
-from ppanggolin.formats import checkPangenomeInfo
-from ppanggolin.RGP.spot import compBorder
+from hdf5_2_json.utils import jaccard_similarities
+from hdf5_2_json.formats import checkPangenomeInfo
+from hdf5_2_json.RGP.spot import compBorder
 
 # installed libraries
 from scipy.spatial.distance import pdist
@@ -7,11 +7,11 @@ import time
 import os
 
 # local libraries
-from ppanggolin.utils import mkOutdir
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.figures.draw_spot import drawSpots
-from ppanggolin.figures.tile_plot import drawTilePlot
-from ppanggolin.figures.ucurve import drawUCurve
+from hdf5_2_json.utils import mkOutdir
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.figures.draw_spot import drawSpots
+from hdf5_2_json.figures.tile_plot import drawTilePlot
+from hdf5_2_json.figures.ucurve import drawUCurve
 
 
 def launch(args):
@@ -14,15 +14,15 @@ import plotly.graph_objs as go
 import plotly.offline as out_plotly
 import colorlover as cl
 # local libraries
-from ppanggolin.formats import checkPangenomeInfo
-from ppanggolin.utils import jaccard_similarities
+from hdf5_2_json.formats import checkPangenomeInfo
+from hdf5_2_json.utils import jaccard_similarities
 
 
 def drawTilePlot(pangenome, output, nocloud=False, disable_bar=False):
     checkPangenomeInfo(pangenome, needAnnotations=True, needFamilies=True, needGraph=True, disable_bar=disable_bar)
     if pangenome.status["partitionned"] == "No":
         raise Exception("Cannot draw the tile plot as your pangenome has not been partitioned")
-    if len(pangenome.organisms) > 500 and nocloud is False:
+    if pangenome.number_of_organisms() > 500 and nocloud is False:
         logging.getLogger().warning("You asked to draw a tile plot for a lot of organisms (>500). "
                                     "Your browser will probably not be able to open it.")
     logging.getLogger().info("Drawing the tile plot...")
@@ -35,10 +35,7 @@ def drawTilePlot(pangenome, output, nocloud=False, disable_bar=False):
         families = {fam for fam in pangenome.geneFamilies if not fam.partition.startswith("C")}
     else:
         families = set(pangenome.geneFamilies)
-    org_index = pangenome.getIndex()
-    index2org = {}
-    for org, index in org_index.items():
-        index2org[index] = org
+    index2org = {org.ID: org for org in pangenome.organisms}
     COLORS = {"pangenome": "black", "exact_accessory": "#EB37ED", "exact_core": "#FF2828", "soft_core": "#c7c938",
               "soft_accessory": "#996633", "shell": "#00D860", "persistent": "#F7A507", "cloud": "#79DEFF",
               "undefined": "#828282"}
@@ -46,14 +43,14 @@ def drawTilePlot(pangenome, output, nocloud=False, disable_bar=False):
     logging.getLogger().info("start with matrice")
 
     for row, fam in enumerate(families):
-        new_col = [org_index[org] for org in fam.organisms]
+        new_col = [org.ID for org in fam.organisms]
         all_indexes.extend([row] * len(new_col))
         all_columns.extend(new_col)
         data.extend([1.0] * len(new_col))
         index2fam[row] = fam.name
         fam2index[fam.name] = row
 
-    mat_p_a = csc_matrix((data, (all_indexes, all_columns)), shape=(len(families), len(pangenome.organisms)),
+    mat_p_a = csc_matrix((data, (all_indexes, all_columns)), shape=(len(families), pangenome.max_org_id),
                          dtype='float')
     dist = pdist(1 - jaccard_similarities(mat_p_a, 0).todense())
     hc = linkage(dist, 'single')
@@ -61,7 +58,7 @@ def drawTilePlot(pangenome, output, nocloud=False, disable_bar=False):
     dendro = dendrogram(hc, no_plot=True)
     logging.getLogger().info("done with making the dendrogram to order the organisms on the plot")
 
-    order_organisms = [index2org[index] for index in dendro["leaves"]]
+    order_organisms = [index2org[index] for index in dendro["leaves"] if index in index2org]
 
     binary_data = []
     text_data = []
@@ -141,9 +138,9 @@ def drawTilePlot(pangenome, output, nocloud=False, disable_bar=False):
         else:
             color = COLORS["shell"]
         shapes.append(dict(type='line', x0=-1, x1=-1, y0=sep_prec, y1=sep, line=dict(dict(width=10, color=color))))
-        shapes.append(dict(type='line', x0=len(pangenome.organisms), x1=len(pangenome.organisms), y0=sep_prec, y1=sep,
+        shapes.append(dict(type='line', x0=pangenome.number_of_organisms(), x1=pangenome.number_of_organisms(), y0=sep_prec, y1=sep,
                            line=dict(dict(width=10, color=color))))
-        shapes.append(dict(type='line', x0=-1, x1=len(pangenome.organisms), y0=sep, y1=sep,
+        shapes.append(dict(type='line', x0=-1, x1=pangenome.number_of_organisms(), y0=sep, y1=sep,
                            line=dict(dict(width=1, color=color))))
         sep_prec = sep
 
@@ -6,7 +6,7 @@ from collections import defaultdict
 import plotly.graph_objs as go
 import plotly.offline as out_plotly
 # local libraries
-from ppanggolin.formats import checkPangenomeInfo
+from hdf5_2_json.formats import checkPangenomeInfo
 
 
 def drawUCurve(pangenome, output, soft_core=0.95,  disable_bar=False):
@@ -28,7 +28,7 @@ def drawUCurve(pangenome, output, soft_core=0.95,  disable_bar=False):
     data_plot = []
     chao = "NA"
     if count[1]["pangenome"] > 0:
-        chao = round(len(pangenome.geneFamilies) + ((count[0]["pangenome"] ^ 2) / (count[1]["pangenome"] * 2)), 2)
+        chao = round(pangenome.number_of_geneFamilies() + ((count[0]["pangenome"] ^ 2) / (count[1]["pangenome"] * 2)), 2)
     COLORS = {"pangenome": "black", "exact_accessory": "#EB37ED", "exact_core": "#FF2828", "soft_core": "#c7c938",
               "soft_accessory": "#996633", "shell": "#00D860", "persistent": "#F7A507", "cloud": "#79DEFF",
               "undefined": "#828282"}
@@ -37,24 +37,24 @@ def drawUCurve(pangenome, output, soft_core=0.95,  disable_bar=False):
         persistent_values = []
         shell_values = []
         cloud_values = []
-        for nb_org in range(1, len(pangenome.organisms) + 1):
+        for nb_org in range(1, pangenome.number_of_organisms() + 1):
             persistent_values.append(count[nb_org]["persistent"])
             shell_values.append(count[nb_org]["shell"])
             cloud_values.append(count[nb_org]["cloud"])
-        data_plot.append(go.Bar(x=list(range(1, len(pangenome.organisms) + 1)), y=persistent_values, name='persistent',
+        data_plot.append(go.Bar(x=list(range(1, pangenome.number_of_organisms() + 1)), y=persistent_values, name='persistent',
                                 marker=dict(color=COLORS["persistent"])))
-        data_plot.append(go.Bar(x=list(range(1, len(pangenome.organisms) + 1)), y=shell_values, name='shell',
+        data_plot.append(go.Bar(x=list(range(1, pangenome.number_of_organisms() + 1)), y=shell_values, name='shell',
                                 marker=dict(color=COLORS["shell"])))
-        data_plot.append(go.Bar(x=list(range(1, len(pangenome.organisms) + 1)), y=cloud_values, name='cloud',
+        data_plot.append(go.Bar(x=list(range(1, pangenome.number_of_organisms() + 1)), y=cloud_values, name='cloud',
                                 marker=dict(color=COLORS["cloud"])))
     else:
         text = 'undefined' if has_undefined else "pangenome"
         undefined_values = []
-        for nb_org in range(1, len(pangenome.organisms) + 1):
+        for nb_org in range(1, pangenome.number_of_organisms() + 1):
             undefined_values.append(count[nb_org][text])
-        data_plot.append(go.Bar(x=list(range(1, len(pangenome.organisms) + 1)), y=undefined_values, name=text,
+        data_plot.append(go.Bar(x=list(range(1, pangenome.number_of_organisms() + 1)), y=undefined_values, name=text,
                                 marker=dict(color=COLORS[text])))
-    x = len(pangenome.organisms) * soft_core
+    x = pangenome.number_of_organisms() * soft_core
     layout = go.Layout(title="Gene families frequency distribution (U shape), chao=" + str(chao),
                        xaxis=dict(title='Occurring in x genomes'),
                        yaxis=dict(title='# of gene families (F)'),
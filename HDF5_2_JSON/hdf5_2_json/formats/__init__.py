@@ -1,5 +1,6 @@
 from .writeBinaries import *
 from .readBinaries import *
 from .writeFlat import *
+from .writeNeo4jImport import *
 from .writeSequences import *
 from .writeMSA import *
\ No newline at end of file
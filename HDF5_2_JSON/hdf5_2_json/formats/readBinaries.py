@@ -4,14 +4,17 @@
 # default libraries
 import logging
 import sys
+from multiprocessing import get_context
+from multiprocessing.util import Finalize
 
 # installed libraries
 from tqdm import tqdm
 import tables
+import numpy
 
 # local libraries
-from ppanggolin.genome import Organism, Gene, RNA
-from ppanggolin.region import Spot, Module
+from hdf5_2_json.genome import Organism, Gene, RNA
+from hdf5_2_json.region import Spot, Module
 
 
 def getNumberOfOrganisms(pangenome):
@@ -23,6 +26,10 @@ def getNumberOfOrganisms(pangenome):
     h5f = tables.open_file(filename, "r")
     annotations = h5f.root.annotations
 
+    if "contigs" in annotations:  # the contig index is much smaller than the gene table
+        nbOrgs = len(numpy.unique(annotations.contigs.read(field="organism")))
+        h5f.close()
+        return nbOrgs
     table = annotations.genes
     orgSet = set()
     for org in read_chunks(table, column="organism"):
@@ -31,6 +38,18 @@ def getNumberOfOrganisms(pangenome):
     return len(orgSet)
 
 
+def getGeneIDs(pangenome):
+    """ standalone function to get the identifiers of the genes of a pangenome file, without loading them"""
+    if hasattr(pangenome, "file"):
+        filename = pangenome.file
+    else:
+        raise FileNotFoundError("The provided pangenome does not have an associated .h5 file")
+    h5f = tables.open_file(filename, "r")
+    geneIDs = set(readGeneIDs(h5f))
+    h5f.close()
+    return geneIDs
+
+
 def getStatus(pangenome, pangenomeFile):
     """
         Checks which elements are already present in the file.
@@ -60,6 +79,9 @@ def getStatus(pangenome, pangenomeFile):
     if hasattr(statusGroup._v_attrs, "modules") and statusGroup._v_attrs.modules:
         pangenome.status["modules"] = "inFile"
 
+    if hasattr(statusGroup._v_attrs, "unclusteredGenes") and statusGroup._v_attrs.unclusteredGenes:
+        pangenome.status["unclusteredGenes"] = "inFile"
+
     if "/info" in h5f:
         infoGroup = h5f.root.info
         pangenome.parameters = infoGroup._v_attrs.parameters
@@ -75,6 +97,134 @@ def read_chunks(table, column=None, chunk=10000):
             yield row
 
 
+def read_chunk_arrays(table, column=None, chunk=10000):
+    """
+        Reading entirely the provided table (or column if specified) chunk per chunk to limit RAM usage,
+        each chunk being a numpy structured array so that it can be processed column by column.
+    """
+    for i in range(0, table.nrows, chunk):
+        yield table.read(start=i, stop=i + chunk, field=column)
+
+
+def decode_once(strings, value):
+    """
+        Decodes a bytes value, using the strings dictionary to decode each distinct value only once.
+    """
+    string = strings.get(value)
+    if string is None:
+        string = value.decode()
+        strings[value] = string
+    return string
+
+
+def is_coded(table, column):
+    """
+        Whether the column holds integer indices rather than identifiers, as written since the gene and gene family
+        identifiers are stored once.
+    """
+    return table.coldtypes[column].kind in "iu"
+
+
+def readGeneIDs(h5f):
+    """
+        Reads the identifier of each gene, in the order of the rows of the annotation table.
+    """
+    return [geneID.decode() for IDs in read_chunk_arrays(h5f.root.annotations.genes, column="gene/ID")
+            for geneID in IDs.tolist()]
+
+
+def getRowGenes(pangenome, h5f):
+    """
+        Returns the gene of each row of the annotation table, or None for the rows that are not genes of the pangenome.
+        For the files with a contig index, the genes of each contig are in the rows following its first one, in the
+        order of their positions, so the gene identifiers do not need to be read.
+    """
+    annotations = h5f.root.annotations
+    if "contigs" in annotations:
+        rowGenes = [None] * annotations.genes.nrows
+        names = {}
+        contigs = annotations.contigs
+        for orgName, contigName, start in zip(*[contigs.read(field=field).tolist()
+                                                for field in ["organism", "contig", "start_row"]]):
+            org = pangenome.getOrganism(decode_once(names, orgName))
+            genes = org.getOrAddContig(decode_once(names, contigName)).genes
+            rowGenes[start:start + len(genes)] = genes
+        return rowGenes
+    rowGenes = []
+    for geneID in readGeneIDs(h5f):
+        try:
+            rowGenes.append(pangenome.getGene(geneID))
+        except KeyError:  # RNAs are not genes of the pangenome
+            rowGenes.append(None)
+    return rowGenes
+
+
+class RowGenes:
+    """
+        The genes of the rows of the annotation table of an open pangenome file, which identify the genes in the
+        geneFamilies, edges and RGP tables. They are only read on their first use, once for all of these tables.
+    """
+    def __init__(self, pangenome, h5f):
+        self.pangenome = pangenome
+        self.h5f = h5f
+        self._genes = None
+
+    @property
+    def genes(self):
+        if self._genes is None:
+            self._genes = getRowGenes(self.pangenome, self.h5f)
+        return self._genes
+
+
+def readFamilyNames(h5f):
+    """
+        Reads the name of each gene family, in the order of the rows of the geneFamilyNames table.
+    """
+    return [name.decode() for name in h5f.root.geneFamilyNames.read(field="name").tolist()]
+
+
+def readStrings(table):
+    """
+        Reads the strings of a dictionary encoded column, in the order of their code.
+    """
+    return [string.decode() for string in table.read(field="string").tolist()]
+
+
+def readDictionaries(h5f):
+    """
+        Reads the strings of the dictionary encoded columns of the annotation table.
+
+        :return: the {code: string} dictionary of each encoded column, or None if the file stores the strings in the
+        annotation table.
+    """
+    annotations = h5f.root.annotations
+    if not is_coded(annotations.genes, "gene/type"):
+        return None
+    return {"contig": dict(enumerate(name.decode() for name in annotations.contigs.read(field="contig").tolist())),
+            "type": dict(enumerate(readStrings(annotations.geneTypes))),
+            "name": dict(enumerate(readStrings(annotations.geneNames))),
+            "product": dict(enumerate(readStrings(annotations.geneProducts)))}
+
+
+def readIndices(h5f):
+    """
+        Reads the dense indices of the organisms, contigs and genes written in the contig index of the annotations.
+
+        :return: the index of each organism with, for each of its contigs, the index of the contig and the index of its
+        first gene, or None if the file does not have them.
+    """
+    contigs = h5f.root.annotations.contigs if "contigs" in h5f.root.annotations else None
+    if contigs is None or "ID" not in contigs.colnames:
+        return None
+    indices = {}
+    names = {}
+    for organism, contig, contigID, orgID, geneStart in zip(*[contigs.read(field=field).tolist() for field in
+                                                              ["organism", "contig", "ID", "organism_ID",
+                                                               "gene_start"]]):
+        indices.setdefault(decode_once(names, organism), (orgID, {}))[1][contig.decode()] = (contigID, geneStart)
+    return indices
+
+
 def getGeneSequencesFromFile(filename, fileObj, list_CDS=None, add='', disable_bar=False):
     """
         Writes the CDS sequences of the Pangenome object to a File object that can be filtered or not by a list of CDS, and adds the eventual str 'add' in front of the identifiers
@@ -97,50 +247,65 @@ def getGeneSequencesFromFile(filename, fileObj, list_CDS=None, add='', disable_b
     h5f.close()
 
 
-def launchReadOrganism(args):
-    return readOrganism(*args)
-
-
-def readOrganism(pangenome, orgName, contigDict, circularContigs, link=False):
+def readOrganism(pangenome, orgName, contigDict, circularContigs, link=False, dictionaries=None, indices=None):
+    """
+        Builds an organism from the annotation arrays of its contigs. The genes are taken from the pangenome if link is
+        True, the organism is not added to it. dictionaries are the strings of the dictionary encoded columns, if the
+        file has some (see :func:`readDictionaries`), and indices are the dense indices of the organism and of its
+        contigs, if the file has them (see :func:`readIndices`).
+    """
     org = Organism(orgName)
-    gene, gene_type = (None, None)
-    for contigName, geneList in contigDict.items():
+    if indices is not None:
+        org.ID = indices[0]
+    strings = {}  # types, strands, names and products have few distinct values, they are decoded once.
+    if dictionaries is None:
+        dictionaries = {"type": strings, "name": strings, "product": strings}
+    for contigName, geneArrays in contigDict.items():
         contig = org.getOrAddContig(contigName, is_circular=circularContigs[contigName])
-        for row in geneList:
+        geneStart = None
+        if indices is not None:
+            contig.ID, geneStart = indices[1][contigName]
+        genes = numpy.concatenate(geneArrays)
+        columns = [genes[field].tolist() for field in ["ID", "start", "stop", "strand", "type", "position",
+                                                       "genetic_code", "name", "product", "is_fragment"]]
+        columns.append(genes["local"].tolist() if "local" in genes.dtype.names else [b""] * len(genes))
+        for ID, start, stop, strand, gene_type, position, genetic_code, name, product, is_fragment, local in zip(
+                *columns):
+            gene_type = decode_once(dictionaries["type"], gene_type)
             if link:  # if the gene families are already computed/loaded the gene exists.
-                gene = pangenome.getGene(row["ID"].decode())
-            else:  # else creating the gene.
-                gene_type = row["type"].decode()
-                if gene_type == "CDS":
-                    gene = Gene(row["ID"].decode())
-                elif "RNA" in gene_type:
-                    gene = RNA(row["ID"].decode())
-            try:
-                local = row["local"].decode()
-            except ValueError:
-                local = ""
+                gene = pangenome.getGene(ID.decode())
+            elif gene_type == "CDS":  # else creating the gene.
+                gene = Gene(ID.decode())
+            elif "RNA" in gene_type:
+                gene = RNA(ID.decode())
+            else:
+                raise Exception(f"A strange type '{gene_type}', which we do not know what to do with, was met.")
             gene.fill_annotations(
-                start=row["start"],
-                stop=row["stop"],
-                strand=row["strand"].decode(),
-                geneType=row["type"].decode(),
-                position=row["position"],
-                genetic_code=row["genetic_code"],
-                name=row["name"].decode(),
-                product=row["product"].decode(),
-                local_identifier=local)
-            gene.is_fragment = row["is_fragment"]
+                start=start,
+                stop=stop,
+                strand=decode_once(strings, strand),
+                geneType=gene_type,
+                position=position,
+                genetic_code=genetic_code,
+                name=decode_once(dictionaries["name"], name),
+                product=decode_once(dictionaries["product"], product),
+                local_identifier=local.decode())
+            gene.is_fragment = is_fragment
             gene.fill_parents(org, contig)
             if gene_type == "CDS":
+                if geneStart is not None:
+                    gene.index = geneStart + position
                 contig.addGene(gene)
-            elif "RNA" in gene_type:
-                contig.addRNA(gene)
             else:
-                raise Exception(f"A strange type '{gene_type}', which we do not know what to do with, was met.")
-    pangenome.addOrganism(org)
+                contig.addRNA(gene)
+    return org
 
 
-def readGraph(pangenome, h5f, disable_bar=False):
+def readGraph(pangenome, h5f, disable_bar=False, rowGenes=None):
+    """
+        Reads the edges of the neighbors graph. rowGenes are the genes of the rows of the annotation table
+        (see :class:`RowGenes`), they are read from the file if they are not given.
+    """
     table = h5f.root.edges
 
     if not pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"] or \
@@ -149,29 +314,52 @@ def readGraph(pangenome, h5f, disable_bar=False):
                         "if the annotations and the gene families have not been loaded.")
 
     bar = tqdm(range(table.nrows), unit="contig adjacency", disable=disable_bar)
-    for row in read_chunks(table):
-        source = pangenome.getGene(row["geneSource"].decode())
-        target = pangenome.getGene(row["geneTarget"].decode())
-        pangenome.addEdge(source, target)
-        bar.update()
+    if is_coded(table, "geneSource"):
+        rowGenes = (rowGenes if rowGenes is not None else RowGenes(pangenome, h5f)).genes
+        for rows in read_chunk_arrays(table):
+            for source, target in zip(rows["geneSource"].tolist(), rows["geneTarget"].tolist()):
+                pangenome.addEdge(rowGenes[source], rowGenes[target])
+            bar.update(len(rows))
+    else:
+        for row in read_chunks(table):
+            source = pangenome.getGene(row["geneSource"].decode())
+            target = pangenome.getGene(row["geneTarget"].decode())
+            pangenome.addEdge(source, target)
+            bar.update()
     bar.close()
     pangenome.status["neighborsGraph"] = "Loaded"
 
 
-def readGeneFamilies(pangenome, h5f, disable_bar=False):
+def readGeneFamilies(pangenome, h5f, disable_bar=False, rowGenes=None):
+    """
+        Reads the gene families and their genes. rowGenes are the genes of the rows of the annotation table
+        (see :class:`RowGenes`), they are read from the file if they are not given.
+    """
     table = h5f.root.geneFamilies
 
     link = True if pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"] else False
 
     bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
-    for row in read_chunks(table):
-        fam = pangenome.addGeneFamily(row["geneFam"].decode())
+    if is_coded(table, "gene"):
+        fams = [pangenome.addGeneFamily(name) for name in readFamilyNames(h5f)]
         if link:  # linking if we have loaded the annotations
-            geneObj = pangenome.getGene(row["gene"].decode())
+            rowGenes = (rowGenes if rowGenes is not None else RowGenes(pangenome, h5f)).genes
         else:  # else, no
-            geneObj = Gene(row["gene"].decode())
-        fam.addGene(geneObj)
-        bar.update()
+            rowGenes = readGeneIDs(h5f)
+        for rows in read_chunk_arrays(table):
+            for famIndex, geneRow in zip(rows["geneFam"].tolist(), rows["gene"].tolist()):
+                geneObj = rowGenes[geneRow] if link else Gene(rowGenes[geneRow])
+                fams[famIndex].addGene(geneObj)
+            bar.update(len(rows))
+    else:
+        for row in read_chunks(table):
+            fam = pangenome.addGeneFamily(row["geneFam"].decode())
+            if link:  # linking if we have loaded the annotations
+                geneObj = pangenome.getGene(row["gene"].decode())
+            else:  # else, no
+                geneObj = Gene(row["gene"].decode())
+            fam.addGene(geneObj)
+            bar.update()
     bar.close()
     pangenome.status["genesClustered"] = "Loaded"
 
@@ -207,7 +395,11 @@ def readGeneSequences(pangenome, h5f, disable_bar=False):
     pangenome.status["geneSequences"] = "Loaded"
 
 
-def readRGP(pangenome, h5f, disable_bar=False):
+def readRGP(pangenome, h5f, disable_bar=False, rowGenes=None):
+    """
+        Reads the regions of genomic plasticity. rowGenes are the genes of the rows of the annotation table
+        (see :class:`RowGenes`), they are read from the file if they are not given.
+    """
     if not pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"] or \
             not pangenome.status["genesClustered"] in ["Computed", "Loaded"]:
         raise Exception("It's not possible to read the RGP "
@@ -215,10 +407,17 @@ def readRGP(pangenome, h5f, disable_bar=False):
     table = h5f.root.RGP
 
     bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
-    for row in read_chunks(table):
-        region = pangenome.getOrAddRegion(row["RGP"].decode())
-        region.append(pangenome.getGene(row["gene"].decode()))
-        bar.update()
+    if is_coded(table, "gene"):
+        rowGenes = (rowGenes if rowGenes is not None else RowGenes(pangenome, h5f)).genes
+        for rows in read_chunk_arrays(table):
+            for name, geneRow in zip(rows["RGP"].tolist(), rows["gene"].tolist()):
+                pangenome.getOrAddRegion(name.decode()).append(rowGenes[geneRow])
+            bar.update(len(rows))
+    else:
+        for row in read_chunks(table):
+            region = pangenome.getOrAddRegion(row["RGP"].decode())
+            region.append(pangenome.getGene(row["gene"].decode()))
+            bar.update()
     bar.close()
     # order the genes properly in the regions
     for region in pangenome.regions:
@@ -249,49 +448,250 @@ def readModules(pangenome, h5f, disable_bar=False):
     table = h5f.root.modules
     bar = tqdm(range(table.nrows), unit="module", disable=disable_bar)
     modules = {}  # id2mod
+    famNames = readFamilyNames(h5f) if is_coded(table, "geneFam") else None
     for row in read_chunks(table):
         curr_module = modules.get(row['module'])
         if curr_module is None:
             curr_module = Module(row['module'])
             modules[row["module"]] = curr_module
-        curr_module.addFamily(pangenome.getGeneFamily(row['geneFam'].decode()))
+        if famNames is not None:
+            curr_module.addFamily(pangenome.getGeneFamily(famNames[row['geneFam']]))
+        else:
+            curr_module.addFamily(pangenome.getGeneFamily(row['geneFam'].decode()))
         bar.update()
     bar.close()
     pangenome.addModules(modules.values())
     pangenome.status["modules"] = "Loaded"
 
 
-def readAnnotation(pangenome, h5f, disable_bar=False):
-    annotations = h5f.root.annotations
+def groupAnnotations(chunks, bar=None, dictionaries=None):
+    """
+        Groups the rows of the annotation table by organism and by contig. dictionaries are the strings of the
+        dictionary encoded columns, if the file has some (see :func:`readDictionaries`).
 
-    table = annotations.genes
-    bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
+        :return: the gene arrays of each contig of each organism, and whether each contig of each organism is circular.
+    """
     pangenomeDict = {}
     circularContigs = {}
-    for row in read_chunks(table):
-        try:
-            pangenomeDict[row["organism"].decode()][row["contig"]["name"].decode()].append(
-                row["gene"])  # new gene, seen contig, seen org
-        except KeyError:
-            try:
-                pangenomeDict[row["organism"].decode()][row["contig"]["name"].decode()] = [
-                    row["gene"]]  # new contig, seen org
-                circularContigs[row["organism"].decode()][row["contig"]["name"].decode()] = row["contig"]["is_circular"]
-            except KeyError:
-                pangenomeDict[sys.intern(row["organism"].decode())] = {
-                    row["contig"]["name"].decode(): [row["gene"]]}  # new org
-                circularContigs[row["organism"].decode()] = {
-                    row["contig"]["name"].decode(): row["contig"]["is_circular"]}
-        bar.update()
-    bar.close()
+    names = {}
+    contigNames = dictionaries["contig"] if dictionaries is not None else names
+    for chunk in chunks:
+        organisms = chunk["organism"]
+        contigs = chunk["contig"]["name"]
+        # genes are written organism per organism and contig per contig, so each chunk is a few runs of genes
+        # from the same contig. Each run is added at once, and each organism and contig name is decoded once.
+        bounds = (numpy.flatnonzero((organisms[1:] != organisms[:-1]) | (contigs[1:] != contigs[:-1])) + 1).tolist()
+        for start, stop in zip([0] + bounds, bounds + [len(chunk)]):
+            orgName = decode_once(names, organisms[start])
+            contigName = decode_once(contigNames, contigs[start])
+            contigDict = pangenomeDict.get(orgName)
+            if contigDict is None:  # new org
+                contigDict = pangenomeDict[sys.intern(orgName)] = {}
+                circularContigs[orgName] = {}
+            geneArrays = contigDict.get(contigName)
+            if geneArrays is None:  # new contig
+                geneArrays = contigDict[contigName] = []
+                circularContigs[orgName][contigName] = bool(chunk["contig"]["is_circular"][start])
+            geneArrays.append(chunk["gene"][start:stop])
+        if bar is not None:
+            bar.update(len(chunk))
+    return pangenomeDict, circularContigs
+
+
+def readOrganismRows(h5f):
+    """
+        Reads the rows of the annotation table of each organism from the contig index of the file.
 
-    link = True if pangenome.status["genesClustered"] in ["Computed", "Loaded"] else False
+        :return: the [start, stop] ranges of rows of each organism, in the order of the file
+    """
+    orgIndex = {}
+    names = {}
+    for organism, start, stop in zip(*[h5f.root.annotations.contigs.read(field=field).tolist()
+                                       for field in ["organism", "start_row", "stop_row"]]):
+        ranges = orgIndex.setdefault(sys.intern(decode_once(names, organism)), [])
+        if len(ranges) > 0 and ranges[-1][1] == start:
+            ranges[-1][1] = stop
+        else:
+            ranges.append([start, stop])
+    return orgIndex
 
-    bar = tqdm(range(len(pangenomeDict)), unit="organism", disable=disable_bar)
-    for orgName, contigDict in pangenomeDict.items():
-        readOrganism(pangenome, orgName, contigDict, circularContigs[orgName], link)
-        bar.update()
+
+def readAnnotationIndex(pangenome, h5f, disable_bar=False):
+    """
+        Reads the rows of the genes of each organism from the contig index of the file, or from the organism column
+        of the annotation table for the files that do not have one. The organisms are then loaded from the file when they are needed, see
+        :meth:`hdf5_2_json.pangenome.Pangenome.loadOrganisms`.
+    """
+    orgIndex = {}
+    names = {}
+    indices = readIndices(h5f)
+    if indices is not None:  # the indices of the organisms that are not loaded are not given to new ones
+        contigs = h5f.root.annotations.contigs
+        orgIDs = contigs.read(field="organism_ID").astype(numpy.int64)
+        pangenome.reserveIndices(int(orgIDs.max(initial=-1)) + 1, contigs.nrows,
+                                 int(contigs.read(field="gene_stop").max(initial=0)))
+    if "contigs" in h5f.root.annotations:  # the rows of each contig were written in the file
+        pangenome.setLazyOrganisms(readOrganismRows(h5f))
+        pangenome.status["genomesAnnotated"] = "Loaded"
+        return
+    table = h5f.root.annotations.genes
+    bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
+    offset = 0
+    for organisms in read_chunk_arrays(table, column="organism"):
+        bounds = (numpy.flatnonzero(organisms[1:] != organisms[:-1]) + 1).tolist()
+        for start, stop in zip([0] + bounds, bounds + [len(organisms)]):
+            ranges = orgIndex.setdefault(sys.intern(decode_once(names, organisms[start])), [])
+            if len(ranges) > 0 and ranges[-1][1] == offset + start:  # the organism continues from the last chunk
+                ranges[-1][1] = offset + stop
+            else:
+                ranges.append([offset + start, offset + stop])
+        offset += len(organisms)
+        bar.update(len(organisms))
     bar.close()
+    pangenome.setLazyOrganisms(orgIndex)
+    pangenome.status["genomesAnnotated"] = "Loaded"
+
+
+def readLazyOrganisms(pangenome, orgIndex):
+    """
+        Loads the given organisms from the rows of the annotation table given for each of them in orgIndex.
+    """
+    h5f = tables.open_file(pangenome.file, "r")
+    table = h5f.root.annotations.genes
+    dictionaries = readDictionaries(h5f)
+    indices = readIndices(h5f)
+    for orgName, ranges in orgIndex.items():
+        pangenomeDict, circularContigs = groupAnnotations((table.read(start=start, stop=stop)
+                                                           for start, stop in ranges), dictionaries=dictionaries)
+        pangenome.addOrganism(readOrganism(pangenome, orgName, pangenomeDict[orgName], circularContigs[orgName],
+                                           dictionaries=dictionaries,
+                                           indices=indices[orgName] if indices is not None else None))
+    h5f.close()
+
+
+def readGeneIndex(pangenome):
+    """
+        Reads what is needed to find the organism of any gene of the pangenome file without reading all of the gene
+        identifiers: the first identifier of each chunk of the sorted gene index of the file, which tells the only chunk
+        that may hold a gene, and the first row and organism of each contig from the contig index of the file.
+        The files written without a gene index have all of their gene identifiers read and sorted instead, with the row
+        of each of them. The files with no contig index have None instead of the contig starts and organisms.
+
+        :return: the first identifiers of the chunks and their size, or the sorted identifiers and their rows, then the
+                 sorted first rows of the contigs and the contig organisms
+    """
+    h5f = tables.open_file(pangenome.file, "r")
+    annotations = h5f.root.annotations
+    if "geneIndex" in annotations:
+        step = int(annotations.geneIndex.chunkshape[0])
+        IDs, rows = annotations.geneIndex.read(step=step, field="ID"), step
+    else:
+        IDs = annotations.genes.read(field="gene/ID")
+        rows = numpy.argsort(IDs)
+        IDs = IDs[rows]
+    contigStarts, contigOrganisms = None, None
+    if "contigs" in annotations:
+        contigStarts = annotations.contigs.read(field="start_row")
+        order = numpy.argsort(contigStarts, kind="stable")
+        contigStarts = contigStarts[order]
+        contigOrganisms = annotations.contigs.read(field="organism")[order]
+    h5f.close()
+    return IDs, rows, contigStarts, contigOrganisms
+
+
+def getGeneOrganism(pangenome, geneID, geneIndex=None):
+    """
+        Looks for a gene in the pangenome file, without loading it. The chunk of the gene index of the file that may
+        hold the gene is found from the geneIndex (see :func:`readGeneIndex`), which is read if it is not given, and
+        only this chunk is read to search the gene in. The organism of the gene is given by the contig index of the
+        file.
+
+        :return: the name of the organism of the gene, or None if it is not in the file.
+    """
+    if geneIndex is None:
+        geneIndex = readGeneIndex(pangenome)
+    IDs, rows, contigStarts, contigOrganisms = geneIndex
+    searched = geneID.encode()
+    h5f = tables.open_file(pangenome.file, "r")
+    try:
+        if isinstance(rows, int):  # rows is the size of the chunks of the gene index of the file
+            chunk = int(numpy.searchsorted(IDs, searched, side="right")) - 1
+            if chunk < 0:
+                return None
+            index = h5f.root.annotations.geneIndex.read(start=chunk * rows, stop=(chunk + 1) * rows)
+            IDs, rows = index["ID"], index["row"]
+        position = int(numpy.searchsorted(IDs, searched))
+        if position == len(IDs) or IDs[position] != searched:
+            return None
+        row = int(rows[position])
+        if contigStarts is not None:
+            return contigOrganisms[numpy.searchsorted(contigStarts, row, side="right") - 1].decode()
+        return h5f.root.annotations.genes.read(start=row, stop=row + 1, field="organism")[0].decode()
+    finally:
+        h5f.close()
+
+
+def initAnnotationReader(filename):
+    """
+        Opens the pangenome file in a process reading the annotations, see :func:`readOrganismArrays`. The file is
+        closed when the process exits.
+    """
+    global annotationFile, annotationDictionaries
+    annotationFile = tables.open_file(filename, "r")
+    annotationDictionaries = readDictionaries(annotationFile)
+    Finalize(None, annotationFile.close, exitpriority=10)
+
+
+def readOrganismArrays(orgIndex):
+    """
+        Reads and groups the annotation rows of some organisms, given as ranges of rows for each of them.
+        Only the arrays are built, the objects are built by the main process.
+    """
+    table = annotationFile.root.annotations.genes
+    return groupAnnotations((table.read(start=start, stop=stop) for ranges in orgIndex.values()
+                             for start, stop in ranges), dictionaries=annotationDictionaries)
+
+
+def readAnnotation(pangenome, h5f, cpu=1, disable_bar=False):
+    annotations = h5f.root.annotations
+
+    table = annotations.genes
+    dictionaries = readDictionaries(h5f)
+    link = True if pangenome.status["genesClustered"] in ["Computed", "Loaded"] else False
+    indices = readIndices(h5f)
+    if indices is None:
+        indices = {}
+
+    if cpu > 1 and "contigs" in annotations:
+        # The rows of each organism are known from the contig index, so the organisms are read and decompressed by
+        # several processes, a group of organisms at a time. The objects are built and added to the pangenome here,
+        # in the file order, as they cannot be shared between processes.
+        # The processes are spawned rather than forked, so that they do not inherit the HDF5 state of this process,
+        # which has the file open, and they open the file themselves.
+        orgIndex = list(readOrganismRows(h5f).items())
+        groupSize = max(1, len(orgIndex) // (cpu * 4))
+        groups = [dict(orgIndex[i:i + groupSize]) for i in range(0, len(orgIndex), groupSize)]
+        bar = tqdm(range(len(orgIndex)), unit="organism", disable=disable_bar)
+        with get_context('spawn').Pool(processes=cpu, initializer=initAnnotationReader,
+                                       initargs=(h5f.filename,)) as p:
+            for pangenomeDict, circularContigs in p.imap(readOrganismArrays, groups):
+                for orgName, contigDict in pangenomeDict.items():
+                    pangenome.addOrganism(readOrganism(pangenome, orgName, contigDict, circularContigs[orgName],
+                                                       link, dictionaries, indices.get(orgName)))
+                    bar.update()
+            p.close()
+            p.join()  # the processes exit and close their file, instead of being terminated when leaving the pool
+        bar.close()
+    else:
+        bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
+        pangenomeDict, circularContigs = groupAnnotations(read_chunk_arrays(table), bar, dictionaries)
+        bar.close()
+        bar = tqdm(range(len(pangenomeDict)), unit="organism", disable=disable_bar)
+        for orgName, contigDict in pangenomeDict.items():
+            pangenome.addOrganism(readOrganism(pangenome, orgName, contigDict, circularContigs[orgName], link,
+                                               dictionaries, indices.get(orgName)))
+            bar.update()
+        bar.close()
     pangenome.status["genomesAnnotated"] = "Loaded"
 
 
@@ -370,20 +770,30 @@ def readParameters(h5f):
 
 
 def readPangenome(pangenome, annotation=False, geneFamilies=False, graph=False, rgp=False, spots=False,
-                  geneSequences=False, modules=False, disable_bar=False):
+                  geneSequences=False, modules=False, cpu=1, lazy=False, disable_bar=False):
     """
         Reads a previously written pangenome, with all of its parts, depending on what is asked,
         with regard to what is filled in the 'status' field of the hdf5 file.
+        If lazy is True and only the annotations are asked, organisms are only loaded when they are accessed.
     """
     if hasattr(pangenome, "file"):
         filename = pangenome.file
     else:
         raise FileNotFoundError("The provided pangenome does not have an associated .h5 file")
     h5f = tables.open_file(filename, "r")
+    rowGenes = RowGenes(pangenome, h5f)  # shared by the tables identifying the genes by their row
+    needAllGenes = geneFamilies or graph or rgp or spots or geneSequences or modules
+    if needAllGenes and pangenome.number_of_lazy_organisms() > 0:
+        # every gene is needed, so are the organisms that were not loaded yet
+        pangenome.loadOrganisms()
     if annotation:
         if h5f.root.status._v_attrs.genomesAnnotated:
-            logging.getLogger().info("Reading pangenome annotations...")
-            readAnnotation(pangenome, h5f, disable_bar=disable_bar)
+            if lazy and not needAllGenes:
+                logging.getLogger().info("Indexing pangenome annotations...")
+                readAnnotationIndex(pangenome, h5f, disable_bar=disable_bar)
+            else:
+                logging.getLogger().info("Reading pangenome annotations...")
+                readAnnotation(pangenome, h5f, cpu=cpu, disable_bar=disable_bar)
         else:
             raise Exception(f"The pangenome in file '{filename}' has not been annotated, or has been improperly filled")
     if geneSequences:
@@ -397,7 +807,7 @@ def readPangenome(pangenome, annotation=False, geneFamilies=False, graph=False,
     if geneFamilies:
         if h5f.root.status._v_attrs.genesClustered:
             logging.getLogger().info("Reading pangenome gene families...")
-            readGeneFamilies(pangenome, h5f, disable_bar=disable_bar)
+            readGeneFamilies(pangenome, h5f, disable_bar=disable_bar, rowGenes=rowGenes)
             readGeneFamiliesInfo(pangenome, h5f, disable_bar=disable_bar)
         else:
             raise Exception(
@@ -405,14 +815,14 @@ def readPangenome(pangenome, annotation=False, geneFamilies=False, graph=False,
     if graph:
         if h5f.root.status._v_attrs.NeighborsGraph:
             logging.getLogger().info("Reading the neighbors graph edges...")
-            readGraph(pangenome, h5f, disable_bar=disable_bar)
+            readGraph(pangenome, h5f, disable_bar=disable_bar, rowGenes=rowGenes)
         else:
             raise Exception(
                 f"The pangenome in file '{filename}' does not have graph information, or has been improperly filled")
     if rgp:
         if h5f.root.status._v_attrs.predictedRGP:
             logging.getLogger().info("Reading the RGP...")
-            readRGP(pangenome, h5f, disable_bar=disable_bar)
+            readRGP(pangenome, h5f, disable_bar=disable_bar, rowGenes=rowGenes)
         else:
             raise Exception(
                 f"The pangenome in file '{filename}' does not have RGP information, or has been improperly filled")
@@ -434,7 +844,8 @@ def readPangenome(pangenome, annotation=False, geneFamilies=False, graph=False,
 
 
 def checkPangenomeInfo(pangenome, needAnnotations=False, needFamilies=False, needGraph=False, needPartitions=False,
-                       needRGP=False, needSpots=False, needGeneSequences=False, needModules=False, disable_bar=False):
+                       needRGP=False, needSpots=False, needGeneSequences=False, needModules=False, cpu=1,
+                       lazy=False, disable_bar=False):
     """
     defines what needs to be read depending on what is needed, and automatically checks if the required elements
     have been computed with regard to the pangenome.status
@@ -458,6 +869,9 @@ def checkPangenomeInfo(pangenome, needAnnotations=False, needFamilies=False, nee
             geneFamilies = True
         elif not pangenome.status["genesClustered"] in ["Computed", "Loaded"]:
             raise Exception("Your pangenome has no gene families. See the 'cluster' subcommand.")
+        if pangenome.status["unclusteredGenes"] == "inFile":
+            raise Exception("The genes of the genomes appended to your pangenome have no gene families yet. "
+                            "See the 'cluster' subcommand with --append.")
     if needGraph:
         if pangenome.status["neighborsGraph"] == "inFile":
             graph = True
@@ -492,4 +906,4 @@ def checkPangenomeInfo(pangenome, needAnnotations=False, needFamilies=False, nee
     if annotation or geneFamilies or graph or rgp or spots or geneSequences or modules:
         # if anything is true, else we need nothing.
         readPangenome(pangenome, annotation=annotation, geneFamilies=geneFamilies, graph=graph, rgp=rgp, spots=spots,
-                      geneSequences=geneSequences, modules=modules, disable_bar=disable_bar)
+                      geneSequences=geneSequences, modules=modules, cpu=cpu, lazy=lazy, disable_bar=disable_bar)
@@ -2,6 +2,7 @@
 # coding:utf-8
 
 # default libraries
+import argparse
 import logging
 from collections import Counter, defaultdict
 import statistics
@@ -10,14 +11,137 @@ import pkg_resources
 # installed libraries
 from tqdm import tqdm
 import tables
-from gmpy2 import popcount
+import numpy
+
+# local libraries
+from hdf5_2_json.formats.readBinaries import read_chunk_arrays, is_coded, readStrings, readGeneIDs
+from hdf5_2_json.geneColumns import partitionMask
+
+
+# Compression settings of the tables, for each preset. The settings of 'default' apply to the tables that have none
+# of their own, the keys being those of tables.Filters and 'chunkshape', the number of rows of each chunk.
+COMPRESSION_PRESETS = {
+    # a good compression ratio at a low cost, what the files have always been written with
+    "balanced": {"default": {"complib": "blosc:zstd", "complevel": 1, "shuffle": True, "bitshuffle": True}},
+    # fast decompression, and large chunks for the integer tables that are read whole, chunk by chunk
+    "read": {"default": {"complib": "blosc:lz4", "complevel": 5, "shuffle": True, "bitshuffle": True},
+             "genes": {"chunkshape": 4096},
+             "geneFamilies": {"chunkshape": 65536},
+             "edges": {"chunkshape": 65536},
+             "RGP": {"chunkshape": 16384}},
+    # the cheapest compression, for files that are written more often than they are read
+    "write": {"default": {"complib": "blosc:lz4", "complevel": 1, "shuffle": True, "bitshuffle": False}},
+    # the smallest files, the sequences being the largest part of them
+    "small": {"default": {"complib": "blosc:zstd", "complevel": 5, "shuffle": True, "bitshuffle": True},
+              "geneSequences": {"complevel": 9},
+              "geneFamiliesInfo": {"complevel": 9}},
+}
+COMPRESSION_KEYS = {"complib": str, "complevel": int, "shuffle": bool, "bitshuffle": bool, "fletcher32": bool,
+                    "chunkshape": int}
+
+
+def table_compression(x):
+    """
+        Parses the compression settings of a table given as 'table,key=value,...', such as 'edges,complevel=5'.
+    """
+    table, *settings = x.split(",")
+    parsed = {}
+    for setting in settings:
+        key, _, value = setting.partition("=")
+        if key not in COMPRESSION_KEYS or value == "":
+            raise argparse.ArgumentTypeError(f"'{setting}' is not a compression setting. The possible settings are "
+                                             f"{', '.join(key + '=...' for key in COMPRESSION_KEYS)}")
+        if COMPRESSION_KEYS[key] is bool:
+            parsed[key] = value.lower() in ["1", "true", "yes"]
+        else:
+            parsed[key] = COMPRESSION_KEYS[key](value)
+    return table, parsed
+
+
+def addCompressionArgs(group):
+    """
+        Adds the options setting the compression of the tables of the pangenome file to an argument group.
+    """
+    group.add_argument("--compression", required=False, default="balanced", choices=list(COMPRESSION_PRESETS),
+                       help="Compression preset of the tables of the pangenome file: 'read' for files that are read "
+                            "often, 'write' for files that are often rewritten, 'small' for the smallest files.")
+    group.add_argument("--table_compression", required=False, type=table_compression, action="append", default=[],
+                       help="Compression settings of a table overriding those of the preset, as 'table,key=value,...' "
+                            "such as 'edges,complevel=5,chunkshape=65536'. The keys are "
+                            f"{', '.join(COMPRESSION_KEYS)}. Can be given once per table, 'default' setting those "
+                            f"of every table.")
+
+
+def setCompression(pangenome, preset="balanced", tableSettings=None):
+    """
+        Sets the compression settings of the tables of the pangenome file in the pangenome parameters, from a preset
+        and settings overriding those of the preset for some tables. They are saved with the parameters, so the tables
+        written later in the file are compressed the same way.
+
+        :param tableSettings: (table name, settings) pairs, as given by :func:`table_compression`
+    """
+    settings = {table: dict(tableSetting) for table, tableSetting in COMPRESSION_PRESETS[preset].items()}
+    for table, tableSetting in tableSettings if tableSettings is not None else []:
+        settings.setdefault(table, {}).update(tableSetting)
+    pangenome.parameters["compression"] = {"preset": preset, **settings}
 
 
-def geneDesc(orgLen, contigLen, IDLen, typeLen, nameLen, productLen, maxLocalId):
+def tableOptions(pangenome, name):
+    """
+        Returns the filters and the chunk shape to create a table with, from the compression settings of the
+        pangenome parameters. Pangenomes that have none use the 'balanced' preset.
+    """
+    settings = pangenome.parameters.get("compression", COMPRESSION_PRESETS["balanced"])
+    options = dict(settings.get("default", {}))
+    options.update(settings.get(name, {}))
+    chunkshape = options.pop("chunkshape", None)
+    return {"filters": tables.Filters(**options), "chunkshape": (chunkshape,) if chunkshape is not None else None}
+
+
+class TableBuffer:
+    """
+    Buffers the rows written to a table, to append them in bulk as numpy structured arrays of up to `chunk` rows
+    instead of one at a time through the Row of the table.
+
+    :param table: The table the rows are appended to
+    :type table: tables.Table
+    :param columns: The paths of the columns given for each row, such as 'gene/ID'. The others get their default value.
+    :type columns: list[str]
+    :param chunk: The number of rows appended at once
+    :type chunk: int
+    """
+
+    def __init__(self, table, columns, chunk=200000):
+        self.table = table
+        self.paths = columns
+        self.columns = [[] for _ in columns]
+        self.chunk = chunk
+
+    def append(self, *values):
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        if len(self.columns[0]) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        if len(self.columns[0]) > 0:
+            block = numpy.empty(len(self.columns[0]), dtype=self.table.dtype)
+            values = dict(zip(self.paths, self.columns))
+            for path in self.table.colpathnames:
+                field = block
+                for name in path.split("/"):
+                    field = field[name]
+                field[:] = values.get(path, self.table.coldflts[path])
+            self.table.append(block)
+            self.columns = [[] for _ in self.paths]
+        self.table.flush()
+
+
+def geneDesc(orgLen, IDLen, maxLocalId):
     return {
         'organism': tables.StringCol(itemsize=orgLen),
         "contig": {
-            'name': tables.StringCol(itemsize=contigLen),
+            'name': tables.UInt32Col(),
             "is_circular": tables.BoolCol(dflt=False)
         },
         "gene": {
@@ -25,10 +149,10 @@ def geneDesc(orgLen, contigLen, IDLen, typeLen, nameLen, productLen, maxLocalId)
             'start': tables.UInt64Col(),
             'stop': tables.UInt64Col(),
             'strand': tables.StringCol(itemsize=1),
-            'type': tables.StringCol(itemsize=typeLen),
+            'type': tables.UInt32Col(),
             'position': tables.UInt32Col(),
-            'name': tables.StringCol(itemsize=nameLen),
-            'product': tables.StringCol(itemsize=productLen),
+            'name': tables.UInt32Col(),
+            'product': tables.UInt32Col(),
             'genetic_code': tables.UInt32Col(dflt=11),
             'is_fragment': tables.BoolCol(dflt=False),
             'local': tables.StringCol(itemsize=maxLocalId)
@@ -36,105 +160,200 @@ def geneDesc(orgLen, contigLen, IDLen, typeLen, nameLen, productLen, maxLocalId)
     }
 
 
-def getMaxLenAnnotations(pangenome):
-    maxOrgLen = 1
-    maxContigLen = 1
-    maxGeneIDLen = 1
-    maxNameLen = 1
-    maxProductLen = 1
-    maxTypeLen = 1
-    maxLocalId = 1
-    for org in pangenome.organisms:
-        if len(org.name) > maxOrgLen:
-            maxOrgLen = len(org.name)
-        for contig in org.contigs:
-            if len(contig.name) > maxContigLen:
-                maxContigLen = len(contig.name)
-            for gene in contig.genes:
-                if len(gene.ID) > maxGeneIDLen:
-                    maxGeneIDLen = len(gene.ID)
-                if len(gene.name) > maxNameLen:
-                    maxNameLen = len(gene.name)
-                if len(gene.product) > maxProductLen:
-                    maxProductLen = len(gene.product)
-                if len(gene.type) > maxTypeLen:
-                    maxTypeLen = len(gene.type)
-                if len(gene.local_identifier) > maxLocalId:
-                    maxLocalId = len(gene.local_identifier)
-            for gene in contig.RNAs:
-                if len(gene.ID) > maxGeneIDLen:
-                    maxGeneIDLen = len(gene.ID)
-                if len(gene.name) > maxNameLen:
-                    maxNameLen = len(gene.name)
-                if len(gene.product) > maxProductLen:
-                    maxProductLen = len(gene.product)
-                if len(gene.type) > maxTypeLen:
-                    maxTypeLen = len(gene.type)
-                if len(gene.local_identifier) > maxLocalId:
-                    maxLocalId = len(gene.local_identifier)
-
-    return maxOrgLen, maxContigLen, maxGeneIDLen, maxTypeLen, maxNameLen, maxProductLen, maxLocalId
-
-
-def writeAnnotations(pangenome, h5f, disable_bar=False):
-    """
-        Function writing all the pangenome's annotations
+def contigDesc(orgLen, contigLen):
+    return {
+        'organism': tables.StringCol(itemsize=orgLen),
+        'contig': tables.StringCol(itemsize=contigLen),
+        'start_row': tables.UInt64Col(),
+        'stop_row': tables.UInt64Col(),
+        'n_genes': tables.UInt64Col(),
+        'is_circular': tables.BoolCol(dflt=False),
+        # dense indices of the contig, of its organism and of its genes in the pangenome
+        'ID': tables.UInt32Col(),
+        'organism_ID': tables.UInt32Col(),
+        'gene_start': tables.UInt64Col(),
+        'gene_stop': tables.UInt64Col()
+    }
+
+
+def geneIndexDesc(geneIDLen):
+    return {
+        "ID": tables.StringCol(itemsize=geneIDLen),
+        "row": tables.UInt32Col()
+    }
+
+
+def dictionaryDesc(maxLen):
+    return {
+        "string": tables.StringCol(itemsize=maxLen)
+    }
+
+
+def getMaxLens(pangenome, annotations=False, sequences=False, families=False, rgp=False, spots=False):
+    """
+        Sizes the tables that are going to be written: computes the maximal length of the strings of each of them, and
+        the number of genes, in a single traversal of each kind of pangenome object.
+
+        :return: a dictionary with the sizes, for the tables that are asked
     """
+    maxLens = {}
+    if annotations or sequences:
+        maxLens.update(org=1, contig=1, geneID=1, local=1, dna=1, type=1, genes=0)
+        if annotations:
+            for org in pangenome.organisms:
+                maxLens["org"] = max(maxLens["org"], len(org.name))
+                for contig in org.contigs:
+                    maxLens["contig"] = max(maxLens["contig"], len(contig.name))
+                    for gene in contig.genes:
+                        maxLens["geneID"] = max(maxLens["geneID"], len(gene.ID))
+                        maxLens["local"] = max(maxLens["local"], len(gene.local_identifier))
+                        if sequences:
+                            maxLens["dna"] = max(maxLens["dna"], len(gene.dna))
+                            maxLens["type"] = max(maxLens["type"], len(gene.type))
+                        maxLens["genes"] += 1
+                    for rna in contig.RNAs:
+                        maxLens["geneID"] = max(maxLens["geneID"], len(rna.ID))
+                        maxLens["local"] = max(maxLens["local"], len(rna.local_identifier))
+        else:  # the genes may come from the gene families, if no organism is loaded
+            for gene in pangenome.genes:
+                maxLens["geneID"] = max(maxLens["geneID"], len(gene.ID))
+                maxLens["dna"] = max(maxLens["dna"], len(gene.dna))
+                maxLens["type"] = max(maxLens["type"], len(gene.type))
+                maxLens["genes"] += 1
+    if families:
+        maxLens.update(famName=1, famSeq=1, partition=1)
+        for fam in pangenome.geneFamilies:
+            maxLens["famName"] = max(maxLens["famName"], len(fam.name))
+            maxLens["famSeq"] = max(maxLens["famSeq"], len(fam.sequence))
+            maxLens["partition"] = max(maxLens["partition"], len(fam.partition))
+    if rgp:
+        maxLens.update(RGP=1, RGPGenes=0)
+        for region in pangenome.regions:
+            maxLens["RGP"] = max(maxLens["RGP"], len(region.name))
+            maxLens["RGPGenes"] += len(region.genes)
+    if spots:
+        maxLens.update(spotRGP=1, spotRGPs=0)
+        for spot in pangenome.spots:
+            for region in spot.regions:
+                maxLens["spotRGP"] = max(maxLens["spotRGP"], len(region.name))
+            maxLens["spotRGPs"] += len(spot.regions)
+    return maxLens
+
+
+def getCode(dictionary, string):
+    """
+        Returns the code of the string in the dictionary, adding the string to it if it is new.
+    """
+    code = dictionary.get(string)
+    if code is None:
+        code = len(dictionary)
+        dictionary[string] = code
+    return code
+
+
+def writeDictionary(h5f, where, name, dictionary):
+    """
+        Writes the strings of a dictionary encoded column, the code of each string being its row in the table.
+    """
+    table = h5f.create_table(where, name, dictionaryDesc(max([len(string) for string in dictionary], default=1)),
+                             expectedrows=len(dictionary))
+    row = table.row
+    for string in dictionary:
+        row["string"] = string
+        row.append()
+    table.flush()
+
+
+def writeAnnotations(pangenome, h5f, maxLens=None, disable_bar=False):
+    """
+        Function writing all the pangenome's annotations. The gene types, names and products have few distinct values,
+        so they are dictionary encoded: each distinct string is written once in the geneTypes, geneNames and
+        geneProducts tables, and the annotation table stores its row. The contig of each gene is stored as the row of
+        the contig in the contigs table.
+    """
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, annotations=True)
     annotation = h5f.create_group("/", "annotations", "Annotations of the pangenome's organisms")
-    geneTable = h5f.create_table(annotation, "genes", geneDesc(*getMaxLenAnnotations(pangenome)),
-                                 expectedrows=len(pangenome.genes))
+    geneTable = h5f.create_table(annotation, "genes", geneDesc(maxLens["org"], maxLens["geneID"], maxLens["local"]),
+                                 expectedrows=maxLens["genes"], **tableOptions(pangenome, "genes"))
+    # index of the rows of the genes of each contig, which are written contig after contig
+    contigTable = h5f.create_table(annotation, "contigs", contigDesc(maxLens["org"], maxLens["contig"]),
+                                   **tableOptions(pangenome, "contigs"))
+    dictionaries = {"geneTypes": {}, "geneNames": {}, "geneProducts": {}}
+    fillAnnotations(pangenome.organisms, geneTable, contigTable, dictionaries, disable_bar=disable_bar)
+    for name, dictionary in dictionaries.items():
+        writeDictionary(h5f, annotation, name, dictionary)
+    writeGeneIndex(h5f)
+
+
+def writeGeneIndex(h5f):
+    """
+        Writes the identifiers of the genes of the annotation table sorted, with the row of each of them, so that a gene
+        is found in the file by a binary search instead of reading all of the identifiers
+        (see :func:`hdf5_2_json.formats.readBinaries.getGeneOrganism`). The index is rewritten if it exists.
+    """
+    annotation = h5f.root.annotations
+    if "geneIndex" in annotation:
+        h5f.remove_node(annotation, "geneIndex")
+    IDs = annotation.genes.read(field="gene/ID")
+    table = h5f.create_table(annotation, "geneIndex", geneIndexDesc(annotation.genes.coldtypes["gene/ID"].itemsize),
+                             expectedrows=max(len(IDs), 1))
+    index = numpy.empty(len(IDs), dtype=table.dtype)
+    index["row"] = numpy.argsort(IDs, kind="stable")
+    index["ID"] = IDs[index["row"]]
+    table.append(index)
+    table.flush()
 
-    bar = tqdm(pangenome.organisms, unit="genome", disable=disable_bar)
-    geneRow = geneTable.row
+
+def fillAnnotations(organisms, geneTable, contigTable, dictionaries, disable_bar=False):
+    """
+        Appends the genes and the contigs of the organisms to the annotation tables, after the rows they already have.
+        The codes of the gene types, names and products are taken from the dictionaries, which are completed with the
+        new strings.
+    """
+    types, names, products = dictionaries["geneTypes"], dictionaries["geneNames"], dictionaries["geneProducts"]
+    bar = tqdm(organisms, unit="genome", disable=disable_bar)
+    geneBuffer = TableBuffer(geneTable, ["organism", "contig/name", "contig/is_circular", "gene/ID", "gene/start",
+                                         "gene/stop", "gene/strand", "gene/type", "gene/position", "gene/name",
+                                         "gene/product", "gene/is_fragment", "gene/genetic_code", "gene/local"])
+    contigRow = contigTable.row
+    nbRows = geneTable.nrows
+    nbContigs = contigTable.nrows
+    indexed = "ID" in contigTable.colnames  # the files written before the dense indices do not have them
     for org in bar:
         for contig in org.contigs:
+            contigRow["organism"] = org.name
+            contigRow["contig"] = contig.name
+            contigRow["start_row"] = nbRows
+            contigRow["is_circular"] = contig.is_circular
+            geneStart = geneStop = 0
             for gene in contig.genes:
-                geneRow["organism"] = org.name
-                geneRow["contig/name"] = contig.name
-                geneRow["contig/is_circular"] = contig.is_circular  # this should be somewhere else.
-                geneRow["gene/ID"] = gene.ID
-                geneRow["gene/start"] = gene.start
-                geneRow["gene/stop"] = gene.stop
-                geneRow["gene/strand"] = gene.strand
-                geneRow["gene/type"] = gene.type
-                geneRow["gene/position"] = gene.position
-                geneRow["gene/name"] = gene.name
-                geneRow["gene/product"] = gene.product
-                geneRow["gene/is_fragment"] = gene.is_fragment
-                geneRow["gene/genetic_code"] = gene.genetic_code
-                geneRow["gene/local"] = gene.local_identifier
-                geneRow.append()
+                geneStart, geneStop = gene.index - gene.position, gene.index + 1
+                # contig/is_circular should be somewhere else.
+                geneBuffer.append(org.name, nbContigs, contig.is_circular, gene.ID, gene.start, gene.stop, gene.strand,
+                                  getCode(types, gene.type), gene.position, getCode(names, gene.name),
+                                  getCode(products, gene.product), gene.is_fragment, gene.genetic_code,
+                                  gene.local_identifier)
+                nbRows += 1
             for rna in contig.RNAs:
-                geneRow["organism"] = org.name
-                geneRow["contig/name"] = contig.name
-                geneRow["contig/is_circular"] = contig.is_circular  # this should be somewhere else.
-                geneRow["gene/ID"] = rna.ID
-                geneRow["gene/start"] = rna.start
-                geneRow["gene/stop"] = rna.stop
-                geneRow["gene/strand"] = rna.strand
-                geneRow["gene/type"] = rna.type
-                geneRow["gene/name"] = rna.name
-                geneRow["gene/product"] = rna.product
-                geneRow["gene/is_fragment"] = rna.is_fragment
-                geneRow.append()
-    geneTable.flush()
+                geneBuffer.append(org.name, nbContigs, contig.is_circular, rna.ID, rna.start, rna.stop, rna.strand,
+                                  getCode(types, rna.type), 0, getCode(names, rna.name),
+                                  getCode(products, rna.product), rna.is_fragment, 11, "")
+                nbRows += 1
+            contigRow["stop_row"] = nbRows
+            contigRow["n_genes"] = nbRows - contigRow["start_row"]
+            if indexed:
+                contigRow["ID"] = contig.ID
+                contigRow["organism_ID"] = org.ID
+                contigRow["gene_start"] = geneStart
+                contigRow["gene_stop"] = geneStop
+            contigRow.append()
+            nbContigs += 1
+    geneBuffer.flush()
+    contigTable.flush()
     bar.close()
 
 
-def getGeneSequencesLen(pangenome):
-    maxSeqLen = 1
-    maxGeneIDLen = 1
-    maxGeneType = 1
-    for gene in pangenome.genes:
-        if len(gene.dna) > maxSeqLen:
-            maxSeqLen = len(gene.dna)
-        if len(gene.ID) > maxGeneIDLen:
-            maxGeneIDLen = len(gene.ID)
-        if len(gene.type) > maxGeneType:
-            maxGeneType = len(gene.type)
-    return maxGeneIDLen, maxSeqLen, maxGeneType
-
-
 def geneSequenceDesc(geneIDLen, geneSeqLen, geneTypeLen):
     return {
         "gene": tables.StringCol(itemsize=geneIDLen),
@@ -143,17 +362,17 @@ def geneSequenceDesc(geneIDLen, geneSeqLen, geneTypeLen):
     }
 
 
-def writeGeneSequences(pangenome, h5f, disable_bar=False):
-    geneSeq = h5f.create_table("/", "geneSequences", geneSequenceDesc(*getGeneSequencesLen(pangenome)),
-                               expectedrows=len(pangenome.genes))
-    geneRow = geneSeq.row
+def writeGeneSequences(pangenome, h5f, maxLens=None, disable_bar=False):
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, sequences=True)
+    geneSeq = h5f.create_table("/", "geneSequences", geneSequenceDesc(maxLens["geneID"], maxLens["dna"],
+                                                                      maxLens["type"]),
+                               expectedrows=maxLens["genes"], **tableOptions(pangenome, "geneSequences"))
+    geneBuffer = TableBuffer(geneSeq, ["gene", "dna", "type"])
     bar = tqdm(pangenome.genes, unit="gene", disable=disable_bar)
     for gene in bar:
-        geneRow["gene"] = gene.ID
-        geneRow["dna"] = gene.dna
-        geneRow["type"] = gene.type
-        geneRow.append()
-    geneSeq.flush()
+        geneBuffer.append(gene.ID, gene.dna, gene.type)
+    geneBuffer.flush()
     bar.close()
 
 
@@ -165,29 +384,19 @@ def geneFamDesc(maxNameLen, maxSequenceLength, maxPartLen):
     }
 
 
-def getGeneFamLen(pangenome):
-    maxGeneFamNameLen = 1
-    maxGeneFamSeqLen = 1
-    maxPartLen = 1
-    for genefam in pangenome.geneFamilies:
-        if len(genefam.sequence) > maxGeneFamSeqLen:
-            maxGeneFamSeqLen = len(genefam.sequence)
-        if len(genefam.name) > maxGeneFamNameLen:
-            maxGeneFamNameLen = len(genefam.name)
-        if len(genefam.partition) > maxPartLen:
-            maxPartLen = len(genefam.partition)
-    return maxGeneFamNameLen, maxGeneFamSeqLen, maxPartLen
-
-
-def writeGeneFamInfo(pangenome, h5f, force, disable_bar=False):
+def writeGeneFamInfo(pangenome, h5f, force, maxLens=None, disable_bar=False):
     """
         Writing a table containing the protein sequences of each family
     """
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, families=True)
     if '/geneFamiliesInfo' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computed gene family representative sequences...")
         h5f.remove_node('/', 'geneFamiliesInfo')  # erasing the table, and rewriting a new one.
-    geneFamSeq = h5f.create_table("/", "geneFamiliesInfo", geneFamDesc(*getGeneFamLen(pangenome)),
-                                  expectedrows=len(pangenome.geneFamilies))
+    geneFamSeq = h5f.create_table("/", "geneFamiliesInfo", geneFamDesc(maxLens["famName"], maxLens["famSeq"],
+                                                                       maxLens["partition"]),
+                                  expectedrows=pangenome.number_of_geneFamilies(),
+                                  **tableOptions(pangenome, "geneFamiliesInfo"))
 
     row = geneFamSeq.row
     bar = tqdm(pangenome.geneFamilies, unit="gene family", disable=disable_bar)
@@ -200,114 +409,157 @@ def writeGeneFamInfo(pangenome, h5f, force, disable_bar=False):
     bar.close()
 
 
-def gene2famDesc(geneFamNameLen, geneIDLen):
+def getGeneRows(h5f):
+    """
+        Returns a function giving the row of a gene in the annotation table. It is the integer that identifies the gene
+        in the geneFamilies, edges and RGP tables. For the files with the dense indices, the genes of each contig are in
+        the rows following its first one, in the order of their positions, so only the contig index is read.
+        Otherwise, the identifiers of all of the genes are.
+    """
+    annotations = h5f.root.annotations
+    if "contigs" in annotations and "ID" in annotations.contigs.colnames:
+        contigIDs = annotations.contigs.read(field="ID")
+        contigRows = numpy.zeros(int(contigIDs.astype(numpy.int64).max(initial=-1)) + 1, dtype=numpy.int64)
+        contigRows[contigIDs] = annotations.contigs.read(field="start_row")
+        contigRows = contigRows.tolist()
+        return lambda gene: contigRows[gene.contig.ID] + gene.position
+    geneRows = {}
+    for IDs in read_chunk_arrays(annotations.genes, column="gene/ID"):
+        for geneID in IDs.tolist():
+            geneRows[geneID.decode()] = len(geneRows)
+    return lambda gene: geneRows[gene.ID]
+
+
+def famNameDesc(geneFamNameLen):
     return {
-        "geneFam": tables.StringCol(itemsize=geneFamNameLen),
-        "gene": tables.StringCol(itemsize=geneIDLen)
+        "name": tables.StringCol(itemsize=geneFamNameLen)
     }
 
 
-def getGene2famLen(pangenome):
-    maxGeneFamName = 1
-    maxGeneID = 1
+def writeGeneFamilyNames(pangenome, h5f, maxLens=None):
+    """
+        Writes the names of the gene families, and returns the row of each of them. It is the integer that identifies
+        the gene family in the geneFamilies and modules tables.
+    """
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, families=True)
+    famNames = h5f.create_table("/", "geneFamilyNames", famNameDesc(maxLens["famName"]),
+                                expectedrows=pangenome.number_of_geneFamilies(),
+                                **tableOptions(pangenome, "geneFamilyNames"))
+    famRows = {}
+    nameRow = famNames.row
     for geneFam in pangenome.geneFamilies:
-        if len(geneFam.name) > maxGeneFamName:
-            maxGeneFamName = len(geneFam.name)
-        for gene in geneFam.genes:
-            if len(gene.ID) > maxGeneID:
-                maxGeneID = len(gene.ID)
-    return maxGeneFamName, maxGeneID
+        nameRow["name"] = geneFam.name
+        nameRow.append()
+        famRows[geneFam.name] = len(famRows)
+    famNames.flush()
+    return famRows
+
+
+def getFamilyRows(pangenome, h5f):
+    """
+        Reads the row of each gene family in the geneFamilyNames table, writing the table if the gene families were
+        written before it existed.
+    """
+    if '/geneFamilyNames' not in h5f:
+        return writeGeneFamilyNames(pangenome, h5f)
+    return {name.decode(): index for index, name in enumerate(h5f.root.geneFamilyNames.read(field="name").tolist())}
+
+
+def gene2famDesc():
+    return {
+        "geneFam": tables.UInt32Col(),
+        "gene": tables.UInt32Col()
+    }
 
 
-def writeGeneFamilies(pangenome, h5f, force, disable_bar=False):
+def writeGeneFamilies(pangenome, h5f, force, maxLens=None, disable_bar=False, geneRows=None):
     """
-        Function writing all the pangenome's gene families
+        Function writing all the pangenome's gene families. The names of the gene families are written once, in the
+        geneFamilyNames table, and the associations between genes and gene families are written as integers: the row
+        of the gene in the annotation table and the row of the gene family in the geneFamilyNames table.
+        geneRows gives the row of a gene (see :func:`getGeneRows`), it is read from the file if it is not given.
     """
     if '/geneFamilies' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computed gene family to gene associations...")
         h5f.remove_node('/', 'geneFamilies')  # erasing the table, and rewriting a new one.
-    geneFamilies = h5f.create_table("/", "geneFamilies", gene2famDesc(*getGene2famLen(pangenome)))
-    geneRow = geneFamilies.row
+        if '/geneFamilyNames' in h5f:
+            h5f.remove_node('/', 'geneFamilyNames')
+    if geneRows is None:
+        geneRows = getGeneRows(h5f)
+    famRows = writeGeneFamilyNames(pangenome, h5f, maxLens)
+    geneFamilies = h5f.create_table("/", "geneFamilies", gene2famDesc(), expectedrows=h5f.root.annotations.genes.nrows,
+                                    **tableOptions(pangenome, "geneFamilies"))
+    geneBuffer = TableBuffer(geneFamilies, ["gene", "geneFam"])
     bar = tqdm(pangenome.geneFamilies, unit="gene family", disable=disable_bar)
     for geneFam in bar:
+        famRow = famRows[geneFam.name]
         for gene in geneFam.genes:
-            geneRow["gene"] = gene.ID
-            geneRow["geneFam"] = geneFam.name
-            geneRow.append()
-    geneFamilies.flush()
+            geneBuffer.append(geneRows(gene), famRow)
+    geneBuffer.flush()
     bar.close()
 
 
-def graphDesc(maxGeneIDLen):
+def graphDesc():
     return {
-        'geneTarget': tables.StringCol(itemsize=maxGeneIDLen),
-        'geneSource': tables.StringCol(itemsize=maxGeneIDLen)
+        'geneTarget': tables.UInt32Col(),
+        'geneSource': tables.UInt32Col()
     }
 
 
-def getGeneIDLen(pangenome):
-    maxGeneLen = 1
-    for gene in pangenome.genes:
-        if len(gene.ID) > maxGeneLen:
-            maxGeneLen = len(gene.ID)
-    return maxGeneLen
-
-
-def writeGraph(pangenome, h5f, force, disable_bar=False):
+def writeGraph(pangenome, h5f, force, disable_bar=False, geneRows=None):
+    """
+        Writes the edges of the neighbors graph, as the rows of their genes in the annotation table. geneRows gives the
+        row of a gene (see :func:`getGeneRows`), it is read from the file if it is not given.
+    """
     # if we want to be able to read the graph without reading the annotations
     # (because it's one of the most time consumming parts to read),
     # it might be good to add the organism name in the table here. for now, forcing the read of annotations.
     if '/edges' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computed edges")
         h5f.remove_node("/", "edges")
-    edgeTable = h5f.create_table("/", "edges", graphDesc(getGeneIDLen(pangenome)), expectedrows=len(pangenome.edges))
-    edgeRow = edgeTable.row
+    if geneRows is None:
+        geneRows = getGeneRows(h5f)
+    edgeTable = h5f.create_table("/", "edges", graphDesc(), expectedrows=pangenome.number_of_edges(),
+                                 **tableOptions(pangenome, "edges"))
+    edgeBuffer = TableBuffer(edgeTable, ["geneTarget", "geneSource"])
     bar = tqdm(pangenome.edges, unit="edge", disable=disable_bar)
     for edge in bar:
-        for genePairs in edge.organisms.values():
-            for gene1, gene2 in genePairs:
-                edgeRow["geneTarget"] = gene1.ID
-                edgeRow["geneSource"] = gene2.ID
-                edgeRow.append()
+        for gene1, gene2 in edge.genePairs:
+            edgeBuffer.append(geneRows(gene1), geneRows(gene2))
     bar.close()
-    edgeTable.flush()
+    edgeBuffer.flush()
 
 
-def RGPDesc(maxRGPLen, maxGeneLen):
+def RGPDesc(maxRGPLen):
     return {
         'RGP': tables.StringCol(itemsize=maxRGPLen),
-        'gene': tables.StringCol(itemsize=maxGeneLen)
+        'gene': tables.UInt32Col()
     }
 
 
-def getRGPLen(pangenome):
-    maxGeneLen = 1
-    maxRGPLen = 1
-    for region in pangenome.regions:
-        for gene in region.genes:
-            if len(gene.ID) > maxGeneLen:
-                maxGeneLen = len(gene.ID)
-        if len(region.name) > maxRGPLen:
-            maxRGPLen = len(region.name)
-    return maxRGPLen, maxGeneLen
-
-
-def writeRGP(pangenome, h5f, force, disable_bar=False):
+def writeRGP(pangenome, h5f, force, maxLens=None, disable_bar=False, geneRows=None):
+    """
+        Writes the regions of genomic plasticity, with the rows of their genes in the annotation table. geneRows gives
+        the row of a gene (see :func:`getGeneRows`), it is read from the file if it is not given.
+    """
     if '/RGP' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computer RGP")
         h5f.remove_node('/', 'RGP')
-
-    RGPTable = h5f.create_table('/', 'RGP', RGPDesc(*getRGPLen(pangenome)),
-                                expectedrows=sum([len(region.genes) for region in pangenome.regions]))
-    RGPRow = RGPTable.row
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, rgp=True)
+
+    if geneRows is None:
+        geneRows = getGeneRows(h5f)
+    RGPTable = h5f.create_table('/', 'RGP', RGPDesc(maxLens["RGP"]), expectedrows=maxLens["RGPGenes"],
+                                **tableOptions(pangenome, "RGP"))
+    RGPBuffer = TableBuffer(RGPTable, ["RGP", "gene"])
     bar = tqdm(pangenome.regions, unit="region", disable=disable_bar)
     for region in bar:
         for gene in region.genes:
-            RGPRow["RGP"] = region.name
-            RGPRow["gene"] = gene.ID
-            RGPRow.append()
+            RGPBuffer.append(region.name, geneRows(gene))
     bar.close()
-    RGPTable.flush()
+    RGPBuffer.flush()
 
 
 def spotDesc(maxRGPLen):
@@ -317,22 +569,15 @@ def spotDesc(maxRGPLen):
     }
 
 
-def getSpotDesc(pangenome):
-    maxRGPLen = 1
-    for spot in pangenome.spots:
-        for region in spot.regions:
-            if len(region.name) > maxRGPLen:
-                maxRGPLen = len(region.name)
-    return maxRGPLen
-
-
-def writeSpots(pangenome, h5f, force, disable_bar=False):
+def writeSpots(pangenome, h5f, force, maxLens=None, disable_bar=False):
     if '/spots' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computed spots")
         h5f.remove_node("/", "spots")
+    if maxLens is None:
+        maxLens = getMaxLens(pangenome, spots=True)
 
-    SpoTable = h5f.create_table("/", "spots", spotDesc(getSpotDesc(pangenome)),
-                                expectedrows=sum([len(spot.regions) for spot in pangenome.spots]))
+    SpoTable = h5f.create_table("/", "spots", spotDesc(maxLens["spotRGP"]), expectedrows=maxLens["spotRGPs"],
+                                **tableOptions(pangenome, "spots"))
     SpotRow = SpoTable.row
     bar = tqdm(pangenome.spots, unit="spot", disable=disable_bar)
     for spot in pangenome.spots:
@@ -345,35 +590,28 @@ def writeSpots(pangenome, h5f, force, disable_bar=False):
     SpoTable.flush()
 
 
-def modDesc(geneFamNameLen):
+def modDesc():
     return {
-        "geneFam": tables.StringCol(itemsize=geneFamNameLen),
+        "geneFam": tables.UInt32Col(),
         "module": tables.UInt32Col(),
     }
 
 
-def getModDesc(pangenome):
-    maxFamLen = 1
-    for mod in pangenome.modules:
-        for fam in mod.families:
-            if len(fam.name) > maxFamLen:
-                maxFamLen = len(fam.name)
-    return maxFamLen
-
-
 def writeModules(pangenome, h5f, force, disable_bar=False):
     if '/modules' in h5f and force is True:
         logging.getLogger().info("Erasing the formerly computed modules")
         h5f.remove_node("/", "modules")
 
-    modTable = h5f.create_table('/', 'modules', modDesc(getModDesc(pangenome)),
-                                expectedrows=sum([len(mod.families) for mod in pangenome.modules]))
+    famRows = getFamilyRows(pangenome, h5f)
+    modTable = h5f.create_table('/', 'modules', modDesc(),
+                                expectedrows=sum([len(mod.families) for mod in pangenome.modules]),
+                                **tableOptions(pangenome, "modules"))
     modRow = modTable.row
 
     bar = tqdm(pangenome.modules, unit="modules", disable=disable_bar)
     for mod in bar:
         for fam in mod.families:
-            modRow["geneFam"] = fam.name
+            modRow["geneFam"] = famRows[fam.name]
             modRow["module"] = mod.ID
             modRow.append()
     bar.close()
@@ -403,8 +641,9 @@ def writeStatus(pangenome, h5f):
                                                                                      "inFile"] else False
     statusGroup._v_attrs.spots = True if pangenome.status["spots"] in ["Computed", "Loaded", "inFile"] else False
     statusGroup._v_attrs.modules = True if pangenome.status["modules"] in ["Computed", "Loaded", "inFile"] else False
+    statusGroup._v_attrs.unclusteredGenes = True if pangenome.status["unclusteredGenes"] == "inFile" else False
 
-    statusGroup._v_attrs.version = pkg_resources.get_distribution("ppanggolin").version
+    statusGroup._v_attrs.version = pkg_resources.get_distribution("hdf5_2_json").version
 
 
 def writeInfo(pangenome, h5f):
@@ -439,12 +678,12 @@ def writeInfo(pangenome, h5f):
     else:
         infoGroup = h5f.create_group("/", "info", "Informations about the pangenome's content")
     if pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfGenes = len(pangenome.genes)
-        infoGroup._v_attrs.numberOfOrganisms = len(pangenome.organisms)
+        infoGroup._v_attrs.numberOfGenes = pangenome.number_of_genes()
+        infoGroup._v_attrs.numberOfOrganisms = pangenome.number_of_organisms()
     if pangenome.status["genesClustered"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfClusters = len(pangenome.geneFamilies)
+        infoGroup._v_attrs.numberOfClusters = pangenome.number_of_geneFamilies()
     if pangenome.status["neighborsGraph"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfEdges = len(pangenome.edges)
+        infoGroup._v_attrs.numberOfEdges = pangenome.number_of_edges()
     if pangenome.status["partitionned"] in ["Computed", "Loaded"]:
         namedPartCounter = Counter()
         subpartCounter = Counter()
@@ -452,7 +691,7 @@ def writeInfo(pangenome, h5f):
         partSet = set()
         for fam in pangenome.geneFamilies:
             namedPartCounter[fam.namedPartition] += 1
-            partDistribs[fam.namedPartition].append(len(fam.organisms) / len(pangenome.organisms))
+            partDistribs[fam.namedPartition].append(len(fam.organisms) / pangenome.number_of_organisms())
             if fam.namedPartition == "shell":
                 subpartCounter[fam.partition] += 1
             if fam.partition != "S_":
@@ -472,11 +711,11 @@ def writeInfo(pangenome, h5f):
         infoGroup._v_attrs.numberOfPartitions = len(partSet)
         infoGroup._v_attrs.numberOfSubpartitions = subpartCounter
     if pangenome.status["predictedRGP"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfRGP = len(pangenome.regions)
+        infoGroup._v_attrs.numberOfRGP = pangenome.number_of_regions()
     if pangenome.status["spots"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfSpots = len(pangenome.spots)
+        infoGroup._v_attrs.numberOfSpots = pangenome.number_of_spots()
     if pangenome.status["modules"] in ["Computed", "Loaded"]:
-        infoGroup._v_attrs.numberOfModules = len(pangenome.modules)
+        infoGroup._v_attrs.numberOfModules = pangenome.number_of_modules()
         infoGroup._v_attrs.numberOfFamiliesInModules = sum([len(mod.families) for mod in pangenome.modules])
 
     infoGroup._v_attrs.parameters = pangenome.parameters  # saving the pangenome parameters
@@ -513,8 +752,7 @@ def writeInfoModules(pangenome, h5f):
 
     if pangenome.status["modules"] in ["Computed", "Loaded"]:
         def part_spec(part):
-            pangenome.compute_mod_bitarrays(part)
-            return [popcount(module.bitarray) for module in pangenome.modules]
+            return [int(partitionMask(list(module.families), part).sum()) for module in pangenome.modules]
 
         mod_fam = [len(module.families) for module in pangenome.modules]
         infoGroup._v_attrs.StatOfFamiliesInModules = {"min": getmin(mod_fam),
@@ -560,9 +798,13 @@ def updateGeneFragments(pangenome, h5f, disable_bar=False):
     """
     logging.getLogger().info("Updating annotations with fragment information")
     table = h5f.root.annotations.genes
+    cds = b"CDS"
+    if is_coded(table, "gene/type"):
+        types = readStrings(h5f.root.annotations.geneTypes)
+        cds = types.index("CDS") if "CDS" in types else None
     bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
     for row in table:
-        if row['gene/type'].decode() == 'CDS':
+        if row['gene/type'] == cds:
             row['gene/is_fragment'] = pangenome.getGene(row['gene/ID'].decode()).is_fragment
             row.update()
         bar.update()
@@ -570,6 +812,21 @@ def updateGeneFragments(pangenome, h5f, disable_bar=False):
     table.flush()
 
 
+def erasePartitions(pangenome, h5f):
+    """ marks the partitions of the gene families of a pangenome .h5 file as not computed """
+    logging.getLogger().info("Erasing former partitions...")
+    statusGroup = h5f.root.status
+    infoGroup = h5f.root.info
+    pangenome.status["partitionned"] = "No"
+
+    statusGroup._v_attrs.Partitionned = False
+
+    for attr in ["numberOfPersistent", "persistentStats", "numberOfShell", "shellStats", "numberOfCloud",
+                 "cloudStats", "numberOfPartitions", "numberOfSubpartitions"]:
+        if attr in infoGroup._v_attrs._f_list():  # they are not there if the partitions were never computed
+            h5f.del_node_attr(infoGroup, attr)
+
+
 def ErasePangenome(pangenome, graph=False, geneFamilies=False, partition=False, rgp=False, spots=False, modules=False):
     """ erases tables from a pangenome .h5 file """
 
@@ -586,10 +843,14 @@ def ErasePangenome(pangenome, graph=False, geneFamilies=False, partition=False,
     if '/geneFamilies' in h5f and geneFamilies:
         logging.getLogger().info("Erasing the formerly computed gene family to gene associations...")
         h5f.remove_node('/', 'geneFamilies')  # erasing the table, and rewriting a new one.
+        if '/geneFamilyNames' in h5f:
+            h5f.remove_node('/', 'geneFamilyNames')
         pangenome.status["defragmented"] = "No"
         pangenome.status["genesClustered"] = "No"
+        pangenome.status["unclusteredGenes"] = "No"
         statusGroup._v_attrs.defragmented = False
         statusGroup._v_attrs.genesClustered = False
+        statusGroup._v_attrs.unclusteredGenes = False
 
         h5f.del_node_attr(infoGroup, "numberOfClusters")
 
@@ -599,19 +860,7 @@ def ErasePangenome(pangenome, graph=False, geneFamilies=False, partition=False,
         pangenome.status["geneFamilySequences"] = "No"
         statusGroup._v_attrs.geneFamilySequences = False
         if partition:
-            logging.getLogger().info("Erasing former partitions...")
-            pangenome.status["partitionned"] = "No"
-
-            statusGroup._v_attrs.Partitionned = False
-
-            h5f.del_node_attr(infoGroup, "numberOfPersistent")
-            h5f.del_node_attr(infoGroup, "persistentStats")
-            h5f.del_node_attr(infoGroup, "numberOfShell")
-            h5f.del_node_attr(infoGroup, "shellStats")
-            h5f.del_node_attr(infoGroup, "numberOfCloud")
-            h5f.del_node_attr(infoGroup, "cloudStats")
-            h5f.del_node_attr(infoGroup, "numberOfPartitions")
-            h5f.del_node_attr(infoGroup, "numberOfSubpartitions")
+            erasePartitions(pangenome, h5f)
 
     if '/RGP' in h5f and (geneFamilies or partition or rgp):
         logging.getLogger().info("Erasing the formerly computer RGP...")
@@ -642,18 +891,227 @@ def ErasePangenome(pangenome, graph=False, geneFamilies=False, partition=False,
     h5f.close()
 
 
+def checkWidths(table, lengths):
+    """
+        Checks that the strings appended to a table fit in its columns, whose width was set when it was created.
+    """
+    for column, length in lengths.items():
+        width = table.coldtypes[column].itemsize
+        if length > width:
+            raise Exception(f"The '{column}' values to append to the '{table._v_pathname}' table are up to {length} "
+                            f"characters long, while the table was written for at most {width} characters. "
+                            f"Write a new pangenome file instead.")
+
+
+def shiftIndices(h5f, organisms):
+    """
+        Shifts the dense indices of the organisms, of their contigs and of their genes after those of the pangenome
+        file, which they are appended to.
+    """
+    contigs = h5f.root.annotations.contigs
+    if "ID" not in contigs.colnames:
+        return
+    orgOffset = int(contigs.read(field="organism_ID").astype(numpy.int64).max(initial=-1)) + 1
+    contigOffset = int(contigs.read(field="ID").astype(numpy.int64).max(initial=-1)) + 1
+    geneOffset = int(contigs.read(field="gene_stop").max(initial=0))
+    for org in organisms:
+        org.ID += orgOffset
+        for contig in org.contigs:
+            contig.ID += contigOffset
+            for gene in contig.genes:
+                gene.index += geneOffset
+
+
+def appendAnnotations(h5f, organisms, disable_bar=False):
+    """
+        Appends the annotations of the organisms to the annotation tables of a pangenome file.
+    """
+    annotation = h5f.root.annotations
+    shiftIndices(h5f, organisms)
+    dictionaries = {name: {string: code for code, string in enumerate(readStrings(annotation._f_get_child(name)))}
+                    for name in ["geneTypes", "geneNames", "geneProducts"]}
+    fillAnnotations(organisms, annotation.genes, annotation.contigs, dictionaries, disable_bar=disable_bar)
+    for name, dictionary in dictionaries.items():
+        # the dictionaries are small, they are rewritten as the new strings may be longer than the former ones
+        h5f.remove_node(annotation, name)
+        writeDictionary(h5f, annotation, name, dictionary)
+    writeGeneIndex(h5f)
+
+
+def appendGeneSequences(h5f, organisms, disable_bar=False):
+    """
+        Appends the sequences of the genes of the organisms to the gene sequence table of a pangenome file.
+    """
+    geneBuffer = TableBuffer(h5f.root.geneSequences, ["gene", "dna", "type"])
+    bar = tqdm(organisms, unit="genome", disable=disable_bar)
+    for org in bar:
+        for gene in org.genes:
+            geneBuffer.append(gene.ID, gene.dna, gene.type)
+    geneBuffer.flush()
+    bar.close()
+
+
+def appendGeneFamilies(pangenome, h5f, disable_bar=False):
+    """
+        Appends the gene family of the genes that do not have one in a pangenome file yet, and the gene families that
+        are not in it yet.
+    """
+    geneRows = getGeneRows(h5f)
+    famRows = getFamilyRows(pangenome, h5f)
+    written = set(h5f.root.geneFamilies.read(field="gene").tolist())
+    newFams = [fam for fam in pangenome.geneFamilies if fam.name not in famRows]
+    if len(newFams) > 0:
+        nameBuffer = TableBuffer(h5f.root.geneFamilyNames, ["name"])
+        infoBuffer = TableBuffer(h5f.root.geneFamiliesInfo, ["name", "protein", "partition"])
+        for fam in newFams:
+            famRows[fam.name] = len(famRows)
+            nameBuffer.append(fam.name)
+            infoBuffer.append(fam.name, fam.sequence, fam.partition)
+        nameBuffer.flush()
+        infoBuffer.flush()
+    geneBuffer = TableBuffer(h5f.root.geneFamilies, ["gene", "geneFam"])
+    bar = tqdm(pangenome.geneFamilies, unit="gene family", disable=disable_bar)
+    for geneFam in bar:
+        famRow = famRows[geneFam.name]
+        for gene in geneFam.genes:
+            geneRow = geneRows(gene)
+            if geneRow not in written:
+                geneBuffer.append(geneRow, famRow)
+    geneBuffer.flush()
+    bar.close()
+
+
+def appendPangenome(pangenome, disable_bar=False):
+    """
+        Appends the organisms of the pangenome to its file, instead of rewriting the whole file as
+        :func:`writePangenome` does. The organisms are expected to be new ones, their annotations, gene sequences
+        and, if they were computed, gene families are appended to the existing tables.
+        What was computed from all of the organisms (the graph, the partitions, the RGP, the spots and the modules) is
+        erased. The gene families of the file are kept: if those of the new genes were not computed, the new genes are
+        marked as unclustered, until 'cluster --append' gives them a gene family (see :func:`appendClusters`).
+    """
+    organisms = pangenome.organisms
+    sequences = pangenome.status["geneSequences"] == "Computed"
+    clustered = pangenome.status["genesClustered"] == "Computed"
+    maxLens = getMaxLens(pangenome, annotations=True, sequences=sequences, families=clustered)
+
+    # everything is checked before the file is modified
+    h5f = tables.open_file(pangenome.file, "r")
+    try:
+        if not h5f.root.status._v_attrs.genomesAnnotated or not is_coded(h5f.root.annotations.genes, "gene/type"):
+            raise Exception(f"Genomes can only be appended to a pangenome file with dictionary encoded annotations, "
+                            f"which '{pangenome.file}' does not have. Write a new pangenome file instead.")
+        annotation = h5f.root.annotations
+        checkWidths(annotation.genes, {"organism": maxLens["org"], "gene/ID": maxLens["geneID"],
+                                       "gene/local": maxLens["local"]})
+        checkWidths(annotation.contigs, {"organism": maxLens["org"], "contig": maxLens["contig"]})
+        if sequences and "/geneSequences" in h5f:
+            checkWidths(h5f.root.geneSequences, {"gene": maxLens["geneID"], "dna": maxLens["dna"],
+                                                 "type": maxLens["type"]})
+        if clustered:
+            if not h5f.root.status._v_attrs.genesClustered or not is_coded(h5f.root.geneFamilies, "gene"):
+                raise Exception(f"Gene families can only be appended to a pangenome file with gene families stored "
+                                f"as integers, which '{pangenome.file}' does not have. "
+                                f"Write a new pangenome file instead.")
+            checkWidths(h5f.root.geneFamiliesInfo, {"name": maxLens["famName"], "protein": maxLens["famSeq"],
+                                                    "partition": maxLens["partition"]})
+            if '/geneFamilyNames' in h5f:
+                checkWidths(h5f.root.geneFamilyNames, {"name": maxLens["famName"]})
+        fileOrganisms = {org.decode() for org in numpy.unique(annotation.contigs.read(field="organism"))}
+        for org in organisms:
+            if org.name in fileOrganisms:
+                raise KeyError(f"Redondant organism name was found ({org.name}). "
+                               f"It is already in the pangenome file '{pangenome.file}'.")
+        # the genes are identified by their ID in the file, whether it is a local or a generated identifier
+        fileIDs = set(readGeneIDs(h5f))
+        for org in organisms:
+            for contig in org.contigs:
+                for gene in list(contig.genes) + list(contig.RNAs):
+                    if gene.ID in fileIDs:
+                        raise KeyError(f"Redondant gene identifier was found ({gene.ID}). "
+                                       f"It is already in the pangenome file '{pangenome.file}'.")
+    finally:
+        h5f.close()
+
+    logging.getLogger().info("Erasing what was computed from the former genomes...")
+    ErasePangenome(pangenome, graph=True, partition=True, rgp=True, spots=True, modules=True)
+
+    h5f = tables.open_file(pangenome.file, "a")
+    logging.getLogger().info(f"Appending the annotations of {len(organisms)} genomes...")
+    appendAnnotations(h5f, organisms, disable_bar=disable_bar)
+    if "/geneSequences" in h5f:
+        if sequences:
+            logging.getLogger().info("Appending the protein coding gene dna sequences...")
+            appendGeneSequences(h5f, organisms, disable_bar=disable_bar)
+        else:  # the sequences of the file would be incomplete
+            logging.getLogger().warning("The new genomes have no gene sequences, those of the file are erased.")
+            h5f.remove_node("/", "geneSequences")
+    pangenome.status["geneSequences"] = "inFile" if "/geneSequences" in h5f else "No"
+    if h5f.root.status._v_attrs.Partitionned:
+        erasePartitions(pangenome, h5f)
+    if clustered:
+        logging.getLogger().info("Appending gene families and gene associations...")
+        appendGeneFamilies(pangenome, h5f, disable_bar=disable_bar)
+        h5f.root.info._v_attrs.numberOfClusters = h5f.root.geneFamiliesInfo.nrows
+        pangenome.status["genesClustered"] = "inFile"
+    elif h5f.root.status._v_attrs.genesClustered:
+        logging.getLogger().warning("The new genes have no gene families, see the 'cluster' subcommand with --append.")
+        pangenome.status["genesClustered"] = "inFile"
+        pangenome.status["unclusteredGenes"] = "inFile"
+    # the pangenome objects only hold the new organisms, so the numbers are updated rather than computed from them
+    h5f.root.info._v_attrs.numberOfGenes += sum([len(contig.genes) for org in organisms for contig in org.contigs])
+    h5f.root.info._v_attrs.numberOfOrganisms = len(fileOrganisms) + len(organisms)
+    pangenome.status["genomesAnnotated"] = "inFile"
+    writeStatus(pangenome, h5f)
+    h5f.close()
+    logging.getLogger().info(f"Done appending to the pangenome. It is in file : {pangenome.file}")
+
+
+def appendClusters(pangenome, disable_bar=False):
+    """
+        Appends the gene families of the genes that were appended to a pangenome file without one (see
+        :func:`appendPangenome`), as computed by 'cluster --append', to the gene family tables of the file.
+    """
+    maxLens = getMaxLens(pangenome, families=True)
+    h5f = tables.open_file(pangenome.file, "a")
+    try:
+        checkWidths(h5f.root.geneFamiliesInfo, {"name": maxLens["famName"], "protein": maxLens["famSeq"],
+                                                "partition": maxLens["partition"]})
+        if '/geneFamilyNames' in h5f:
+            checkWidths(h5f.root.geneFamilyNames, {"name": maxLens["famName"]})
+    except Exception:
+        h5f.close()
+        raise
+    logging.getLogger().info("Appending gene families and gene associations...")
+    appendGeneFamilies(pangenome, h5f, disable_bar=disable_bar)
+    h5f.root.info._v_attrs.numberOfClusters = h5f.root.geneFamiliesInfo.nrows
+    if any(fam.sequence == "" for fam in pangenome.geneFamilies):
+        pangenome.status["geneFamilySequences"] = "No"
+    pangenome.status["genesClustered"] = "inFile"
+    pangenome.status["unclusteredGenes"] = "No"
+    writeStatus(pangenome, h5f)
+    h5f.close()
+    logging.getLogger().info(f"Done appending the gene families. They are in file : {pangenome.file}")
+
+
 def writePangenome(pangenome, filename, force, disable_bar=False):
     """
         Writes or updates a pangenome file
         pangenome is the corresponding pangenome object, filename the h5 file and status what has been modified.
     """
+    # the tables that are written are sized at once, instead of walking the pangenome objects for each table
+    maxLens = getMaxLens(pangenome, annotations=pangenome.status["genomesAnnotated"] == "Computed",
+                         sequences=pangenome.status["geneSequences"] == "Computed",
+                         families=pangenome.status["genesClustered"] == "Computed",
+                         rgp=pangenome.status["predictedRGP"] == "Computed",
+                         spots=pangenome.status["spots"] == "Computed")
 
     if pangenome.status["genomesAnnotated"] == "Computed":
-        compressionFilter = tables.Filters(complevel=1, shuffle=True, bitshuffle=True, complib='blosc:zstd')
-        h5f = tables.open_file(filename, "w", filters=compressionFilter)
+        # the file filters apply to the tables that have no compression settings of their own
+        h5f = tables.open_file(filename, "w", filters=tableOptions(pangenome, "default")["filters"])
         logging.getLogger().info("Writing genome annotations...")
 
-        writeAnnotations(pangenome, h5f, disable_bar=disable_bar)
+        writeAnnotations(pangenome, h5f, maxLens, disable_bar=disable_bar)
 
         pangenome.status["genomesAnnotated"] = "Loaded"
         h5f.close()
@@ -667,17 +1125,20 @@ def writePangenome(pangenome, filename, force, disable_bar=False):
 
     # from there, appending to existing file.
     h5f = tables.open_file(filename, "a")
+    geneRows = None  # the rows of the genes are read once for all of the tables that identify the genes by them
+    if any(pangenome.status[part] == "Computed" for part in ["genesClustered", "neighborsGraph", "predictedRGP"]):
+        geneRows = getGeneRows(h5f)
 
     if pangenome.status["geneSequences"] == "Computed":
         logging.getLogger().info("writing the protein coding gene dna sequences")
-        writeGeneSequences(pangenome, h5f, disable_bar=disable_bar)
+        writeGeneSequences(pangenome, h5f, maxLens, disable_bar=disable_bar)
         pangenome.status["geneSequences"] = "Loaded"
 
     if pangenome.status["genesClustered"] == "Computed":
         logging.getLogger().info("Writing gene families and gene associations...")
-        writeGeneFamilies(pangenome, h5f, force, disable_bar=disable_bar)
+        writeGeneFamilies(pangenome, h5f, force, maxLens, disable_bar=disable_bar, geneRows=geneRows)
         logging.getLogger().info("Writing gene families information...")
-        writeGeneFamInfo(pangenome, h5f, force, disable_bar=disable_bar)
+        writeGeneFamInfo(pangenome, h5f, force, maxLens, disable_bar=disable_bar)
         if pangenome.status["genomesAnnotated"] in ["Loaded", "inFile"] and \
                 pangenome.status["defragmented"] == "Computed":
             # if the annotations have not been computed in this run,
@@ -686,7 +1147,7 @@ def writePangenome(pangenome, filename, force, disable_bar=False):
         pangenome.status["genesClustered"] = "Loaded"
     if pangenome.status["neighborsGraph"] == "Computed":
         logging.getLogger().info("Writing the edges...")
-        writeGraph(pangenome, h5f, force, disable_bar=disable_bar)
+        writeGraph(pangenome, h5f, force, disable_bar=disable_bar, geneRows=geneRows)
         pangenome.status["neighborsGraph"] = "Loaded"
 
     if pangenome.status["partitionned"] == "Computed" and \
@@ -697,12 +1158,12 @@ def writePangenome(pangenome, filename, force, disable_bar=False):
 
     if pangenome.status['predictedRGP'] == "Computed":
         logging.getLogger().info("Writing Regions of Genomic Plasticity...")
-        writeRGP(pangenome, h5f, force, disable_bar=disable_bar)
+        writeRGP(pangenome, h5f, force, maxLens, disable_bar=disable_bar, geneRows=geneRows)
         pangenome.status['predictedRGP'] = "Loaded"
 
     if pangenome.status["spots"] == "Computed":
         logging.getLogger().info("Writing Spots of Insertion...")
-        writeSpots(pangenome, h5f, force, disable_bar=disable_bar)
+        writeSpots(pangenome, h5f, force, maxLens, disable_bar=disable_bar)
         pangenome.status['spots'] = "Loaded"
 
     if pangenome.status["modules"] == "Computed":
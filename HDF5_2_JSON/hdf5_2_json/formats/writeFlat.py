@@ -10,12 +10,16 @@ import pkg_resources
 from statistics import median, mean, stdev
 import os
 import json
-import pdb
+import shutil
+import tempfile
+
+# installed libraries
+from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import write_compressed_or_not, mkOutdir, restricted_float
-from ppanggolin.formats import checkPangenomeInfo
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import write_compressed_or_not, mkOutdir, restricted_float
+from hdf5_2_json.formats import checkPangenomeInfo
 
 # global variable to store the pangenome
 pan = None  # TODO change to pan:Pangenome = Pangenome=() ?
@@ -36,12 +40,11 @@ def writeJSON_old(output, compress):
         json.write('{"graph":')
         json.write('{"edges":[')
         edgeids = 0
-        index = pan.getIndex()
 
         for edge in pan.edges:
             json.write('{"from":' + str(edge.source.ID) + ',' +
                        '"to":' + str(edge.target.ID) + ',' +
-                       '"attr":{"weight":' + str(len(edge.organisms)) + '}},')
+                       '"attr":{"weight":' + str(edge.number_of_organisms()) + '}},')
         json.write(',"nodes": [')
         node_types = {}
         famList = list(pan.geneFamilies)
@@ -68,49 +71,285 @@ def writeJSON_old(output, compress):
     logging.getLogger().info(f"Done writing the json file : '{outname}'")
 
 
-def writeJSON(output, compress, pan_name: str):
-    logging.getLogger().info("Writing the json file for the pangenome graph...")
-    outname = output + "/pangenomeGraph.json"
-    out_dict = {"graph": {"edges": [], "nodes": [], "node_types": {}}}
-    out_dict["graph"]["nodes"].append({"id": pan_name, "attr": {}})
-    out_dict["graph"]["node_types"][pan_name] = ["Taxa"]
+def _neighbor_edge(edge):
+    return {"from": "F_" + edge.source.name, "to": "F_" + edge.target.name,
+            "type": ["NEIGHBOR_OF", f"{edge.source.namedPartition}_{edge.target.namedPartition}"],
+            "attr": {"weight": edge.number_of_organisms()}}
+
+
+def _gene_edges(gene):
+    return [{"from": gene.ID, "to": "F_" + gene.family.name, "type": ["IN_FAMILY"], "attr": {}},
+            {"from": gene.ID, "to": str(gene.organism.name), "type": ["IN_ORG"], "attr": {}}]
+
+
+def _module_edges(mod, pan_name: str):
+    for family in mod.families:
+        yield {"from": "F_" + family.name, "to": pan_name + '_' + str(mod.ID), "type": ["IN_MODULE"], "attr": {}}
+        yield {"from": pan_name + '_' + str(mod.ID), "to": pan_name, "type": ["IN_TAXA"], "attr": {}}
+
+
+def _family_node(geneFam):
+    return {"id": "F_" + geneFam.name, "attr": {"nb_genomes": len(geneFam.organisms),
+                                                "partition": geneFam.namedPartition,
+                                                "subpartition": geneFam.partition,
+                                                "nb_genes": len(geneFam.genes)}}, \
+        ["GeneFamily", geneFam.namedPartition]
+
+
+def _gene_node(gene):
+    return {"id": gene.ID, "attr": {"genomic_type": "CDS", "is_fragment": int(gene.is_fragment)}}, ["gene"]
+
+
+def _header_nodes(pan_name: str):
+    yield {"id": pan_name, "attr": {}}, ["Taxa"]
     for org in pan.organisms:
-        out_dict["graph"]["nodes"].append({"id": str(org.name), "attr": {}})
-        out_dict["graph"]["node_types"][str(org.name)] = ["genome"]
+        yield {"id": str(org.name), "attr": {}}, ["genome"]
+
+
+def _module_node(mod, pan_name: str):
+    return {"id": pan_name + '_' + str(mod.ID), "attr": {"nb_fams": str(len(mod.families))}}, ["Module"]
+
+
+def _json_edges(pan_name: str):
+    """
+        Yields the edges of the json graph one by one, in the order in which they are written in the file.
+    """
     for edge in pan.edges:
-        part_source, part_target = (pan.getGeneFamily(edge.source.name).namedPartition,
-                                    pan.getGeneFamily(edge.target.name).namedPartition)
-        out_dict["graph"]["edges"].append(
-            {"from": "F_" + edge.source.name, "to": "F_" + edge.target.name,
-             "type": ["NEIGHBOR_OF", f"{part_source}_{part_target}"],
-             "attr": {"weight": len(edge.organisms)}})
-    for geneFam in list(pan.geneFamilies):
-        out_dict["graph"]["nodes"].append({"id": "F_" + geneFam.name, "attr": {"nb_genomes": len(edge.organisms),
-                                                                             "partition": geneFam.namedPartition,
-                                                                             "subpartition": geneFam.partition,
-                                                                             "nb_genes": len(geneFam.genes)}})
-        out_dict["graph"]["node_types"]["F_" + geneFam.name] = ["GeneFamily", geneFam.namedPartition]
-        out_dict["graph"]["edges"].append(
-            {"from": "F_" + geneFam.name, "to": pan_name,
-             "type": ["IN_TAXA"],
-             "attr": {}})
+        yield _neighbor_edge(edge)
+    for geneFam in pan.geneFamilies:
+        yield {"from": "F_" + geneFam.name, "to": pan_name, "type": ["IN_TAXA"], "attr": {}}
         for gene in geneFam.genes:
-            out_dict["graph"]["nodes"].append(
-                {"id": gene.ID, "attr": {"genomic_type": "CDS", "is_fragment": int(gene.is_fragment)}})
-            out_dict["graph"]["edges"].append({"from": gene.ID, "to": geneFam.ID, "type": "IN_FAMILY", "attr": {}})
-            out_dict["graph"]["node_types"][str(gene.ID)] = ["gene"]
-            out_dict["graph"]["edges"].append(
-                {"from": gene.ID, "to": str(gene.organism.name), "type": "IN_ORG", "attr": {}})
+            yield from _gene_edges(gene)
     for mod in pan.modules:
-        out_dict["graph"]["nodes"].append({"id": pan_name+'_'+str(mod.ID), "attr": {"nb_fams": str(len(mod.families))}})
-        out_dict["graph"]["node_types"][pan_name+'_'+str(mod.ID)] = ["Module"]
-        for family in mod.families:
-            out_dict["graph"]["edges"].append(
-                {"from": "F_" + family.name, "to": pan_name+'_'+str(mod.ID), "type": ["IN_MODULE"], "attr": {}})
-            out_dict["graph"]["edges"].append(
-                {"from": pan_name+'_'+str(mod.ID), "to": pan_name, "type": ["IN_TAXA"], "attr": {}})
-    with write_compressed_or_not(outname, compress) as json_file:
-        json.dump(out_dict, json_file)
+        yield from _module_edges(mod, pan_name)
+
+
+def _json_nodes(pan_name: str):
+    """
+        Yields the nodes of the json graph one by one, along with their types,
+        in the order in which they are written in the file.
+    """
+    yield from _header_nodes(pan_name)
+    for geneFam in pan.geneFamilies:
+        yield _family_node(geneFam)
+        for gene in geneFam.genes:
+            yield _gene_node(gene)
+    for mod in pan.modules:
+        yield _module_node(mod, pan_name)
+
+
+def _json_shard_edges(pan_name: str, shard):
+    """
+        Yields the edges of a single shard of the json graph. A shard is a tuple (kind, start, stop) where kind is
+        'header', 'edges', 'families' or 'organisms' and start and stop delimit the slice of elements it covers.
+    """
+    kind, start, stop = shard
+    if kind == "header":
+        for mod in pan.modules:
+            yield from _module_edges(mod, pan_name)
+    elif kind == "edges":
+        for edge in pan.edges[start:stop]:
+            yield _neighbor_edge(edge)
+    elif kind == "families":
+        for geneFam in pan.geneFamilies[start:stop]:
+            yield {"from": "F_" + geneFam.name, "to": pan_name, "type": ["IN_TAXA"], "attr": {}}
+    elif kind == "organisms":
+        for org in pan.organisms[start:stop]:
+            for gene in org.genes:
+                yield from _gene_edges(gene)
+
+
+def _json_shard_nodes(pan_name: str, shard):
+    """
+        Yields the nodes of a single shard of the json graph, along with their types.
+        See :func:`_json_shard_edges` for the description of a shard.
+    """
+    kind, start, stop = shard
+    if kind == "header":
+        yield from _header_nodes(pan_name)
+        for mod in pan.modules:
+            yield _module_node(mod, pan_name)
+    elif kind == "families":
+        for geneFam in pan.geneFamilies[start:stop]:
+            yield _family_node(geneFam)
+    elif kind == "organisms":
+        for org in pan.organisms[start:stop]:
+            for gene in org.genes:
+                yield _gene_node(gene)
+
+
+def _mk_shards(cpu):
+    """
+        Splits the json graph into shards: one for the taxa, organisms and modules,
+        and blocks of neighbor edges, of gene families and of organisms (with their genes) for the rest.
+    """
+    shards = [("header", 0, 0)]
+    for kind, nb_elements in [("edges", pan.number_of_edges()), ("families", pan.number_of_geneFamilies()),
+                              ("organisms", pan.number_of_organisms())]:
+        # a few blocks per cpu so that the workers stay busy even if some blocks are heavier than others
+        block_size = max(1, -(-nb_elements // (cpu * 4)))
+        for start in range(0, nb_elements, block_size):
+            shards.append((kind, start, min(start + block_size, nb_elements)))
+    return shards
+
+
+def _write_json_sequence(json_file, items):
+    """
+        Writes the given json-formatted strings separated as :func:`json.dump` would, without holding them in memory.
+        Returns the number of written items.
+    """
+    nb_items = 0
+    for item in items:
+        if nb_items != 0:
+            json_file.write(", ")
+        json_file.write(item)
+        nb_items += 1
+    return nb_items
+
+
+def _write_json_fragments(prefix, pan_name: str, shard):
+    """
+        Writes the edges, the nodes and the node types of a shard of the json graph in three files, each one holding
+        a piece of the corresponding section of the json document.
+        Returns the three file names along with the number of items each file holds.
+    """
+    fragments = []
+    for section, items in [("edges", (json.dumps(edge) for edge in _json_shard_edges(pan_name, shard))),
+                           ("nodes", (json.dumps(node) for node, _ in _json_shard_nodes(pan_name, shard))),
+                           ("node_types", (json.dumps(str(node["id"])) + ": " + json.dumps(node_types)
+                                           for node, node_types in _json_shard_nodes(pan_name, shard)))]:
+        with open(prefix + section, "w") as fragment_file:
+            fragments.append((prefix + section, _write_json_sequence(fragment_file, items)))
+    return fragments
+
+
+def launchWriteJSONFragments(args):
+    return _write_json_fragments(*args)
+
+
+def _write_parts(launcher, args, cpu, disable_bar=False):
+    """
+        Writes the shards of the json graph with a pool of `cpu` processes, and returns the results of the `launcher`
+        in the order of the shards.
+    """
+    results = []
+    bar = tqdm(total=len(args), unit="shard", disable=disable_bar)
+    with get_context('fork').Pool(processes=cpu) as p:
+        for result in p.imap(launcher, args):
+            results.append(result)
+            bar.update()
+    bar.close()
+    return results
+
+
+def writeJSON(output, compress, pan_name: str, cpu=1, disable_bar=False):
+    logging.getLogger().info("Writing the json file for the pangenome graph...")
+    outname = output + "/pangenomeGraph.json"
+    if cpu > 1:
+        with tempfile.TemporaryDirectory(dir=output) as tmpdir:
+            shards = _mk_shards(cpu)
+            parts = _write_parts(launchWriteJSONFragments,
+                                 [(f"{tmpdir}/part{index:05d}.", pan_name, shard) for index, shard in enumerate(shards)],
+                                 cpu, disable_bar=disable_bar)
+            with write_compressed_or_not(outname, compress) as json_file:
+                # the shards do not follow the order of the single process output, but the content is the same.
+                for section_index, opening in enumerate(['{"graph": {"edges": [', '], "nodes": [', '], "node_types": {']):
+                    json_file.write(opening)
+                    first = True
+                    for fragments in parts:
+                        fragment_name, nb_items = fragments[section_index]
+                        if nb_items > 0:
+                            if not first:
+                                json_file.write(", ")
+                            with open(fragment_name, "r") as fragment_file:
+                                shutil.copyfileobj(fragment_file, json_file)
+                            first = False
+                json_file.write('}}}')
+    else:
+        with write_compressed_or_not(outname, compress) as json_file:
+            # the file is streamed section by section, so that the graph is never held in memory as a whole.
+            json_file.write('{"graph": {"edges": [')
+            _write_json_sequence(json_file, (json.dumps(edge) for edge in _json_edges(pan_name)))
+            json_file.write('], "nodes": [')
+            _write_json_sequence(json_file, (json.dumps(node) for node, _ in _json_nodes(pan_name)))
+            json_file.write('], "node_types": {')
+            _write_json_sequence(json_file, (json.dumps(str(node["id"])) + ": " + json.dumps(node_types)
+                                             for node, node_types in _json_nodes(pan_name)))
+            json_file.write('}}}')
+    logging.getLogger().info(f"Done writing the json file : '{outname}'")
+
+
+def _write_ndjson(prefix, nodes, edges, compress, split=False):
+    """
+        Writes the given nodes and edges as newline-delimited json, one node, node type or edge record per line.
+        If `split` is True, each kind of record is written in its own file, otherwise all of them are written in a
+        single file and each record is tagged with its kind in the 'record' field.
+        Returns the written file names, the number of nodes and the number of edges.
+    """
+    nb_nodes, nb_edges = 0, 0
+    if split:
+        outnames = [prefix + "nodes.ndjson", prefix + "node_types.ndjson", prefix + "edges.ndjson"]
+        with write_compressed_or_not(outnames[0], compress) as nodes_file, \
+                write_compressed_or_not(outnames[1], compress) as types_file:
+            for node, node_types in nodes:
+                nodes_file.write(json.dumps(node) + "\n")
+                types_file.write(json.dumps({"id": str(node["id"]), "types": node_types}) + "\n")
+                nb_nodes += 1
+        with write_compressed_or_not(outnames[2], compress) as edges_file:
+            for edge in edges:
+                edges_file.write(json.dumps(edge) + "\n")
+                nb_edges += 1
+    else:
+        outnames = [prefix + "pangenomeGraph.ndjson"]
+        with write_compressed_or_not(outnames[0], compress) as ndjson_file:
+            # nodes come first so that a consumer reading the file line by line can create them before the edges.
+            for node, node_types in nodes:
+                ndjson_file.write(json.dumps({"record": "node", **node}) + "\n")
+                ndjson_file.write(json.dumps({"record": "node_type", "id": str(node["id"]), "types": node_types}) +
+                                  "\n")
+                nb_nodes += 1
+            for edge in edges:
+                ndjson_file.write(json.dumps({"record": "edge", **edge}) + "\n")
+                nb_edges += 1
+    if compress:
+        outnames = [outname + ".gz" for outname in outnames]
+    return outnames, nb_nodes, nb_edges
+
+
+def _write_ndjson_part(prefix, pan_name: str, shard, compress, split=False):
+    return _write_ndjson(prefix, _json_shard_nodes(pan_name, shard), _json_shard_edges(pan_name, shard), compress,
+                         split)
+
+
+def launchWriteNDJSONPart(args):
+    return _write_ndjson_part(*args)
+
+
+def writeNDJSON(output, compress, pan_name: str, split=False, cpu=1, disable_bar=False):
+    """
+        Writes the pangenome graph as newline-delimited json files.
+        If more than one cpu is used, the graph is written in shards by a pool of processes, each shard in its own
+        part file(s), and a manifest listing the part files is written in 'pangenomeGraph.manifest.json'.
+    """
+    logging.getLogger().info("Writing the newline-delimited json file(s) for the pangenome graph...")
+    if cpu > 1:
+        partdir = output + "/pangenomeGraph_parts"
+        os.makedirs(partdir, exist_ok=True)
+        shards = _mk_shards(cpu)
+        parts = _write_parts(launchWriteNDJSONPart,
+                             [(f"{partdir}/part{index:05d}.", pan_name, shard, compress, split)
+                              for index, shard in enumerate(shards)], cpu, disable_bar=disable_bar)
+        manifest = {"taxa": pan_name, "split": split, "compressed": compress, "parts": []}
+        for shard, (outnames, nb_nodes, nb_edges) in zip(shards, parts):
+            manifest["parts"].append({"files": [os.path.relpath(outname, output) for outname in outnames],
+                                      "shard": list(shard), "nodes": nb_nodes, "edges": nb_edges})
+        outnames = [output + "/pangenomeGraph.manifest.json"]
+        with open(outnames[0], "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+    else:
+        outnames, _, _ = _write_ndjson(output + "/", _json_nodes(pan_name), _json_edges(pan_name), compress, split)
+    logging.getLogger().info(f"Done writing the newline-delimited json file(s) : '{', '.join(outnames)}'")
+
 
 def writeJSONGeneFam(geneFam, json):
     json.write('{' + f'"id": {geneFam.ID}, "attr":' + '{' +
@@ -119,9 +358,9 @@ def writeJSONGeneFam(geneFam, json):
                f'"partition": "{geneFam.namedPartition}", "subpartition": "{geneFam.partition}"' + '}')
 
 
-def writeFlatFiles(pangenome, output, cpu=1, json=False, compress=False, taxa: str = "",
-                   disable_bar=False):
-    if not any(x for x in [json]):
+def writeFlatFiles(pangenome, output, cpu=1, json=False, ndjson=False, split_ndjson=False, compress=False,
+                   taxa: str = "", disable_bar=False):
+    if not any(x for x in [json, ndjson]):
         raise Exception("You did not indicate what file you wanted to write.")
 
     global pan
@@ -136,7 +375,7 @@ def writeFlatFiles(pangenome, output, cpu=1, json=False, compress=False, taxa: s
     global needModules
     global ignore_err
 
-    if json:
+    if json or ndjson:
         needAnnotations = True
         needFamilies = True
         needPartitions = True
@@ -145,18 +384,20 @@ def writeFlatFiles(pangenome, output, cpu=1, json=False, compress=False, taxa: s
 
     checkPangenomeInfo(pan, needAnnotations=needAnnotations, needFamilies=needFamilies, needGraph=needGraph,
                        needPartitions=needPartitions, needRGP=needRegions, needSpots=needSpots, needModules=needModules,
-                       disable_bar=disable_bar)
+                       cpu=cpu, disable_bar=disable_bar)
 
-    pan.getIndex()  # make the index because it will be used most likely
     if json:
-        writeJSON(output, compress, taxa)
+        writeJSON(output, compress, taxa, cpu=cpu, disable_bar=disable_bar)
+    if ndjson:
+        writeNDJSON(output, compress, taxa, split=split_ndjson, cpu=cpu, disable_bar=disable_bar)
 
 
 def launchFlat(args):
     mkOutdir(args.output, args.force)
     pangenome = Pangenome()
     pangenome.addFile(args.pangenome)
-    writeFlatFiles(pangenome, args.output, cpu=args.cpu, json=args.json, compress=args.compress, taxa=args.taxa,
+    writeFlatFiles(pangenome, args.output, cpu=args.cpu, json=args.json, ndjson=args.ndjson,
+                   split_ndjson=args.split_ndjson, compress=args.compress, taxa=args.taxa,
                    disable_bar=args.disable_prog_bar)
 
 
@@ -169,6 +410,10 @@ def writeFlatSubparser(subparser):
                           help="Output directory where the file(s) will be written")
     optional = parser.add_argument_group(title="Optional arguments")
     optional.add_argument("--json", required=False, action="store_true", help="Writes the graph in a json file format")
+    optional.add_argument("--ndjson", required=False, action="store_true",
+                          help="Writes the graph in a newline-delimited json file format, one node or edge per line")
+    optional.add_argument("--split_ndjson", required=False, action="store_true",
+                          help="With --ndjson, writes the nodes, the node types and the edges in separate files")
     optional.add_argument("--taxa", required=False, type=str, help="Pangenome taxa to write graph in json")
     optional.add_argument("--compress", required=False, action="store_true", help="Compress the files in .gz")
     return parser
\ No newline at end of file
@@ -13,10 +13,10 @@ from multiprocessing import get_context
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import mkOutdir, restricted_float
-from ppanggolin.formats import checkPangenomeInfo
-from ppanggolin.genetic_codes import genetic_codes
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import mkOutdir, restricted_float
+from hdf5_2_json.formats import checkPangenomeInfo
+from hdf5_2_json.genetic_codes import genetic_codes
 
 
 def getFamiliesToWrite(pangenome, partitionFilter, soft_core=0.95):
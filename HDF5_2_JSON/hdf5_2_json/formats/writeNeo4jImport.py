@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# default libraries
+import argparse
+import csv
+import logging
+import os
+from collections import Counter
+
+# installed libraries
+from tqdm import tqdm
+import tables
+import numpy
+
+# local libraries
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import write_compressed_or_not, mkOutdir
+from hdf5_2_json.formats.readBinaries import read_chunks, read_chunk_arrays, is_coded, readFamilyNames
+from hdf5_2_json.geneFamily import GeneFamily
+
+# header of each node file, for each label (or group of labels) given to the nodes. The labels are those of the json
+# export, so that the graph is the same as the one built by the loaders from it.
+NODE_HEADERS = {
+    "Taxa": ["id:ID(Taxa)", ":LABEL"],
+    "genome": ["id:ID(genome)", ":LABEL"],
+    "GeneFamily": ["id:ID(GeneFamily)", "nb_genomes:int", "partition", "subpartition", "nb_genes:int", ":LABEL"],
+    "gene": ["id:ID(gene)", "genomic_type", "is_fragment:int", ":LABEL"],
+    "Module": ["id:ID(Module)", "nb_fams:int", ":LABEL"],
+}
+
+# header of each relationship file, for each relationship type and pair of ID spaces
+RELATIONSHIP_HEADERS = {
+    "NEIGHBOR_OF": [":START_ID(GeneFamily)", ":END_ID(GeneFamily)", "weight:int", "partitions", ":TYPE"],
+    "IN_FAMILY": [":START_ID(gene)", ":END_ID(GeneFamily)", ":TYPE"],
+    "IN_ORG": [":START_ID(gene)", ":END_ID(genome)", ":TYPE"],
+    "FAMILY_IN_TAXA": [":START_ID(GeneFamily)", ":END_ID(Taxa)", ":TYPE"],
+    "IN_MODULE": [":START_ID(GeneFamily)", ":END_ID(Module)", ":TYPE"],
+    "MODULE_IN_TAXA": [":START_ID(Module)", ":END_ID(Taxa)", ":TYPE"],
+}
+
+
+class ImportWriter:
+    """
+    Writes the header and data CSV files expected by 'neo4j-admin database import', one pair of files per node label
+    and per relationship type. Rows are written as they come, nothing is kept in memory.
+
+    :param output: The directory in which the files are written
+    :type output: str
+    :param compress: Whether the data files are compressed in .gz
+    :type compress: bool
+    """
+
+    def __init__(self, output, compress=False):
+        self.output = output
+        self.compress = compress
+        self._files = {}
+        self._writers = {}
+        self.counts = Counter()
+        self.arguments = []
+
+    def _open(self, kind, name, header):
+        header_name = f"{self.output}/{kind}_{name}_header.csv"
+        with open(header_name, "w") as header_file:
+            csv.writer(header_file, lineterminator="\n").writerow(header)
+        data_name = f"{self.output}/{kind}_{name}.csv"
+        self._files[name] = write_compressed_or_not(data_name, self.compress)
+        self._writers[name] = csv.writer(self._files[name], lineterminator="\n")
+        if self.compress:
+            data_name += ".gz"
+        self.arguments.append(f"--{kind}={os.path.basename(header_name)},{os.path.basename(data_name)}")
+
+    def node(self, label, *row):
+        if label not in self._writers:
+            self._open("nodes", label, NODE_HEADERS[label])
+        self._writers[label].writerow(row)
+        self.counts[label] += 1
+
+    def relationship(self, name, *row):
+        if name not in self._writers:
+            self._open("relationships", name, RELATIONSHIP_HEADERS[name])
+        self._writers[name].writerow(row)
+        self.counts[name] += 1
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        # arguments file that can be given to neo4j-admin with '@', paths being relative to the output directory
+        with open(f"{self.output}/neo4j_import.args", "w") as args_file:
+            args_file.write("\n".join(self.arguments) + "\n")
+
+
+def readGene2Families(h5f, disable_bar=False):
+    """
+        Reads the gene to gene family associations, with the gene families being stored as integers
+        to keep the associations as light as possible. If the file identifies the genes by their row in the annotation
+        table, the associations are an array giving the family of each row, -1 for the rows with no family. Otherwise
+        they are a dictionary of the gene identifiers.
+
+        :return: the gene to family index associations, and the family names in the order of their index
+    """
+    table = h5f.root.geneFamilies
+    bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
+    if is_coded(table, "gene"):
+        gene2fam = numpy.full(h5f.root.annotations.genes.nrows, -1, dtype=numpy.int64)
+        for chunk in read_chunk_arrays(table):
+            gene2fam[chunk["gene"]] = chunk["geneFam"]
+            bar.update(len(chunk))
+        bar.close()
+        return gene2fam, readFamilyNames(h5f)
+    gene2fam = {}
+    fam2index = {}
+    for row in read_chunks(table):
+        fam_index = fam2index.get(row["geneFam"])
+        if fam_index is None:
+            fam_index = len(fam2index)
+            fam2index[row["geneFam"]] = fam_index
+        gene2fam[row["gene"]] = fam_index
+        bar.update()
+    bar.close()
+    return gene2fam, [fam.decode() for fam in fam2index]
+
+
+def writeNeo4jImport(pangenome, output, pan_name: str, compress=False, disable_bar=False):
+    """
+        Writes the pangenome graph in the CSV files expected by 'neo4j-admin database import', reading the tables of
+        the .h5 file chunk by chunk instead of loading the pangenome objects.
+    """
+    for status, message in [("genomesAnnotated", "Your pangenome has no genes. See the 'annotate' subcommand."),
+                            ("genesClustered", "Your pangenome has no gene families. See the 'cluster' subcommand."),
+                            ("neighborsGraph", "Your pangenome does not have a graph (no edges). "
+                                               "See the 'graph' subcommand."),
+                            ("partitionned", "Your pangenome has not been partitioned. "
+                                             "See the 'partition' subcommand")]:
+        if pangenome.status[status] != "inFile":
+            raise Exception(message)
+
+    h5f = tables.open_file(pangenome.file, "r")
+    writer = ImportWriter(output, compress)
+    writer.node("Taxa", pan_name, "Taxa")
+
+    logging.getLogger().info("Reading the gene families of the genes...")
+    gene2fam, fam_names = readGene2Families(h5f, disable_bar=disable_bar)
+    coded = is_coded(h5f.root.geneFamilies, "gene")
+
+    logging.getLogger().info("Writing the genomes and the genes...")
+    table = h5f.root.annotations.genes
+    org2index = {}
+    # the organism of each gene, as an array of the rows of the annotation table if the genes are coded that way
+    gene2org = numpy.full(table.nrows, -1, dtype=numpy.int32) if coded else {}
+    fam2orgs = [set() for _ in fam_names]
+    fam2nb_genes = [0] * len(fam_names)
+    bar = tqdm(range(table.nrows), unit="gene", disable=disable_bar)
+    for rowIndex, row in enumerate(read_chunks(table)):
+        geneKey = rowIndex if coded else row["gene"]["ID"]
+        fam_index = int(gene2fam[rowIndex]) if coded else gene2fam.get(geneKey, -1)
+        if fam_index >= 0:  # RNAs are not in gene families, and are not part of the graph
+            org_index = org2index.get(row["organism"])
+            if org_index is None:
+                org_index = len(org2index)
+                org2index[row["organism"]] = org_index
+                writer.node("genome", row["organism"].decode(), "genome")
+            gene = row["gene"]["ID"].decode()
+            gene2org[geneKey] = org_index
+            fam2orgs[fam_index].add(org_index)
+            fam2nb_genes[fam_index] += 1
+            writer.node("gene", gene, "CDS", int(row["gene"]["is_fragment"]), "gene")
+            writer.relationship("IN_FAMILY", gene, "F_" + fam_names[fam_index], "IN_FAMILY")
+            writer.relationship("IN_ORG", gene, row["organism"].decode(), "IN_ORG")
+        bar.update()
+    bar.close()
+
+    logging.getLogger().info("Writing the gene families...")
+    table = h5f.root.geneFamiliesInfo
+    fam2index = {name: index for index, name in enumerate(fam_names)}
+    fam_partitions = [""] * len(fam_names)
+    bar = tqdm(range(table.nrows), unit="gene family", disable=disable_bar)
+    for row in read_chunks(table):
+        name = row["name"].decode()
+        fam = GeneFamily(ID=None, name=name)  # only used to get the partition name, it is not filled with genes.
+        fam.addPartition(row["partition"].decode())
+        fam_index = fam2index.get(name)
+        if fam_index is None:  # the family has no gene, so it cannot be in any edge either
+            writer.node("GeneFamily", "F_" + name, 0, fam.namedPartition, fam.partition, 0,
+                        "GeneFamily;" + fam.namedPartition)
+        else:
+            fam_partitions[fam_index] = fam.namedPartition
+            writer.node("GeneFamily", "F_" + name, len(fam2orgs[fam_index]), fam.namedPartition, fam.partition,
+                        fam2nb_genes[fam_index], "GeneFamily;" + fam.namedPartition)
+        writer.relationship("FAMILY_IN_TAXA", "F_" + name, pan_name, "IN_TAXA")
+        bar.update()
+    bar.close()
+    del fam2orgs, fam2index
+
+    logging.getLogger().info("Writing the neighbors graph edges...")
+    table = h5f.root.edges
+    edges = {}
+    bar = tqdm(range(table.nrows), unit="contig adjacency", disable=disable_bar)
+    for chunk in read_chunk_arrays(table):
+        if coded:
+            sources, targets = gene2fam[chunk["geneSource"]].tolist(), gene2fam[chunk["geneTarget"]].tolist()
+            organisms = gene2org[chunk["geneSource"]].tolist()
+        else:
+            sources = [gene2fam[gene] for gene in chunk["geneSource"].tolist()]
+            targets = [gene2fam[gene] for gene in chunk["geneTarget"].tolist()]
+            organisms = [gene2org[gene] for gene in chunk["geneSource"].tolist()]
+        for source, target, org_index in zip(sources, targets, organisms):
+            edge = edges.get(frozenset([source, target]))
+            if edge is None:  # the first gene pair met gives the direction of the edge, as when reading the graph
+                edge = (source, target, set())
+                edges[frozenset([source, target])] = edge
+            edge[2].add(org_index)
+        bar.update(len(chunk))
+    bar.close()
+    for source, target, organisms in edges.values():
+        writer.relationship("NEIGHBOR_OF", "F_" + fam_names[source], "F_" + fam_names[target], len(organisms),
+                            f"{fam_partitions[source]}_{fam_partitions[target]}", "NEIGHBOR_OF")
+    del edges
+
+    if pangenome.status["modules"] == "inFile":
+        logging.getLogger().info("Writing the modules...")
+        table = h5f.root.modules
+        mod_fam_names = readFamilyNames(h5f) if is_coded(table, "geneFam") else None
+        mod2nb_fams = Counter()
+        for row in read_chunks(table):
+            mod_name = f"{pan_name}_{row['module']}"
+            mod2nb_fams[mod_name] += 1
+            fam_name = mod_fam_names[row["geneFam"]] if mod_fam_names is not None else row["geneFam"].decode()
+            writer.relationship("IN_MODULE", "F_" + fam_name, mod_name, "IN_MODULE")
+        for mod_name, nb_fams in mod2nb_fams.items():
+            writer.node("Module", mod_name, nb_fams, "Module")
+            writer.relationship("MODULE_IN_TAXA", mod_name, pan_name, "IN_TAXA")
+    h5f.close()
+    writer.close()
+
+    for name, count in writer.counts.items():
+        logging.getLogger().info(f"{name}: {count}")
+    logging.getLogger().info(f"Done writing the neo4j import files in '{output}'. They can be imported with: "
+                             f"'cd {output} && neo4j-admin database import full @neo4j_import.args <database>'")
+
+
+def launchNeo4jImport(args):
+    mkOutdir(args.output, args.force)
+    pangenome = Pangenome()
+    pangenome.addFile(args.pangenome)
+    writeNeo4jImport(pangenome, args.output, args.taxa, compress=args.compress, disable_bar=args.disable_prog_bar)
+
+
+def writeNeo4jImportSubparser(subparser):
+    parser = subparser.add_parser("neo4j_import", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    required = parser.add_argument_group(title="Required arguments",
+                                         description="All of the following arguments are required :")
+    required.add_argument('-p', '--pangenome', required=True, type=str, help="The pangenome .h5 file")
+    required.add_argument('-o', '--output', required=True, type=str,
+                          help="Output directory where the CSV files will be written")
+    required.add_argument("--taxa", required=True, type=str, help="Pangenome taxa, the root node of the graph")
+    optional = parser.add_argument_group(title="Optional arguments")
+    optional.add_argument("--compress", required=False, action="store_true", help="Compress the CSV files in .gz")
+    return parser
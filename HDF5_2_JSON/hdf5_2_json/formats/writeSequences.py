@@ -9,10 +9,10 @@ import logging
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import write_compressed_or_not, mkOutdir, read_compressed_or_not, restricted_float
-from ppanggolin.formats import checkPangenomeInfo, getGeneSequencesFromFile
-from ppanggolin.annotate import detect_filetype
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import write_compressed_or_not, mkOutdir, read_compressed_or_not, restricted_float
+from hdf5_2_json.formats import checkPangenomeInfo, getGeneSequencesFromFile
+from hdf5_2_json.annotate import detect_filetype
 
 poss_values_log = "Possible values are 'all', 'persistent', 'shell', 'cloud', 'rgp', 'softcore', " \
                   "'core', 'module_X' with X being a module id."
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+# installed libraries
+import numpy
+
+# local libraries
+from hdf5_2_json.geneFamily import GeneFamily
+
+
+class GeneColumns:
+    """Columnar store of the genes of a pangenome. Each gene is a row, and each of its attributes (start, stop, strand,
+    family, organism, contig, position, is_fragment) is a numpy array, so that the analyses walking every gene of the
+    pangenome can work on whole arrays rather than on the pointer graph of the objects.
+
+    The rows are ordered by organism, contig and position, so the genes of a contig are a contiguous slice of rows.
+    Families, organisms and contigs are stored as their dense indices in the pangenome, which are their offsets in the
+    :attr:`families`, :attr:`organisms` and :attr:`contigs` lists, and the genes with no family have the family
+    index -1. The families of the genes are those they had when the store was built, the version of the memberships of
+    the families at that time being kept in :attr:`membershipVersion`.
+
+    :param pangenome: The pangenome whose genes are stored
+    :type pangenome: :class:`hdf5_2_json.pangenome.Pangenome`
+    """
+
+    def __init__(self, pangenome):
+        self.membershipVersion = GeneFamily.membershipVersion
+        self.organisms = [None] * pangenome.max_org_id
+        for org in pangenome.organisms:
+            self.organisms[org.ID] = org
+        self.families = [None] * pangenome.max_fam_id
+        for fam in pangenome.geneFamilies:
+            self.families[fam.ID] = fam
+        self.contigs = [None] * pangenome.max_contig_id
+        self.genes = []
+        starts, stops, strands, families, organisms, contigs, positions, fragments = [], [], [], [], [], [], [], []
+        # rows of the first gene and after the last gene of each contig and organism
+        self.contigStarts = numpy.zeros(len(self.contigs), dtype=numpy.int64)
+        self.contigStops = numpy.zeros(len(self.contigs), dtype=numpy.int64)
+        self.orgStarts = numpy.zeros(len(self.organisms), dtype=numpy.int64)
+        self.orgStops = numpy.zeros(len(self.organisms), dtype=numpy.int64)
+        for org in self.organisms:
+            if org is None:
+                continue
+            self.orgStarts[org.ID] = len(self.genes)
+            for contig in org.contigs:
+                self.contigs[contig.ID] = contig
+                self.contigStarts[contig.ID] = len(self.genes)
+                for gene in contig.genes:
+                    if gene is None:
+                        continue
+                    self.genes.append(gene)
+                    starts.append(gene.start)
+                    stops.append(gene.stop)
+                    strands.append(1 if gene.strand == "+" else -1)
+                    families.append(gene.family.ID if gene.family is not None else -1)
+                    organisms.append(org.ID)
+                    contigs.append(contig.ID)
+                    positions.append(gene.position)
+                    fragments.append(gene.is_fragment)
+                self.contigStops[contig.ID] = len(self.genes)
+            self.orgStops[org.ID] = len(self.genes)
+        self.start = numpy.array(starts, dtype=numpy.int64)
+        self.stop = numpy.array(stops, dtype=numpy.int64)
+        self.strand = numpy.array(strands, dtype=numpy.int8)
+        self.family = numpy.array(families, dtype=numpy.int32)
+        self.organism = numpy.array(organisms, dtype=numpy.int32)
+        self.contig = numpy.array(contigs, dtype=numpy.int32)
+        self.position = numpy.array(positions, dtype=numpy.int32)
+        self.is_fragment = numpy.array(fragments, dtype=bool)
+
+    def __len__(self):
+        return len(self.genes)
+
+    def __getitem__(self, row):
+        return GeneView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self.genes)):
+            yield GeneView(self, row)
+
+    def contigRows(self, contig):
+        """Returns the rows of the genes of a contig
+
+        :param contig: the contig
+        :type contig: :class:`hdf5_2_json.genome.Contig`
+        :rtype: slice
+        """
+        return slice(self.contigStarts[contig.ID], self.contigStops[contig.ID])
+
+    def organismRows(self, organism):
+        """Returns the rows of the genes of an organism
+
+        :param organism: the organism
+        :type organism: :class:`hdf5_2_json.genome.Organism`
+        :rtype: slice
+        """
+        return slice(self.orgStarts[organism.ID], self.orgStops[organism.ID])
+
+    def organismIndices(self, organisms):
+        """Returns the indices of the given organisms in :attr:`organisms`
+
+        :param organisms: organisms of the pangenome
+        :type organisms: Iterable[:class:`hdf5_2_json.genome.Organism`]
+        :rtype: numpy.ndarray
+        """
+        return numpy.array([org.ID for org in organisms], dtype=numpy.int32)
+
+    def familyMask(self, values, dtype=bool):
+        """Spreads a value per family to the genes.
+
+        :param values: one value per family of :attr:`families`
+        :type values: Iterable
+        :param dtype: the type of the values
+        :return: the value of the family of each gene. The genes with no family get the default value of the dtype.
+        :rtype: numpy.ndarray
+        """
+        values = numpy.array(list(values), dtype=dtype)
+        withDefault = numpy.zeros(len(values) + 1, dtype=values.dtype)
+        withDefault[:-1] = values
+        return withDefault[self.family]  # the index -1 of the genes with no family is the default value
+
+    def neighbors(self):
+        """Computes the pairs of neighboring genes of the neighbors graph, in the order in which they are met when
+        walking the contigs.
+        Genes of removed families are skipped, two consecutive genes of the same family are not linked if one of them
+        is a fragment, and the first gene of a circular contig is linked to its last gene that is not removed.
+
+        :return: the rows of the genes and of their previous neighbor, for each pair
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        removed = self.familyMask(fam is not None and fam.removed for fam in self.families)
+        kept = numpy.flatnonzero(~removed)
+        prev, curr = kept[:-1], kept[1:]
+        linked = self.contig[prev] == self.contig[curr]
+        linked &= ~((self.family[prev] == self.family[curr]) & (self.is_fragment[prev] | self.is_fragment[curr]))
+        prev, curr = prev[linked], curr[linked]
+
+        circular = numpy.array([contig is not None and contig.is_circular for contig in self.contigs], dtype=bool)
+        # the last kept gene of each contig
+        lastKept = kept[numpy.append(numpy.flatnonzero(numpy.diff(self.contig[kept])), len(kept) - 1)] if len(kept) \
+            else kept
+        lastKept = lastKept[circular[self.contig[lastKept]]]
+        firstGenes = self.contigStarts[self.contig[lastKept]]
+
+        # the pair closing a circular contig comes after the other pairs of the contig
+        order = numpy.argsort(numpy.concatenate([curr * 2, self.contigStops[self.contig[lastKept]] * 2 - 1]),
+                              kind="stable")
+        return numpy.concatenate([curr, firstGenes])[order], numpy.concatenate([prev, lastKept])[order]
+
+
+# number of bits set in each byte, to count the bits of the packed rows
+POPCOUNT = numpy.array([bin(byte).count("1") for byte in range(256)], dtype=numpy.uint8)
+
+
+def packedBits(rows, columns, nbRows, nbColumns):
+    """Builds a bit matrix packed row by row, as :func:`numpy.packbits` packs it, by setting the bits of the given
+    cells in the packed bytes, so that the unpacked matrix is never allocated.
+
+    :param rows: the row of each cell that is set
+    :type rows: numpy.ndarray
+    :param columns: the column of each cell that is set
+    :type columns: numpy.ndarray
+    :param nbRows: the number of rows of the matrix
+    :type nbRows: int
+    :param nbColumns: the number of columns of the matrix
+    :type nbColumns: int
+    :return: nbRows × ceil(nbColumns / 8) bytes
+    :rtype: numpy.ndarray
+    """
+    bits = numpy.zeros((nbRows, (nbColumns + 7) // 8), dtype=numpy.uint8)
+    numpy.bitwise_or.at(bits, (rows, columns >> 3), (0x80 >> (columns & 7)).astype(numpy.uint8))
+    return bits
+
+
+def partitionMask(families, partition='all'):
+    """Selects the gene families of a partition.
+
+    :param families: gene families, or None for the IDs that have no family
+    :type families: Sequence[:class:`hdf5_2_json.geneFamily.GeneFamily`]
+    :param partition: 'all', 'persistent', 'shell', 'cloud' or 'accessory' (shell and cloud)
+    :type partition: str
+    :return: whether each family belongs to the partition
+    :rtype: numpy.ndarray
+    """
+    if partition == 'all':
+        return numpy.ones(len(families), dtype=bool)
+    elif partition in ['persistent', 'shell', 'cloud']:
+        parts = [partition]
+    elif partition == 'accessory':
+        parts = ['shell', 'cloud']
+    else:
+        raise Exception("There is not any partition corresponding please report a github issue")
+    return numpy.array([fam is not None and fam.namedPartition in parts for fam in families], dtype=bool)
+
+
+class PresenceMatrix:
+    """Presence / absence of the gene families of a pangenome in its organisms, built at once from the columns of the
+    genes. The matrix has a row per family and a column per organism, indexed by their IDs, and is stored as packed
+    bits (see :func:`packedBits`), both row by row in :attr:`familyBits` and column by column in
+    :attr:`organismBits`, so that the number of organisms of each family and of families of each organism are counted
+    on whole arrays. The partitions are applied as masks over the families, so the matrix does not have to be rebuilt
+    for each partition.
+
+    :param columns: The genes of the pangenome
+    :type columns: :class:`GeneColumns`
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.families = columns.families
+        self.organisms = columns.organisms
+        withFamily = columns.family >= 0
+        families, organisms = columns.family[withFamily], columns.organism[withFamily]
+        self.familyBits = packedBits(families, organisms, len(self.families), len(self.organisms))
+        self.organismBits = packedBits(organisms, families, len(self.organisms), len(self.families))
+
+    def partitionMask(self, partition='all'):
+        """Selects the gene families of a partition, see :func:`partitionMask`
+
+        :rtype: numpy.ndarray
+        """
+        return partitionMask(self.families, partition)
+
+    def organismMask(self, organisms):
+        """Selects organisms of the pangenome
+
+        :param organisms: organisms of the pangenome
+        :type organisms: Iterable[:class:`hdf5_2_json.genome.Organism`]
+        :return: whether each organism of :attr:`organisms` is selected
+        :rtype: numpy.ndarray
+        """
+        mask = numpy.zeros(len(self.organisms), dtype=bool)
+        mask[self.columns.organismIndices(organisms)] = True
+        return mask
+
+    def present(self, partition='all', start=0, stop=None):
+        """Unpacks the rows of the families from start to stop, the families out of the partition being absent from
+        every organism. The unpacked rows take eight times the memory of the packed ones, so the matrix is unpacked by
+        blocks of families rather than whole.
+
+        :param partition: the partition of the families
+        :type partition: str
+        :param start: the first family of the block
+        :type start: int
+        :param stop: the family after the last one of the block, the last family of the matrix if None
+        :type stop: int
+        :return: families × organisms matrix
+        :rtype: numpy.ndarray
+        """
+        present = numpy.unpackbits(self.familyBits[start:stop], axis=1, count=len(self.organisms)).view(bool)
+        present &= partitionMask(self.families[start:stop], partition)[:, None]
+        return present
+
+    def familyCounts(self, partition='all', organisms=None):
+        """Counts the organisms in which each family is present.
+
+        :param partition: the partition of the families, the others having no organism
+        :type partition: str
+        :param organisms: count only these organisms, all of them if None
+        :type organisms: Iterable[:class:`hdf5_2_json.genome.Organism`]
+        :return: the number of organisms of each family
+        :rtype: numpy.ndarray
+        """
+        bits = self.familyBits
+        if organisms is not None:
+            bits = bits & numpy.packbits(self.organismMask(organisms))
+        counts = POPCOUNT[bits].sum(axis=1, dtype=numpy.int64)
+        counts[~self.partitionMask(partition)] = 0
+        return counts
+
+    def organismCounts(self, partition='all'):
+        """Counts the families of the partition present in each organism.
+
+        :param partition: the partition of the families
+        :type partition: str
+        :return: the number of families of each organism
+        :rtype: numpy.ndarray
+        """
+        bits = self.organismBits & numpy.packbits(self.partitionMask(partition))
+        return POPCOUNT[bits].sum(axis=1, dtype=numpy.int64)
+
+
+class GeneView:
+    """A read-only gene backed by a row of a :class:`GeneColumns`, giving the same attributes as
+    :class:`hdf5_2_json.genome.Gene` for the columns of the store.
+
+    :param columns: the store of the gene
+    :type columns: :class:`GeneColumns`
+    :param row: the row of the gene
+    :type row: int
+    """
+    __slots__ = ("_columns", "_row")
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+
+    def __str__(self):
+        return str(self.ID)
+
+    @property
+    def ID(self):
+        return self._columns.genes[self._row].ID
+
+    @property
+    def start(self):
+        return int(self._columns.start[self._row])
+
+    @property
+    def stop(self):
+        return int(self._columns.stop[self._row])
+
+    @property
+    def strand(self):
+        return "+" if self._columns.strand[self._row] > 0 else "-"
+
+    @property
+    def position(self):
+        return int(self._columns.position[self._row])
+
+    @property
+    def is_fragment(self):
+        return bool(self._columns.is_fragment[self._row])
+
+    @property
+    def family(self):
+        index = self._columns.family[self._row]
+        return self._columns.families[index] if index >= 0 else None
+
+    @property
+    def organism(self):
+        return self._columns.organisms[self._columns.organism[self._row]]
+
+    @property
+    def contig(self):
+        return self._columns.contigs[self._columns.contig[self._row]]
+
+    @property
+    def gene(self):
+        """the :class:`hdf5_2_json.genome.Gene` object of the row"""
+        return self._columns.genes[self._row]
@@ -3,19 +3,18 @@
 
 # default libraries
 from collections import defaultdict
-import logging
-
-# installed libraries
-import gmpy2
 
 # local libraries
-from ppanggolin.genome import Gene
+from hdf5_2_json.genome import Gene
 
 
 class GeneFamily:
     """This represents a single gene family. It will be a node in the pangenome graph, and be aware of its genes and edges.
 
     """
+    # incremented whenever a gene is added to a family, so that the stores built from the families of the genes know
+    # when they are outdated, see :meth:`hdf5_2_json.pangenome.Pangenome.getGeneColumns`
+    membershipVersion = 0
 
     def __init__(self, ID, name):
         """Constructor method
@@ -75,46 +74,22 @@ class GeneFamily:
         """Add a gene to the gene family, and sets the gene's :attr:family accordingly.
 
         :param gene: the gene to add
-        :type gene: :class:`ppanggolin.genome.Gene`
+        :type gene: :class:`hdf5_2_json.genome.Gene`
         :raises TypeError: If the provided `gene` is of the wrong type
         """
         if not isinstance(gene, Gene):
             raise TypeError(f"'Gene' type object was expected, but '{type(gene)}' type object was provided.")
         self.genes.add(gene)
         gene.family = self
+        GeneFamily.membershipVersion += 1
         if hasattr(gene, "organism"):
             self._genePerOrg[gene.organism].add(gene)
 
-    def mkBitarray(self, index, partition='all'):
-        """Produces a bitarray representing the presence / absence of the family in the pangenome using the provided index
-        The bitarray is stored in the :attr:`bitarray` attribute and is a :class:`gmpy2.xmpz` type.
-
-        :param index: The index computed by :func:`ppanggolin.pangenome.Pangenome.getIndex`
-        :type index: dict[:class:`ppanggolin.genome.Organism`, int]
-        :param partition: partition used to compute bitarray
-        :type partition: str
-        """
-        self.bitarray = gmpy2.xmpz(0)  # pylint: disable=no-member
-        if partition == 'all':
-            logging.getLogger().debug(f"all")
-            for org in self.organisms:
-                self.bitarray[index[org]] = 1
-        elif partition in ['shell', 'cloud']:
-            logging.getLogger().debug(f"shell, cloud")
-            if self.namedPartition == partition:
-                for org in self.organisms:
-                    self.bitarray[index[org]] = 1
-        elif partition == 'accessory':
-            logging.getLogger().debug(f"accessory")
-            if self.namedPartition in ['shell', 'cloud']:
-                for org in self.organisms:
-                    self.bitarray[index[org]] = 1
-
     def getOrgDict(self):
         """Returns the organisms and the genes belonging to the gene family
 
         :return: a dictionnary of organism as key and set of genes as values
-        :rtype: dict[ :class:`ppanggolin.genome.Organism` ,set[:class:`ppanggolin.genome.Gene`]
+        :rtype: dict[ :class:`hdf5_2_json.genome.Organism` ,set[:class:`hdf5_2_json.genome.Gene`]
         """
         try:
             return self._genePerOrg
@@ -127,9 +102,9 @@ class GeneFamily:
         """Returns the genes belonging to the gene family in the given Organism
 
         :param org: Organism to look for
-        :type org: :class:`ppanggolin.genome.Organism`
+        :type org: :class:`hdf5_2_json.genome.Organism`
         :return: a set of gene(s)
-        :rtype: set[:class:`ppanggolin.genome.Gene`]
+        :rtype: set[:class:`hdf5_2_json.genome.Gene`]
         """
         try:
             return self._genePerOrg[org]
@@ -140,28 +115,28 @@ class GeneFamily:
 
     @property
     def neighbors(self):
-        """Returns all of the :class:`ppanggolin.geneFamily.GeneFamily` that are linked with an edge
+        """Returns all of the :class:`hdf5_2_json.geneFamily.GeneFamily` that are linked with an edge
 
         :return: Neighbors
-        :rtype: set[:class:`ppanggolin.geneFamily.GeneFamily`]
+        :rtype: set[:class:`hdf5_2_json.geneFamily.GeneFamily`]
         """
         return set(self._edges.keys())
 
     @property
     def edges(self):
-        """Returns all of the :class:`ppanggolin.pangenome.Edge` that are linked to this gene family
+        """Returns all of the :class:`hdf5_2_json.pangenome.Edge` that are linked to this gene family
 
         :return: Edges of the gene family
-        :rtype: list[:class:`ppanggolin.pangenome.Edge`]
+        :rtype: list[:class:`hdf5_2_json.pangenome.Edge`]
         """
         return list(self._edges.values())
 
     @property
     def organisms(self):
-        """Returns all of the :class:`ppanggolin.genome.Organism` that have this gene family
+        """Returns all of the :class:`hdf5_2_json.genome.Organism` that have this gene family
 
         :return: Organisms that have this gene family
-        :rtype: set[:class:`ppanggolin.genome.Organism`]
+        :rtype: set[:class:`hdf5_2_json.genome.Organism`]
         """
         try:
             return set(self._genePerOrg.keys())
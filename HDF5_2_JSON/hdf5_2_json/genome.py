@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 # coding: utf8
 
-# installed libraries
-import logging
-
-import gmpy2
-
 
 class Feature:
+    # slots rather than a __dict__ per instance, the features being by far the most numerous objects of a pangenome.
+    # The sequences ('dna') and the parents are only allocated when they are filled.
+    __slots__ = ("ID", "is_fragment", "type", "start", "stop", "strand", "product", "name", "local_identifier",
+                 "organism", "contig", "dna")
+
     def __init__(self, ID):
         self.ID = ID
         self.is_fragment = False
@@ -35,15 +35,26 @@ class Feature:
 
 
 class RNA(Feature):
-    pass
+    __slots__ = ()
 
 
 class Gene(Feature):
+    __slots__ = ("index", "position", "family", "genetic_code", "protein", "_RGP")
+
     def __init__(self, ID):
         super().__init__(ID)
+        self.index = None  # dense index of the gene in the pangenome, given when its organism is added to it
         self.position = None
         self.family = None
-        self.RGP = set()
+        self._RGP = None
+
+    @property
+    def RGP(self):
+        """the regions of genomic plasticity of the gene. The set is only allocated on the first access, as most genes
+        do not belong to any RGP."""
+        if self._RGP is None:
+            self._RGP = set()
+        return self._RGP
 
     def __str__(self):
         return str(self.ID)
@@ -61,7 +72,10 @@ class Gene(Feature):
 
 
 class Contig:
+    __slots__ = ("ID", "name", "is_circular", "RNAs", "_genes_start", "_genes_position")
+
     def __init__(self, name, is_circular=False):
+        self.ID = None  # dense index of the contig in the pangenome, given when its organism is added to it
         self.name = name
         self.is_circular = is_circular
         self.RNAs = set()  # saving the rna annotations. We're not using them in the vast majority of cases.
@@ -107,6 +121,7 @@ class Contig:
 
 class Organism:
     def __init__(self, name):
+        self.ID = None  # dense index of the organism in the pangenome, given when it is added to it
         self.name = name
         self._contigs_getter = {}
 
@@ -141,28 +156,3 @@ class Organism:
         new_contig = Contig(key, is_circular)
         self._contigs_getter[key] = new_contig
         return new_contig
-
-    def mk_bitarray(self, index, partition='all'):
-        """Produces a bitarray representing the presence / absence of families in the organism using the provided index
-        The bitarray is stored in the :attr:`bitarray` attribute and is a :class:`gmpy2.xmpz` type.
-        :param index: The index computed by :func:`ppanggolin.pangenome.Pangenome.getIndex`
-        :type index: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        self.bitarray = gmpy2.xmpz()  # pylint: disable=no-member
-        if partition == 'all':
-            logging.getLogger().debug(f"all")
-            for fam in self.families:
-                self.bitarray[index[fam]] = 1
-        elif partition in ['shell', 'cloud']:
-            logging.getLogger().debug(f"shell, cloud")
-            for fam in self.families:
-                if fam.namedPartition == partition:
-                    self.bitarray[index[fam]] = 1
-        elif partition == 'accessory':
-            logging.getLogger().debug(f"accessory")
-            for fam in self.families:
-                if fam.namedPartition in ['shell', 'cloud']:
-                    self.bitarray[index[fam]] = 1
-        else:
-            raise Exception("There is not any partition corresponding please report a github issue")
-
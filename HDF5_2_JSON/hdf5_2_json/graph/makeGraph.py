@@ -9,8 +9,8 @@ import argparse
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.formats import readPangenome, writePangenome, ErasePangenome
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.formats import readPangenome, writePangenome, ErasePangenome
 
 
 def checkPangenomeFormerGraph(pangenome, force):
@@ -65,24 +65,13 @@ def computeNeighborsGraph(pangenome, remove_copy_number=0, force=False, disable_
         remove_high_copy_number(pangenome, remove_copy_number)
 
     logging.getLogger().info("Computing the neighbors graph...")
-    bar = tqdm(pangenome.organisms, total=len(pangenome.organisms), unit="organism", disable=disable_bar)
-    for org in bar:
-        bar.set_description(f"Processing {org.name}")
-        bar.refresh()
-        for contig in org.contigs:
-            prev = None
-            for gene in contig.genes:
-                try:
-                    if not gene.family.removed:
-                        if prev is not None and not (prev.family == gene.family and (prev.is_fragment or
-                                                                                     gene.is_fragment)):
-                            pangenome.addEdge(gene, prev)
-                        prev = gene
-                except AttributeError:
-                    raise AttributeError("a Gene does not have a GeneFamily object associated")
-            if prev is not None and contig.is_circular and len(contig.genes) > 0:
-                #if prev is None, the contig is entirely made of duplicated genes, so no edges are added
-                pangenome.addEdge(contig.genes[0], prev)
+    columns = pangenome.getGeneColumns()
+    if (columns.family < 0).any():
+        raise AttributeError("a Gene does not have a GeneFamily object associated")
+    genes, prevGenes = columns.neighbors()
+    for gene, prev in tqdm(zip(genes.tolist(), prevGenes.tolist()), total=len(genes), unit="edge",
+                           disable=disable_bar):
+        pangenome.addEdge(columns.genes[gene], columns.genes[prev])
     logging.getLogger().info("Done making the neighbors graph.")
     pangenome.status["neighborsGraph"] = "Computed"
 
@@ -8,7 +8,7 @@ import argparse
 import tables
 
 # local libraries
-from ppanggolin.formats import readInfo, readParameters
+from hdf5_2_json.formats import readInfo, readParameters
 
 
 def printInfo(pangenome, status=False, content=False, parameters=False):
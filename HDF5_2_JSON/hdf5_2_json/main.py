@@ -15,6 +15,8 @@ import os
 
 # local modules
 import hdf5_2_json.formats
+import hdf5_2_json.annotate
+import hdf5_2_json.cluster
 
 def checkTsvSanity(tsv):
     f = open(tsv, "r")
@@ -75,7 +77,10 @@ def cmdLine():
     # need to manually write the description so that it's displayed into groups of subcommands ....
     desc = "\n"
     desc += "HDF5 2 JSON\n"
+    desc += "    annotate      Annotates genomes, or appends them to a pangenome file with --append\n"
+    desc += "    cluster       Clusters the genes in gene families, or only those of appended genomes with --append\n"
     desc += "    write         Writes 'flat' files representing the pangenome that can be used with other software\n"
+    desc += "    neo4j_import  Writes the CSV files to build a neo4j database offline with 'neo4j-admin import'\n"
     desc += "  \n"
 
     parser = argparse.ArgumentParser(
@@ -86,7 +91,10 @@ def cmdLine():
     subparsers = parser.add_subparsers(metavar="", dest="subcommand", title="subcommands", description=desc)
     subparsers.required = True  # because python3 sent subcommands to hell apparently
 
-    subs = [hdf5_2_json.formats.writeFlat.writeFlatSubparser(subparsers)]  # subparsers
+    subs = [hdf5_2_json.annotate.syntaSubparser(subparsers),
+            hdf5_2_json.cluster.clusterSubparser(subparsers),
+            hdf5_2_json.formats.writeFlat.writeFlatSubparser(subparsers),
+            hdf5_2_json.formats.writeNeo4jImportSubparser(subparsers)]  # subparsers
 
     for sub in subs:  # add options common to all subcommands
         common = sub._action_groups.pop(1)  # get the 'optional arguments' action group.
@@ -98,7 +106,10 @@ def cmdLine():
         common.add_argument("--log", required=False, type=checkLog, default="stdout", help="log output file")
         common.add_argument("-d", "--disable_prog_bar", required=False, action="store_true",
                             help="disables the progress bars")
-        common.add_argument("-c", "--cpu", required=False, default=1, type=int, help="Number of available cpus")
+        common.add_argument("-c", "--cpu", required=False, default=1, type=int,
+                            help="Number of available cpus. The genomes of a pangenome file are read and decompressed "
+                                 "by several processes, but their objects are still built one at a time by the main "
+                                 "process")
         common.add_argument('-f', '--force', action="store_true",
                             help="Force writing in output directory and in pangenome output file.")
         sub._action_groups.append(common)
@@ -130,8 +141,16 @@ def main():
                             datefmt='%Y-%m-%d %H:%M:%S')
         logging.getLogger().info("Command: " + " ".join([arg for arg in sys.argv]))
         logging.getLogger().info("HDF5_2_JSON" + pkg_resources.get_distribution("hdf5_2_json").version)
-    if args.subcommand == "write":
+    if args.subcommand == "annotate":
+        checkInputFiles(anno=args.anno, pangenome=args.append, fasta=args.fasta)
+        hdf5_2_json.annotate.launch(args)
+    elif args.subcommand == "cluster":
+        checkInputFiles(pangenome=args.pangenome)
+        hdf5_2_json.cluster.launch(args)
+    elif args.subcommand == "write":
         hdf5_2_json.formats.launchFlat(args)
+    elif args.subcommand == "neo4j_import":
+        hdf5_2_json.formats.launchNeo4jImport(args)
 
 if __name__ == "__main__":
     main()
@@ -5,13 +5,12 @@
 import logging
 
 # installed libraries
-from gmpy2 import popcount
-from itertools import combinations
+import numpy
 from tqdm import tqdm
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.formats import checkPangenomeInfo
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.formats import checkPangenomeInfo
 
 
 def genomes_fluidity(pangenome, disable_bar=False):
@@ -29,41 +28,58 @@ def genomes_fluidity(pangenome, disable_bar=False):
     # check statuses and load info
     logging.getLogger().info("Check information in pangenome")
     checkPangenomeInfo(pangenome, needAnnotations=True, needFamilies=True, disable_bar=disable_bar)
+    presence = pangenome.getPresenceMatrix()
+    orgIDs = [org.ID for org in pangenome.organisms]
     fluidity_dict = {'all': None, 'shell': None, 'cloud': None, 'accessory': None}
     for subset in fluidity_dict.keys():
-        logging.getLogger().debug(f"Compute binaries for {subset} partition")
-        pangenome.compute_org_bitarrays(part=subset)
-        # Compute binaries corresponding to presence / absence of families in organisms
-        g_sum = 0
-        logging.getLogger().debug("Get number of families in each organisms")
-        org2_nb_fam = nb_fam_per_org(pangenome, disable_bar)
+        logging.getLogger().debug(f"Get number of families in each organisms for {subset} partition")
+        nb_fam = presence.organismCounts(subset)[orgIDs]
         logging.getLogger().info(f"Compute rate of unique family for each genome combination in {subset}")
-        for c_organisms in tqdm(list(combinations(pangenome.organisms, 2)), unit="combination", disable=disable_bar):
-            tot_fam = org2_nb_fam.get(c_organisms[0].name) + org2_nb_fam.get(c_organisms[1].name)
-            common_fam = popcount(c_organisms[0].bitarray & c_organisms[1].bitarray) - 1
-            if tot_fam > 0 and common_fam > 0:
-                g_sum += (tot_fam - 2 * common_fam) / tot_fam
+        # families shared by each pair of organisms, from the product of the presence / absence matrix by itself,
+        # summed over blocks of families so that the matrix is never unpacked whole
+        common_fam = numpy.zeros((len(orgIDs), len(orgIDs)), dtype=numpy.int64)
+        block = max(1, 2 ** 22 // max(1, len(orgIDs)))
+        for start in range(0, len(presence.families), block):
+            present = presence.present(subset, start, start + block)[:, orgIDs].astype(numpy.float32)
+            common_fam += (present.T @ present).astype(numpy.int64)
+        common_fam -= 1
+        first, second = numpy.triu_indices(len(orgIDs), k=1)
+        g_sum = combinations_sum(nb_fam[first] + nb_fam[second], common_fam[first, second])
         fluidity_dict[subset] = (2 / (pangenome.number_of_organisms() * (pangenome.number_of_organisms() - 1))) * g_sum
     return fluidity_dict
 
 
-def nb_fam_per_org(pangenome, disable_bar=False):
+def combinations_sum(tot, common):
+    """
+    Sum the rates of unique elements of the combinations of two sets
+
+    :param tot: number of elements of the first set plus number of elements of the second set, for each combination
+    :type tot: numpy.ndarray
+    :param common: number of elements shared by the two sets, minus one, for each combination
+    :type common: numpy.ndarray
+
+    :return: the sum of the rates, over the combinations with elements in common
+    :rtype: float
+    """
+    kept = (tot > 0) & (common > 0)
+    tot, common = tot[kept], common[kept]
+    return float(((tot - 2 * common) / tot).sum())
+
+
+def nb_fam_per_org(pangenome, partition='all'):
     """
     Create a dictionary with for each organism the number of gene families
 
     :param pangenome: Pangenome which contain the organisms and gene families
     :type pangenome: Pangenome
-    :param disable_bar: Disable the progress bar
-    :type disable_bar: bool
+    :param partition: Partition of the gene families which are counted
+    :type partition: str
 
     :return: Dictionary with organisms as key and number of families as value
     :rtype: dict
     """
-    org2_nb_fam = dict()
-    for org in tqdm(pangenome.organisms, unit='organism', disable=disable_bar):
-        org2_nb_fam[org.name] = popcount(org.bitarray)
-    return org2_nb_fam
-
+    nb_fam = pangenome.getPresenceMatrix().organismCounts(partition)
+    return {org.name: int(nb_fam[org.ID]) for org in pangenome.organisms}
 
 # TODO Function to normalize genome fluidity
 
@@ -85,38 +101,44 @@ def fam_fluidity(pangenome, disable_bar=False):
     # check statuses and load info
     logging.getLogger().info("Check information in pangenome")
     checkPangenomeInfo(pangenome, needAnnotations=True, needFamilies=True, disable_bar=disable_bar)
+    presence = pangenome.getPresenceMatrix()
     fluidity_dict = {'all': None, 'shell': None, 'cloud': None, 'accessory': None}
     for subset in fluidity_dict.keys():
-        logging.getLogger().debug(f"Compute binaries for {subset} partition")
-        pangenome.computeFamilyBitarrays(part=subset)
-        # Compute binaries corresponding to presence / absence of families in organisms
-        f_sum = 0
-        logging.getLogger().debug("Get number of families in each organisms")
-        fam_2_nb_org = nb_org_per_fam(pangenome, disable_bar)
+        logging.getLogger().debug(f"Get number of organisms of each family for {subset} partition")
+        nb_org = presence.familyCounts(subset)
         logging.getLogger().info("Compute rate of unique organism for each family combination")
-        for c_fam in tqdm(list(combinations(pangenome.geneFamilies, 2)), unit="combination", disable=disable_bar):
-            tot_org = fam_2_nb_org.get(c_fam[0].name) + fam_2_nb_org.get(c_fam[1].name)
-            common_fam = popcount(c_fam[0].bitarray & c_fam[1].bitarray) - 1
-            if tot_org > 0 and common_fam > 0:
-                f_sum += (tot_org - 2 * common_fam) / tot_org
+        f_sum = 0
+        # the organisms shared by the combinations of the families of a block with those of the same or of a following
+        # block, so that neither the presence / absence matrix nor the matrix of the shared organisms of all the
+        # combinations is ever built whole
+        block = 2 ** 11
+        bounds = [(start, min(start + block, len(nb_org))) for start in range(0, len(nb_org), block)]
+        for index, (start, stop) in enumerate(tqdm(bounds, unit="block of families", disable=disable_bar)):
+            present = presence.present(subset, start, stop).astype(numpy.float32)
+            for otherStart, otherStop in bounds[index:]:
+                others = present if otherStart == start else \
+                    presence.present(subset, otherStart, otherStop).astype(numpy.float32)
+                common_org = (present @ others.T).astype(numpy.int64) - 1
+                first, second = numpy.nonzero(numpy.arange(otherStart, otherStop)[None, :] >
+                                              numpy.arange(start, stop)[:, None])
+                f_sum += combinations_sum(nb_org[first + start] + nb_org[second + otherStart],
+                                          common_org[first, second])
         fluidity_dict[subset] = (2 / (pangenome.number_of_geneFamilies() *
                                       (pangenome.number_of_geneFamilies() - 1))) * f_sum
     return fluidity_dict
 
 
-def nb_org_per_fam(pangenome, disable_bar=False):
+def nb_org_per_fam(pangenome, partition='all'):
     """
     Create a dictionary with for each gene families the number of organism
 
     :param pangenome: Pangenome which contain the organisms and gene families
     :type pangenome: Pangenome
-    :param disable_bar: Disable the progress bar
-    :type disable_bar: bool
+    :param partition: Partition of the gene families, the others having no organism
+    :type partition: str
 
-    :return: Dictionary with organisms as key and number of families as value
+    :return: Dictionary with gene families as key and number of organisms as value
     :rtype: dict
     """
-    fam_2_nb_org = dict()
-    for fam in tqdm(pangenome.geneFamilies, unit='gene families', disable=disable_bar):
-        fam_2_nb_org[fam.name] = popcount(fam.bitarray)
-    return fam_2_nb_org
+    nb_org = pangenome.getPresenceMatrix().familyCounts(partition)
+    return {fam.name: int(nb_org[fam.ID]) for fam in pangenome.geneFamilies}
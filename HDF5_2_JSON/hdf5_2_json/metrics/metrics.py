@@ -7,12 +7,12 @@ import tables
 import logging
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.formats.readBinaries import checkPangenomeInfo, readInfo
-from ppanggolin.formats.writeBinaries import writeInfoModules
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.formats.readBinaries import checkPangenomeInfo, readInfo
+from hdf5_2_json.formats.writeBinaries import writeInfoModules
 
 # metrics libraries
-from ppanggolin.metrics.fluidity import genomes_fluidity, fam_fluidity
+from hdf5_2_json.metrics.fluidity import genomes_fluidity, fam_fluidity
 
 
 def check_metric(pangenome, all=False, genome_fluidity=False, family_fluidity=False, info_modules=False, force=False):
@@ -15,13 +15,12 @@ from collections import defaultdict
 # installed libraries
 from tqdm import tqdm
 import networkx as nx
-from gmpy2 import xmpz, popcount  # pylint: disable=no-name-in-module
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.region import Module
-from ppanggolin.formats import checkPangenomeInfo, writePangenome, ErasePangenome
-from ppanggolin.utils import mkOutdir, restricted_float, add_gene, connected_components
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.region import Module
+from hdf5_2_json.formats import checkPangenomeInfo, writePangenome, ErasePangenome
+from hdf5_2_json.utils import mkOutdir, restricted_float, add_gene, connected_components
 
 
 def checkPangenomeFormerModules(pangenome, force):
@@ -76,7 +75,7 @@ def compute_mod_graph(organisms, t=1, disable_bar=False):
     Computes a graph using all provided genomes with a transitive closure of size t
     
     :param organisms: the list of organisms to compute the graph with
-    :type list: list[:class:`ppanggolin.genome.Organism`]
+    :type list: list[:class:`hdf5_2_json.genome.Organism`]
     :param t: the size of the transitive closure
     :type t: int
     :param disable_bar: whether to show a progress bar or not
@@ -104,12 +103,12 @@ def compute_mod_graph(organisms, t=1, disable_bar=False):
 
 def compute_modules(g, multi, weight, min_fam, size):
     """
-    Computes modules using a graph built by :func:`ppanggolin.mod.module.compute_mod_graph` and different parameters
+    Computes modules using a graph built by :func:`hdf5_2_json.mod.module.compute_mod_graph` and different parameters
     defining how restrictive the modules will be.
 
-    :param g: The networkx graph from :func:`ppanggolin.mod.module.compute_mod_graph`
+    :param g: The networkx graph from :func:`hdf5_2_json.mod.module.compute_mod_graph`
     :type g: :class:`networkx.Graph`
-    :param multi: a set of families :class:`ppanggolin.geneFamily.GeneFamily` considered multigenic
+    :param multi: a set of families :class:`hdf5_2_json.geneFamily.GeneFamily` considered multigenic
     :type multi: set
     :param weight: the minimal jaccard under which edges are not considered
     :type weight: float
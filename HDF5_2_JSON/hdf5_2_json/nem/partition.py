@@ -15,13 +15,14 @@ from shutil import copytree
 
 # installed libraries
 from tqdm import tqdm
+import numpy
 import plotly.offline as out_plotly
 import plotly.graph_objs as go
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import mkOutdir
-from ppanggolin.formats import checkPangenomeInfo, writePangenome, ErasePangenome
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import mkOutdir
+from hdf5_2_json.formats import checkPangenomeInfo, writePangenome, ErasePangenome
 
 # cython library (local)
 import nem_stats
@@ -220,21 +221,18 @@ def write_nem_input_files(tmpdir, organisms, sm_degree):
         nei_file.write("1\n")
         index_fam = {}
 
-        index_org = {}
-        default_dat = []
-        for index, org in enumerate(organisms):
-            default_dat.append('0')
-            index_org[org] = index
-        for fam in pan.geneFamilies:
-            # could use bitarrays if this part is limiting?
-            if not organisms.isdisjoint(fam.organisms):
-                currDat = list(default_dat)
-                curr_orgs = fam.organisms & organisms
-                for org in curr_orgs:
-                    currDat[index_org[org]] = "1"
-                dat_file.write("\t".join(currDat) + "\n")
-                index_fam[fam] = len(index_fam) + 1
-                index_file.write(f"{len(index_fam)}\t{fam.name}\n")
+        columns = pan.getGeneColumns()
+        # presence / absence of each family in each organism of the sample, from the columns of the genes
+        sample = numpy.full(len(columns.organisms), -1, dtype=numpy.int32)
+        sample[columns.organismIndices(organisms)] = numpy.arange(len(organisms), dtype=numpy.int32)
+        inSample = (sample[columns.organism] >= 0) & (columns.family >= 0)
+        presence = numpy.zeros((len(columns.families), len(organisms)), dtype=bool)
+        presence[columns.family[inSample], sample[columns.organism[inSample]]] = True
+        for famIndex in numpy.flatnonzero(presence.any(axis=1)).tolist():
+            fam = columns.families[famIndex]
+            dat_file.write("\t".join(numpy.where(presence[famIndex], "1", "0")) + "\n")
+            index_fam[fam] = len(index_fam) + 1
+            index_file.write(f"{len(index_fam)}\t{fam.name}\n")
 
         for fam in index_fam.keys():
             row_fam = []
@@ -365,6 +363,7 @@ def partition(pangenome, tmpdir, outputdir=None, force=False, beta=2.5, sm_degre
                         "You asked to draw the ICL curves but did not provide an output directory!")
     checkPangenomeFormerPartition(pangenome, force)
     checkPangenomeInfo(pangenome, needAnnotations=True, needFamilies=True, needGraph=True, disable_bar=disable_bar)
+    pangenome.getGeneColumns()  # built before the samples are processed in forked processes, which can share it
     organisms = set(pangenome.organisms)
 
     tmpdirObj = tempfile.TemporaryDirectory(dir=tmpdir)
@@ -14,7 +14,6 @@ import warnings
 
 # installed libraries
 from tqdm import tqdm
-import gmpy2
 import numpy
 from pandas import Series, read_csv
 import plotly.offline as out_plotly
@@ -22,12 +21,12 @@ import plotly.graph_objs as go
 import scipy.optimize as optimization
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import mkOutdir
-from ppanggolin.formats import checkPangenomeInfo
-import ppanggolin.nem.partition as ppp
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import mkOutdir
+from hdf5_2_json.formats import checkPangenomeInfo
+import hdf5_2_json.nem.partition as ppp
 
-# import this way to use the global variable pan defined in ppanggolin.nem.partition
+# import this way to use the global variable pan defined in hdf5_2_json.nem.partition
 
 samples = []
 
@@ -299,12 +298,13 @@ def makeRarefactionCurve(pangenome, output, tmpdir, beta=2.5, depth=30, minSampl
     except KeyError:
         krange = [3, 20]
     checkPangenomeInfo(pangenome, needAnnotations=True, needFamilies=True, needGraph=True, disable_bar=disable_bar)
+    pangenome.getGeneColumns()  # built before the samples are processed in forked processes, which can share it
 
     tmpdirObj = tempfile.TemporaryDirectory(dir=tmpdir)
     tmpdir = tmpdirObj.name
 
-    if float(len(pangenome.organisms)) < maxSampling:
-        maxSampling = len(pangenome.organisms)
+    if float(pangenome.number_of_organisms()) < maxSampling:
+        maxSampling = pangenome.number_of_organisms()
     else:
         maxSampling = int(maxSampling)
 
@@ -326,36 +326,24 @@ def makeRarefactionCurve(pangenome, output, tmpdir, beta=2.5, depth=30, minSampl
     logging.getLogger().info(f"Done sampling organisms in the pangenome, there are {len(AllSamples)} samples")
     SampNbPerPart = []
 
-    logging.getLogger().info("Computing bitarrays for each family...")
-    index_org = pangenome.computeFamilyBitarrays()
+    logging.getLogger().info("Computing the presence / absence matrix of the families...")
+    presence = pangenome.getPresenceMatrix()
     logging.getLogger().info(
-        f"Done computing bitarrays. Comparing them to get exact and soft core stats for {len(AllSamples)} samples...")
-    bar = tqdm(range(len(AllSamples) * len(pangenome.geneFamilies)), unit="gene family", disable=disable_bar)
+        f"Done computing the matrix. Getting exact and soft core stats for {len(AllSamples)} samples...")
+    bar = tqdm(range(len(AllSamples) * pangenome.number_of_geneFamilies()), unit="gene family", disable=disable_bar)
     for samp in AllSamples:
-        # make the sample's organism bitarray.
-        sampBitarray = gmpy2.xmpz(0)  # pylint: disable=no-member
-        for org in samp:
-            sampBitarray[index_org[org]] = 1
+        # number of organisms of the sample in which each family is present
+        nbCommonOrg = presence.familyCounts(organisms=samp)
+        exists = nbCommonOrg != 0  # otherwise the node 'does not exist'
+        softCore = nbCommonOrg.astype(float) >= len(samp) * soft_core
 
         part = Counter()
-        part["soft_core"] = 0
-        part["exact_core"] = 0
-        part["exact_accessory"] = 0
-        part["soft_accessory"] = 0
-        for fam in pangenome.geneFamilies:
-            nbCommonOrg = gmpy2.popcount(fam.bitarray & sampBitarray)  # pylint: disable=no-member
-            part["nborgs"] = len(samp)
-            if nbCommonOrg != 0:  # in that case the node 'does not exist'
-                if nbCommonOrg == len(samp):
-                    part["exact_core"] += 1
-                else:
-                    part["exact_accessory"] += 1
-
-                if float(nbCommonOrg) >= len(samp) * soft_core:
-                    part["soft_core"] += 1
-                else:
-                    part["soft_accessory"] += 1
-            bar.update()
+        part["soft_core"] = int((exists & softCore).sum())
+        part["exact_core"] = int((nbCommonOrg == len(samp)).sum())
+        part["exact_accessory"] = int((exists & (nbCommonOrg != len(samp))).sum())
+        part["soft_accessory"] = int((exists & ~softCore).sum())
+        part["nborgs"] = len(samp)
+        bar.update(len(nbCommonOrg))
         SampNbPerPart.append(part)
     bar.close()
     # done with frequency of each family for each sample.
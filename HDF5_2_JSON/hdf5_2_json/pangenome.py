@@ -5,10 +5,11 @@
 from collections.abc import Iterable
 
 # local libraries
-from ppanggolin.genome import Organism
-from ppanggolin.region import Region
-from ppanggolin.geneFamily import GeneFamily
-from ppanggolin.edge import Edge
+from hdf5_2_json.genome import Organism
+from hdf5_2_json.region import Region
+from hdf5_2_json.geneFamily import GeneFamily
+from hdf5_2_json.edge import Edge
+from hdf5_2_json.geneColumns import GeneColumns, PresenceMatrix
 
 
 class Pangenome:
@@ -28,10 +29,19 @@ class Pangenome:
         self._famGetter = {}
         self.max_fam_id = 0
         self._orgGetter = {}
+        # the next dense indices of the organisms, contigs and genes, given when an organism is added
+        self.max_org_id = 0
+        self.max_contig_id = 0
+        self.max_gene_index = 0
+        self._lazyOrgGetter = {}  # organisms of the file that are not loaded yet, with the rows of their genes
+        self._lazyGeneIndex = None  # sampled gene index of the file, to find the organism of the genes not loaded
         self._edgeGetter = {}
         self._regionGetter = {}
         self.spots = set()
         self.modules = set()
+        self._geneColumns = None
+        self._presenceMatrix = None
+        self._views = {}  # cached tuples of the elements of each collection, dropped when the collection changes
 
         self.status = {
             'genomesAnnotated': "No",
@@ -43,46 +53,77 @@ class Pangenome:
             'partitionned': "No",
             'predictedRGP': "No",
             'spots': "No",
-            'modules': 'No'
+            'modules': 'No',
+            'unclusteredGenes': 'No'  # genes of appended genomes that have no gene family yet
         }
         self.parameters = {}
 
     def addFile(self, pangenomeFile):
         """Links an HDF5 file to the pangenome. If needed elements will be loaded from this file,
         and anything that is computed will be saved to this file when
-        :func:`ppanggolin.formats.writeBinaries.writePangenome` is called.
+        :func:`hdf5_2_json.formats.writeBinaries.writePangenome` is called.
 
         :param pangenomeFile: A string representing the filepath to the hdf5 pangenome file to be either used or created
         :type pangenomeFile: str
         """
-        from ppanggolin.formats import \
+        from hdf5_2_json.formats import \
             getStatus  # importing on call instead of importing on top to avoid cross-reference problems.
         getStatus(self, pangenomeFile)
         self.file = pangenomeFile
 
+    def _cachedValues(self, collection, getter):
+        """Returns the values of a getter as a tuple, which is only made on the first access after the collection
+        changed, so that repeated accesses do not copy the collection.
+
+        :param collection: The name of the collection
+        :type collection: str
+        :param getter: The dictionary of the elements of the collection
+        :type getter: dict
+        :return: the elements of the collection
+        :rtype: tuple
+        """
+        view = self._views.get(collection)
+        if view is None:
+            view = tuple(getter.values())
+            self._views[collection] = view
+        return view
+
     """ Gene Methods"""
     @property
     def genes(self):
         """Creates the geneGetter if it does not exist, and returns all the genes of all organisms in the pangenome.
-        
-        :return: list of :class:`ppanggolin.genome.Gene`
-        :rtype: list
+        The returned tuple is shared between the calls, and is only rebuilt when genes were added.
+
+        :return: tuple of :class:`hdf5_2_json.genome.Gene`
+        :rtype: tuple
         """
-        try:
-            return list(self._geneGetter.values())
-        except AttributeError:  # in that case the gene getter has not been computed
+        if len(self._lazyOrgGetter) > 0:
+            self.loadOrganisms()
+        if not hasattr(self, "_geneGetter"):  # in that case the gene getter has not been computed
             self._mkgeneGetter()  # make it
-            return self.genes  # return what was expected
+        return self._cachedValues("genes", self._geneGetter)
+
+    def number_of_genes(self):
+        """Returns the number of genes present in the pangenome, without copying them
+
+        :return: the number of genes
+        :rtype: int
+        """
+        if len(self._lazyOrgGetter) > 0:
+            self.loadOrganisms()
+        if not hasattr(self, "_geneGetter"):
+            self._mkgeneGetter()
+        return len(self._geneGetter)
 
     def _yield_genes(self):
         """
         Use a generator to get all the genes of a pangenome
 
-        :return: an iterator of :class:`ppanggolin.genome.Gene`
-        :rtype: Iterator[:class:`ppanggolin.genome.Gene`]
+        :return: an iterator of :class:`hdf5_2_json.genome.Gene`
+        :rtype: Iterator[:class:`hdf5_2_json.genome.Gene`]
         """
-        if self.number_of_organisms() > 0:  # if we have organisms, they're supposed to have genes
-            for org in self.organisms:
+        if len(self._orgGetter) > 0:  # if we have organisms, they're supposed to have genes
+            for org in self._orgGetter.values():
                 for contig in org.contigs:
                     for gene in contig.genes:
                         yield gene
@@ -94,7 +135,7 @@ class Pangenome:
 
     def _mkgeneGetter(self):
         """
-            Builds the :attr:`ppanggolin.pangenome.Pangenome._geneGetter` of the pangenome
+            Builds the :attr:`hdf5_2_json.pangenome.Pangenome._geneGetter` of the pangenome
 
             Since the genes are never explicitly 'added' to a pangenome (but rather to a gene family, or a contig),
             the pangenome cannot directly extract a gene from a geneID since it does not 'know' them.
@@ -104,6 +145,7 @@ class Pangenome:
         self._geneGetter = {}
         for gene in self._yield_genes():
             self._geneGetter[gene.ID] = gene
+        self._views.pop("genes", None)
 
     def getGene(self, geneID):
         """returns the gene that has the given `geneID`
@@ -111,7 +153,7 @@ class Pangenome:
         :param geneID: The gene ID to look for
         :type geneID: any
         :return: returns the gene that has the ID `geneID`
-        :rtype: :class:`ppanggolin.genome.Gene`
+        :rtype: :class:`hdf5_2_json.genome.Gene`
         :raises KeyError: If the `geneID` is not in the pangenome
         """
         try:
@@ -122,17 +164,55 @@ class Pangenome:
             return self.getGene(
                 geneID)  # return what was expected. If the geneID does not exist it will raise an error.
         except KeyError:
+            if len(self._lazyOrgGetter) > 0:
+                from hdf5_2_json.formats import getGeneOrganism, readGeneIndex
+                if self._lazyGeneIndex is None:  # read once for all of the genes that are looked for
+                    self._lazyGeneIndex = readGeneIndex(self)
+                orgName = getGeneOrganism(self, geneID, self._lazyGeneIndex)
+                if orgName in self._lazyOrgGetter:
+                    self.loadOrganisms([orgName])
+                    return self._geneGetter[geneID]
             raise KeyError(f"{geneID} does not exist in the pangenome.")
 
+    def getGeneColumns(self):
+        """Returns the columnar store of the genes of the pangenome, and builds it if it does not exist.
+
+        The store is a copy of the attributes of the genes, so it should be built once the pangenome has been filled
+        with its organisms and gene families. It is dropped when an organism or a gene family is added, and rebuilt when
+        genes were added to gene families since it was built.
+
+        :return: the genes of the pangenome as arrays
+        :rtype: :class:`hdf5_2_json.geneColumns.GeneColumns`
+        """
+        if self._geneColumns is None or self._geneColumns.membershipVersion != GeneFamily.membershipVersion:
+            self._geneColumns = GeneColumns(self)
+        return self._geneColumns
+
+    def getPresenceMatrix(self):
+        """Returns the presence / absence matrix of the gene families in the organisms, and builds it if it does not
+        exist or if the columns of the genes it was built from were dropped.
+
+        The partitions of the families are read when the matrix is used, so it does not need to be rebuilt once they
+        are computed.
+
+        :return: the families × organisms matrix
+        :rtype: :class:`hdf5_2_json.geneColumns.PresenceMatrix`
+        """
+        columns = self.getGeneColumns()
+        if self._presenceMatrix is None or self._presenceMatrix.columns is not columns:
+            self._presenceMatrix = PresenceMatrix(columns)
+        return self._presenceMatrix
+
     """Gene families methods"""
     @property
     def geneFamilies(self):
-        """returns all the gene families in the pangenome
-        
-        :return: list of :class:`ppanggolin.geneFamily.GeneFamily`
-        :rtype: list
+        """returns all the gene families in the pangenome. The returned tuple is shared between the calls,
+        and is only rebuilt when gene families were added.
+
+        :return: tuple of :class:`hdf5_2_json.geneFamily.GeneFamily`
+        :rtype: tuple
         """
-        return list(self._famGetter.values())
+        return self._cachedValues("geneFamilies", self._famGetter)
 
     def _createGeneFamily(self, name):
         """Creates a gene family object with the given `name`
@@ -140,11 +220,13 @@ class Pangenome:
         :param name: the name to give to the gene family. Must not exist already.
         :type name: any
         :return: the created GeneFamily object
-        :rtype: :class:`ppanggolin.geneFamily.GeneFamily`
+        :rtype: :class:`hdf5_2_json.geneFamily.GeneFamily`
         """
         newFam = GeneFamily(ID=self.max_fam_id, name=name)
         self.max_fam_id += 1
         self._famGetter[newFam.name] = newFam
+        self._views.pop("geneFamilies", None)
+        self._geneColumns = None
         return newFam
 
     def number_of_geneFamilies(self):
@@ -161,13 +243,13 @@ class Pangenome:
         :param name: The gene family name to look for
         :type name: any
         :return: returns the gene family that has the name `name`
-        :rtype: :class:`ppanggolin.geneFamily.GeneFamily`
+        :rtype: :class:`hdf5_2_json.geneFamily.GeneFamily`
         """
         return self._famGetter[name]
 
     def addGeneFamily(self, name):
         """
-            Get the :class:`ppanggolin.geneFamily.GeneFamily` object that has the given `name`. If it does not exist,
+            Get the :class:`hdf5_2_json.geneFamily.GeneFamily` object that has the given `name`. If it does not exist,
             creates it.
             returns the geneFamily object.
 
@@ -182,12 +264,21 @@ class Pangenome:
     """Graph methods"""
     @property
     def edges(self):
-        """returns all the edges in the pangenome graph
-        
-        :return: list of :class:`ppanggolin.pangenome.Edge`
-        :rtype: list
+        """returns all the edges in the pangenome graph. The returned tuple is shared between the calls,
+        and is only rebuilt when edges were added.
+
+        :return: tuple of :class:`hdf5_2_json.pangenome.Edge`
+        :rtype: tuple
         """
-        return list(self._edgeGetter.values())
+        return self._cachedValues("edges", self._edgeGetter)
+
+    def number_of_edges(self):
+        """Returns the number of edges present in the pangenome graph
+
+        :return: the number of edges
+        :rtype: int
+        """
+        return len(self._edgeGetter)
 
     def addEdge(self, gene1, gene2):
         """
@@ -195,17 +286,18 @@ class Pangenome:
         and they are also expected to have a family assigned
 
         :param gene1: The first gene
-        :type gene1: :class:`ppanggolin.genome.Gene`
+        :type gene1: :class:`hdf5_2_json.genome.Gene`
         :param gene2: The second gene
-        :type gene2: :class:`ppanggolin.genome.Gene`
+        :type gene2: :class:`hdf5_2_json.genome.Gene`
         :return: the created Edge
-        :rtype: :class:`ppanggolin.pangenome.Edge`
+        :rtype: :class:`hdf5_2_json.pangenome.Edge`
         """
         key = frozenset([gene1.family, gene2.family])
         edge = self._edgeGetter.get(key)
         if edge is None:
             edge = Edge(gene1, gene2)
             self._edgeGetter[key] = edge
+            self._views.pop("edges", None)
         else:
             edge.addGenes(gene1, gene2)
         return edge
@@ -213,49 +305,93 @@ class Pangenome:
     """Organism methods"""
     @property
     def organisms(self):
-        """returns all the organisms in the pangenome
-        
-        :return: list of :class:`ppanggolin.genome.Organism`
-        :rtype: list
+        """returns all the organisms in the pangenome. The returned tuple is shared between the calls,
+        and is only rebuilt when organisms were added.
+
+        :return: tuple of :class:`hdf5_2_json.genome.Organism`
+        :rtype: tuple
         """
-        return list(self._orgGetter.values())
+        if len(self._lazyOrgGetter) > 0:
+            self.loadOrganisms()
+        return self._cachedValues("organisms", self._orgGetter)
 
     def number_of_organisms(self):
-        """Returns the number of organisms present in the pangenome
+        """Returns the number of organisms present in the pangenome, loaded or not
         
         :return: the number of organism
         :rtype: int
         """
-        return len(self._orgGetter)
+        return len(self._orgGetter) + len(self._lazyOrgGetter)
+
+    def number_of_lazy_organisms(self):
+        """Returns the number of organisms of the pangenome file that have not been loaded yet
+
+        :return: the number of organisms that are not loaded
+        :rtype: int
+        """
+        return len(self._lazyOrgGetter)
+
+    def setLazyOrganisms(self, orgIndex):
+        """Registers organisms that are in the pangenome file, to load them only when they are accessed.
+
+        :param orgIndex: The row ranges of the genes of each organism in the annotation table
+        :type orgIndex: dict[str, list[list[int]]]
+        """
+        self._lazyOrgGetter.update(orgIndex)
+
+    def loadOrganisms(self, orgNames=None):
+        """Loads organisms that were left in the pangenome file by a lazy read.
+
+        :param orgNames: The names of the organisms to load. All of those that are not loaded yet if None.
+        :type orgNames: list[str]
+        """
+        from hdf5_2_json.formats import readLazyOrganisms
+        if orgNames is None:
+            orgNames = list(self._lazyOrgGetter)
+        orgIndex = {orgName: self._lazyOrgGetter.pop(orgName) for orgName in orgNames}
+        readLazyOrganisms(self, orgIndex)
+        if len(self._lazyOrgGetter) == 0:
+            self._lazyGeneIndex = None
+        self._views.pop("organisms", None)
+        self._geneColumns = None
+        if hasattr(self, "_geneGetter"):  # the genes of the new organisms are added to the existing getter
+            for orgName in orgIndex:
+                for contig in self._orgGetter[orgName].contigs:
+                    for gene in contig.genes:
+                        self._geneGetter[gene.ID] = gene
+            self._views.pop("genes", None)
 
     def getOrganism(self, orgName):
         """
         Get an organism that is expected to be in the pangenome using its name, which is supposedly unique.
         Raises an error if the organism does not exist.
 
-        :param orgName: Name of the :class:`ppanggolin.genome.Organism` to get
+        :param orgName: Name of the :class:`hdf5_2_json.genome.Organism` to get
         :type orgName: str
         :return: The related Organism object
-        :rtype: :class:`ppanggolin.genome.Organism`
+        :rtype: :class:`hdf5_2_json.genome.Organism`
         :raises KeyError: If the provided name is not in the pangenome
         """
         try:
             return self._orgGetter[orgName]
         except KeyError:
+            if orgName in self._lazyOrgGetter:
+                self.loadOrganisms([orgName])
+                return self._orgGetter[orgName]
             raise KeyError(f"{orgName} does not seem to be in your pangenome")
 
     def addOrganism(self, newOrg):
         """
-        adds an organism that did not exist previously in the pangenome if an :class:`ppanggolin.genome.Organism`
+        adds an organism that did not exist previously in the pangenome if an :class:`hdf5_2_json.genome.Organism`
         object is provided. If an organism with the same name exists it will raise an error.
         If a :class:`str` object is provided, will return the corresponding organism that has this name
         OR create a new one if it does not exist.
 
         :param newOrg: Organism to add to the pangenome
-        :type newOrg: :class:`ppanggolin.genome.Organism` or str
+        :type newOrg: :class:`hdf5_2_json.genome.Organism` or str
         :return: The created organism
-        :rtype: :class:`ppanggolin.genome.Organism`
-        :raises TypeError: if the provided `newOrg` is neither a str nor a :class:`ppanggolin.genome.Organism`
+        :rtype: :class:`hdf5_2_json.genome.Organism`
+        :raises TypeError: if the provided `newOrg` is neither a str nor a :class:`hdf5_2_json.genome.Organism`
         """
         if isinstance(newOrg, Organism):
             oldLen = len(self._orgGetter)
@@ -263,85 +399,81 @@ class Pangenome:
             if len(self._orgGetter) == oldLen:
                 raise KeyError(
                     f"Redondant organism name was found ({newOrg.name}). All of your organisms must have unique names.")
+            self._indexOrganism(newOrg)
+            self._views.pop("organisms", None)
+            self._geneColumns = None
         elif isinstance(newOrg, str):
+            if newOrg in self._lazyOrgGetter:
+                self.loadOrganisms([newOrg])
             org = self._orgGetter.get(newOrg)
             if org is None:
                 org = Organism(newOrg)
                 self._orgGetter[org.name] = org
+                self._indexOrganism(org)
+                self._views.pop("organisms", None)
+                self._geneColumns = None
             newOrg = org
         else:
             raise TypeError("Provide an Organism object or a str that will serve as organism name")
         return newOrg
 
-    def getIndex(self):  # will not make a new index if it exists already
-        """Creates an index for Organisms (each organism is assigned an Integer).
-
-        :return: A dictionary with :class:`ppanggolin.genome.Organism` as key and `int` as value.
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        if not hasattr(self, "_orgIndex"):  # then the index does not exist yet
-            self._orgIndex = {}
-            for index, org in enumerate(self.organisms):
-                self._orgIndex[org] = index
-        return self._orgIndex
-
-    def computeFamilyBitarrays(self, part='all'):
-        """Based on the index generated by :meth:`ppanggolin.pangenome.Pangenome.getIndex`, generated a bitarray
-        for each gene family.
-        If the family j is present in the organism with the index i, the bit at position i will be 1. If it is not,
-        the bit will be 0.
-        The bitarrays are gmpy2.xmpz object.
-
-        :return: A dictionnary with :class:`ppanggolin.genome.Organism` as key and `int` as value.
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        if not hasattr(self, "_orgIndex"):
-            # then the bitarrays don't exist yet, since the org index does not exist either.
-            self.getIndex()
-        for fam in self.geneFamilies:
-            fam.mkBitarray(self._orgIndex, partition=part)
-        # case where there is an index but the bitarrays have not been computed???
-        return self._orgIndex
-
-    def get_fam_index(self):  # will not make a new index if it exists already
-        """Creates an index for gene families (each family is assigned an Integer).
-
-        :return: A dictionary with :class:`ppanggolin.genome.Organism` as key and `int` as value.
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        if not hasattr(self, "_fam_index"):  # then the index does not exist yet
-            self._fam_index = {}
-            for index, fam in enumerate(self.geneFamilies):
-                self._fam_index[fam] = index
-        return self._fam_index
-
-    def compute_org_bitarrays(self, part='all'):
-        """Based on the index generated by :meth:`ppanggolin.pangenome.Pangenome.get_fam_index`, generated a bitarray
-        for each gene family.
-        If the family j is present in the organism with the index i, the bit at position i will be 1. If it is not,
-        the bit will be 0.
-        The bitarrays are gmpy2.xmpz object.
-
-        :return: A dictionary with :class:`ppanggolin.genome.Organism` as key and `int` as value.
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        if not hasattr(self, "_fam_index"):
-            # then the bitarrays don't exist yet, since the org index does not exist either.
-            self.get_fam_index()
-        for org in self.organisms:
-            org.mk_bitarray(index=self._fam_index, partition=part)
-        # case where there is an index but the bitarrays have not been computed???
-        return self._fam_index
+    def _indexOrganism(self, org):
+        """Gives the organism, its contigs and their genes the next dense indices of the pangenome. The index of a gene
+        is the index of the first gene of its contig plus its position. The indices that were read from the pangenome
+        file are kept.
+
+        Organisms are expected to be added once their contigs and genes are filled, as the readers do.
+
+        :param org: The organism that is added to the pangenome
+        :type org: :class:`hdf5_2_json.genome.Organism`
+        """
+        if org.ID is None:
+            org.ID = self.max_org_id
+        self.max_org_id = max(self.max_org_id, org.ID + 1)
+        for contig in org.contigs:
+            if contig.ID is None:
+                contig.ID = self.max_contig_id
+            self.max_contig_id = max(self.max_contig_id, contig.ID + 1)
+            firstGene = self.max_gene_index
+            for gene in contig.genes:
+                if gene is not None:
+                    if gene.index is None:
+                        gene.index = firstGene + gene.position
+                    self.max_gene_index = max(self.max_gene_index, gene.index + 1)
+
+    def reserveIndices(self, organisms, contigs, genes):
+        """Reserves dense indices for the organisms of the pangenome file that are not loaded, so that those given to
+        new organisms do not overlap theirs.
+
+        :param organisms: The number of organism indices of the file
+        :type organisms: int
+        :param contigs: The number of contig indices of the file
+        :type contigs: int
+        :param genes: The number of gene indices of the file
+        :type genes: int
+        """
+        self.max_org_id = max(self.max_org_id, organisms)
+        self.max_contig_id = max(self.max_contig_id, contigs)
+        self.max_gene_index = max(self.max_gene_index, genes)
 
     """RGP methods"""
     @property
     def regions(self):
-        """returns all the regions (RGP) in the pangenome
+        """returns all the regions (RGP) in the pangenome. The returned tuple is shared between the calls,
+        and is only rebuilt when regions were added.
 
-        :return: list of :class:`ppanggolin.region.Region`
-        :rtype: list
+        :return: tuple of :class:`hdf5_2_json.region.Region`
+        :rtype: tuple
+        """
+        return self._cachedValues("regions", self._regionGetter)
+
+    def number_of_regions(self):
+        """Returns the number of regions (RGP) present in the pangenome
+
+        :return: the number of regions
+        :rtype: int
         """
-        return list(self._regionGetter.values())
+        return len(self._regionGetter)
 
     def getOrAddRegion(self, regionName):
         """Returns a region with the given `regionName`. Creates it if it does not exist.
@@ -349,13 +481,14 @@ class Pangenome:
         :param regionName: The name of the region to return
         :type regionName: str
         :return: The region
-        :rtype: :class:`ppanggolin.region.Region`
+        :rtype: :class:`hdf5_2_json.region.Region`
         """
         try:
             return self._regionGetter[regionName]
         except KeyError:  # then the region is not stored in this pangenome.
             newRegion = Region(regionName)
             self._regionGetter[regionName] = newRegion
+            self._views.pop("regions", None)
             return newRegion
 
     def get_multigenics(self, dup_margin, persistent=True):
@@ -368,7 +501,7 @@ class Pangenome:
         :param persistent: if we consider only the persistent genes
         :type persistent: bool
         :return: a `set` of gene families considered multigenic
-        :rtype: set[:class:`ppanggolin.geneFamily.GeneFamily`]
+        :rtype: set[:class:`hdf5_2_json.geneFamily.GeneFamily`]
         """
         multigenics = set()
         for fam in self.geneFamilies:
@@ -385,10 +518,11 @@ class Pangenome:
         """Takes an Iterable or a Region object and adds it to the pangenome
 
         :param regionGroup: a region or an Iterable of regions to add to the pangenome
-        :type regionGroup: :class:`ppanggolin.region.Region` or Iterable[:class:`ppanggolin.region.Region`]
-        :raises TypeError: if regionGroup is neither a Region nor a Iterable[:class:`ppanggolin.region.Region`]
+        :type regionGroup: :class:`hdf5_2_json.region.Region` or Iterable[:class:`hdf5_2_json.region.Region`]
+        :raises TypeError: if regionGroup is neither a Region nor a Iterable[:class:`hdf5_2_json.region.Region`]
         """
         oldLen = len(self._regionGetter)
+        self._views.pop("regions", None)
         if isinstance(regionGroup, Iterable):
             for region in regionGroup:
                 self._regionGetter[region.name] = region
@@ -404,34 +538,32 @@ class Pangenome:
     def addSpots(self, spots):
         """Adds the given iterable of spots to the pangenome.
 
-        :param spots: An iterable of :class:`ppanggolin.region.Spot`.
-        :type spots: Iterable[:class:`ppanggolin.region.Spot`]
+        :param spots: An iterable of :class:`hdf5_2_json.region.Spot`.
+        :type spots: Iterable[:class:`hdf5_2_json.region.Spot`]
         """
         self.spots |= set(spots)
 
+    def number_of_spots(self):
+        """Returns the number of spots present in the pangenome
+
+        :return: the number of spots
+        :rtype: int
+        """
+        return len(self.spots)
+
     """Modules methods"""
     def addModules(self, modules):
         """Adds the given iterable of modules to the pangenome
 
-        :param modules: an iterable of :class:`ppanggolin.module.Module`
-        :type modules: Iterable[:class:`ppanggolin.module.Module`]
+        :param modules: an iterable of :class:`hdf5_2_json.module.Module`
+        :type modules: Iterable[:class:`hdf5_2_json.module.Module`]
         """
         self.modules |= set(modules)
 
-    def compute_mod_bitarrays(self, part='all'):
-        """Based on the index generated by :meth:`ppanggolin.pangenome.Pangenome.get_fam_index`, generated a bitarray
-        for each gene family.
-        If the family j is present in the module with the index i, the bit at position i will be 1. If it is not,
-        the bit will be 0.
-        The bitarrays are gmpy2.xmpz object.
-
-        :return: A dictionary with :class:`ppanggolin.genome.Organism` as key and `int` as value.
-        :rtype: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        if not hasattr(self, "_fam_index"):
-            # then the bitarrays don't exist yet, since the org index does not exist either.
-            self.get_fam_index()
-        for module in self.modules:
-            module.mk_bitarray(index=self._fam_index, partition=part)
-        # case where there is an index but the bitarrays have not been computed???
-        return self._fam_index
+    def number_of_modules(self):
+        """Returns the number of modules present in the pangenome
+
+        :return: the number of modules
+        :rtype: int
+        """
+        return len(self.modules)
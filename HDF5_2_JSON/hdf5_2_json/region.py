@@ -2,15 +2,11 @@
 # coding: utf8
 
 # default libraries
-import logging
 from collections.abc import Iterable
 
-# installed libraries
-import gmpy2
-
 # local libraries
-from ppanggolin.genome import Organism, Gene
-from ppanggolin.geneFamily import GeneFamily
+from hdf5_2_json.genome import Organism, Gene
+from hdf5_2_json.geneFamily import GeneFamily
 
 
 class Region:
@@ -281,32 +277,3 @@ class Module:
             raise Exception("You did not provide a GenFamily object. Modules are only made of GeneFamily")
         family.modules.add(self)
         self.families.add(family)
-
-    def mk_bitarray(self, index, partition='all'):
-        """Produces a bitarray representing the presence / absence of families in the organism using the provided index
-        The bitarray is stored in the :attr:`bitarray` attribute and is a :class:`gmpy2.xmpz` type.
-        :param index: The index computed by :func:`ppanggolin.pangenome.Pangenome.getIndex`
-        :type index: dict[:class:`ppanggolin.genome.Organism`, int]
-        """
-        self.bitarray = gmpy2.xmpz()  # pylint: disable=no-member
-        if partition == 'all':
-            logging.getLogger().debug(f"all")
-            for fam in self.families:
-                self.bitarray[index[fam]] = 1
-        elif partition == 'persistent':
-            logging.getLogger().debug(f"persistent")
-            for fam in self.families:
-                if fam.namedPartition in ['persistent']:
-                    self.bitarray[index[fam]] = 1
-        elif partition in ['shell', 'cloud']:
-            logging.getLogger().debug(f"shell, cloud")
-            for fam in self.families:
-                if fam.namedPartition == partition:
-                    self.bitarray[index[fam]] = 1
-        elif partition == 'accessory':
-            logging.getLogger().debug(f"accessory")
-            for fam in self.families:
-                if fam.namedPartition in ['shell', 'cloud']:
-                    self.bitarray[index[fam]] = 1
-        else:
-            raise Exception("There is not any partition corresponding please report a github issue")
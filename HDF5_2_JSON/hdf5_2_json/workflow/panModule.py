@@ -8,17 +8,17 @@ import argparse
 import logging
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import mkFilename, check_option_workflow
-from ppanggolin.annotate import annotatePangenome, readAnnotations, getGeneSequencesFromFastas
-from ppanggolin.cluster import clustering, readClustering
-from ppanggolin.graph import computeNeighborsGraph
-from ppanggolin.nem.rarefaction import makeRarefactionCurve
-from ppanggolin.nem.partition import partition
-from ppanggolin.formats import writePangenome, writeFlatFiles
-from ppanggolin.figures import drawTilePlot, drawUCurve
-from ppanggolin.info import printInfo
-from ppanggolin.mod import predictModules
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import mkFilename, check_option_workflow
+from hdf5_2_json.annotate import annotatePangenome, readAnnotations, getGeneSequencesFromFastas
+from hdf5_2_json.cluster import clustering, readClustering
+from hdf5_2_json.graph import computeNeighborsGraph
+from hdf5_2_json.nem.rarefaction import makeRarefactionCurve
+from hdf5_2_json.nem.partition import partition
+from hdf5_2_json.formats import writePangenome, writeFlatFiles, addCompressionArgs, setCompression
+from hdf5_2_json.figures import drawTilePlot, drawUCurve
+from hdf5_2_json.info import printInfo
+from hdf5_2_json.mod import predictModules
 
 
 """a global workflow that does everything in one go."""
@@ -27,6 +27,7 @@ from ppanggolin.mod import predictModules
 def launch(args):
     check_option_workflow(args)
     pangenome = Pangenome()
+    setCompression(pangenome, args.compression, args.table_compression)
     filename = mkFilename(args.basename, args.output, args.force)
     writing_time, anno_time, clust_time, mod_time, desc_time = (None, None, None, None, None)
     if args.anno:  # if the annotations are provided, we read from it
@@ -84,8 +85,8 @@ def launch(args):
 
     if args.rarefaction:
         makeRarefactionCurve(pangenome, args.output, args.tmpdir, cpu=args.cpu, disable_bar=args.disable_prog_bar)
-    if 1 < len(pangenome.organisms) < 5000:
-        drawTilePlot(pangenome, args.output, nocloud=False if len(pangenome.organisms) < 500 else True)
+    if 1 < pangenome.number_of_organisms() < 5000:
+        drawTilePlot(pangenome, args.output, nocloud=False if pangenome.number_of_organisms() < 500 else True)
     drawUCurve(pangenome, args.output)
 
     start_desc = time.time()
@@ -136,4 +137,5 @@ def panModuleSubparser(subparser):
     optional.add_argument("--no_defrag", required=False, action="store_true",
                           help="DO NOT Realign gene families to link fragments with their non-fragmented gene family.")
 
+    addCompressionArgs(optional)
     return parser
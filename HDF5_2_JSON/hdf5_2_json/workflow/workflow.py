@@ -7,16 +7,16 @@ import time
 import argparse
 
 # local libraries
-from ppanggolin.pangenome import Pangenome
-from ppanggolin.utils import mkFilename, min_one, check_option_workflow, restricted_float
-from ppanggolin.annotate import annotatePangenome, readAnnotations, getGeneSequencesFromFastas
-from ppanggolin.cluster import clustering, readClustering
-from ppanggolin.graph import computeNeighborsGraph
-from ppanggolin.nem.rarefaction import makeRarefactionCurve
-from ppanggolin.nem.partition import partition
-from ppanggolin.formats import writePangenome, writeFlatFiles
-from ppanggolin.figures import drawTilePlot, drawUCurve
-from ppanggolin.info import printInfo
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.utils import mkFilename, min_one, check_option_workflow, restricted_float
+from hdf5_2_json.annotate import annotatePangenome, readAnnotations, getGeneSequencesFromFastas
+from hdf5_2_json.cluster import clustering, readClustering
+from hdf5_2_json.graph import computeNeighborsGraph
+from hdf5_2_json.nem.rarefaction import makeRarefactionCurve
+from hdf5_2_json.nem.partition import partition
+from hdf5_2_json.formats import writePangenome, writeFlatFiles, addCompressionArgs, setCompression
+from hdf5_2_json.figures import drawTilePlot, drawUCurve
+from hdf5_2_json.info import printInfo
 
 
 """ a global workflow that does everything in one go. """
@@ -25,6 +25,7 @@ from ppanggolin.info import printInfo
 def launch(args):
     check_option_workflow(args)
     pangenome = Pangenome()
+    setCompression(pangenome, args.compression, args.table_compression)
     filename = mkFilename(args.basename, args.output, args.force)
     if args.anno:  # if the annotations are provided, we read from it
         readAnnotations(pangenome, args.anno, cpu=args.cpu, disable_bar=args.disable_prog_bar)
@@ -45,6 +46,7 @@ def launch(args):
                        mode=args.mode, defrag=not args.no_defrag, disable_bar=args.disable_prog_bar)
     elif args.fasta is not None:
         pangenome = Pangenome()
+        setCompression(pangenome, args.compression, args.table_compression)
         annotatePangenome(pangenome, args.fasta, args.tmpdir, args.cpu, contig_filter=args.contig_filter,
                           disable_bar=args.disable_prog_bar)
         writePangenome(pangenome, filename, args.force, disable_bar=args.disable_prog_bar)
@@ -58,8 +60,8 @@ def launch(args):
 
     if args.rarefaction:
         makeRarefactionCurve(pangenome, args.output, args.tmpdir, cpu=args.cpu, disable_bar=args.disable_prog_bar)
-    if 1 < len(pangenome.organisms) < 5000:
-        drawTilePlot(pangenome, args.output, nocloud=False if len(pangenome.organisms) < 500 else True)
+    if 1 < pangenome.number_of_organisms() < 5000:
+        drawTilePlot(pangenome, args.output, nocloud=False if pangenome.number_of_organisms() < 500 else True)
     drawUCurve(pangenome, args.output)
 
     writeFlatFiles(pangenome, args.output, args.cpu, csv=True, genePA=True, gexf=True, light_gexf=True, projection=True,
@@ -109,4 +111,5 @@ def workflowSubparser(subparser):
     optional.add_argument("--no_defrag", required=False, action="store_true",
                           help="DO NOT Realign gene families to link fragments with their non-fragmented gene family.")
     optional.add_argument("--contig_filter", required=False, default=1, type=min_one, help=argparse.SUPPRESS)
+    addCompressionArgs(optional)
     return parser
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# installed libraries
+import pytest
+
+# the pangenome modules are imported by the helpers, so that the test modules needing numpy and tables are skipped
+# rather than failing to collect when they are not installed
+
+# raw partition of the families of each position of the genes, as given by NEM
+PARTITIONS = ["P", "S1", "C1", "S2"]
+
+
+def makeOrganism(name, nbContigs=2, nbGenes=4):
+    """
+        Builds an organism with nbContigs contigs of nbGenes genes each, the first contig being circular, and a tRNA
+        after the genes of each contig.
+    """
+    from hdf5_2_json.genome import Organism, Gene, RNA
+    org = Organism(name)
+    for contigIndex in range(nbContigs):
+        contig = org.getOrAddContig(f"{name}_contig{contigIndex}", is_circular=contigIndex == 0)
+        for position in range(nbGenes):
+            gene = Gene(f"{name}_{contigIndex}_{position}")
+            gene.fill_annotations(start=position * 100 + 1, stop=position * 100 + 90,
+                                  strand="+" if position % 2 == 0 else "-", geneType="CDS", position=position,
+                                  genetic_code=11, name=f"gene{position % 3}", product=f"product {position % 2}",
+                                  local_identifier="")
+            gene.fill_parents(org, contig)
+            contig.addGene(gene)
+        rna = RNA(f"{name}_{contigIndex}_tRNA")
+        rna.fill_annotations(start=nbGenes * 100 + 1, stop=nbGenes * 100 + 80, strand="+", geneType="tRNA",
+                             name="trnA", product="tRNA-Ala")
+        rna.fill_parents(org, contig)
+        contig.addRNA(rna)
+    return org
+
+
+def makePangenome(orgNames=("orgA", "orgB", "orgC"), families=True, graph=True):
+    """
+        Builds a pangenome of the given organisms. The genes of each position are in the same family, except the last
+        gene of each organism which has a family of its own, and the families are linked by the neighbors graph.
+    """
+    from hdf5_2_json.pangenome import Pangenome
+    pangenome = Pangenome()
+    for name in orgNames:
+        pangenome.addOrganism(makeOrganism(name))
+    pangenome.status["genomesAnnotated"] = "Computed"
+    if families:
+        for org in pangenome.organisms:
+            for contig in org.contigs:
+                for gene in contig.genes:
+                    famName = f"fam{gene.position}"
+                    if gene.position == len(contig.genes) - 1 and contig.name.endswith("contig1"):
+                        famName = f"fam_{org.name}"
+                    fam = pangenome.addGeneFamily(famName)
+                    fam.addPartition(PARTITIONS[gene.position])
+                    fam.addGene(gene)
+        pangenome.status["genesClustered"] = "Computed"
+        pangenome.status["partitionned"] = "Computed"
+    if graph:
+        for org in pangenome.organisms:
+            for contig in org.contigs:
+                for prev, gene in zip(contig.genes[:-1], contig.genes[1:]):
+                    pangenome.addEdge(gene, prev)
+        pangenome.status["neighborsGraph"] = "Computed"
+    return pangenome
+
+
+def readFile(filename, **parts):
+    """
+        Reads the given parts of a pangenome file in a new pangenome.
+    """
+    from hdf5_2_json.pangenome import Pangenome
+    from hdf5_2_json.formats import readPangenome
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    readPangenome(pangenome, disable_bar=True, **parts)
+    return pangenome
+
+
+@pytest.fixture
+def pangenomeFile(tmp_path):
+    """
+        Writes a pangenome built by :func:`makePangenome` in a temporary file, and returns the file and the pangenome.
+    """
+    def write(**kwargs):
+        from hdf5_2_json.formats import writePangenome
+        pangenome = makePangenome(**kwargs)
+        filename = str(tmp_path / "pangenome.h5")
+        writePangenome(pangenome, filename, force=False, disable_bar=True)
+        return filename, pangenome
+    return write
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# installed libraries
+import pytest
+
+pytest.importorskip("numpy")
+tables = pytest.importorskip("tables")
+
+# local libraries
+from hdf5_2_json.formats import appendPangenome, appendClusters, checkPangenomeInfo, getGeneOrganism
+from hdf5_2_json.pangenome import Pangenome
+from conftest import makePangenome, readFile
+from test_tables import familyGenes, featureAnnotations
+
+
+def appendOrganisms(filename, orgNames, families=False):
+    """
+        Appends the organisms to the pangenome file, as 'annotate --append' does.
+    """
+    pangenome = makePangenome(orgNames=orgNames, families=families, graph=False)
+    pangenome.addFile(filename)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    if families:
+        pangenome.status["genesClustered"] = "Computed"
+    appendPangenome(pangenome, disable_bar=True)
+    return pangenome
+
+
+def test_append_annotations(pangenomeFile):
+    filename, written = pangenomeFile(orgNames=("orgA", "orgB"), families=False, graph=False)
+    appended = appendOrganisms(filename, ("orgC", "orgD"))
+    pangenome = readFile(filename, annotation=True)
+    assert sorted(org.name for org in pangenome.organisms) == ["orgA", "orgB", "orgC", "orgD"]
+    assert featureAnnotations(pangenome) == {**featureAnnotations(written), **featureAnnotations(appended)}
+    # the dense indices of the appended genomes follow those of the file
+    assert sorted(org.ID for org in pangenome.organisms) == list(range(4))
+    assert sorted(gene.index for gene in pangenome.genes) == list(range(pangenome.number_of_genes()))
+    # the gene index of the file is rebuilt with the new genes
+    assert all(getGeneOrganism(pangenome, gene.ID) == gene.organism.name for gene in appended.genes)
+    h5f = tables.open_file(filename, "r")
+    assert h5f.root.info._v_attrs.numberOfOrganisms == 4
+    assert h5f.root.info._v_attrs.numberOfGenes == pangenome.number_of_genes()
+    h5f.close()
+
+
+def test_append_gene_families(pangenomeFile):
+    filename, written = pangenomeFile(orgNames=("orgA", "orgB"), graph=False)
+    appended = appendOrganisms(filename, ("orgD",), families=True)
+    pangenome = readFile(filename, annotation=True, geneFamilies=True)
+    expected = familyGenes(written)
+    for name, genes in familyGenes(appended).items():
+        expected[name] = sorted(expected.get(name, []) + genes)
+    assert familyGenes(pangenome) == expected
+    assert pangenome.status["partitionned"] == "No"  # the partitions were computed without the new genomes
+
+
+def test_append_existing_organism(pangenomeFile):
+    filename, _ = pangenomeFile(orgNames=("orgA", "orgB"), families=False, graph=False)
+    with pytest.raises(KeyError):
+        appendOrganisms(filename, ("orgB",))
+    assert sorted(org.name for org in readFile(filename, annotation=True).organisms) == ["orgA", "orgB"]
+
+
+
+def test_append_keeps_gene_families(pangenomeFile):
+    filename, written = pangenomeFile(orgNames=("orgA", "orgB"))
+    appendOrganisms(filename, ("orgD",))
+    pangenome = readFile(filename, annotation=True, geneFamilies=True)
+    assert familyGenes(pangenome) == familyGenes(written)
+    assert pangenome.status["unclusteredGenes"] == "inFile"
+    assert pangenome.status["neighborsGraph"] == "No"
+    assert pangenome.status["partitionned"] == "No"
+    # the gene families cannot be used until the new genes have one
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    with pytest.raises(Exception, match="--append"):
+        checkPangenomeInfo(pangenome, needFamilies=True, disable_bar=True)
+
+
+def test_cluster_append(pangenomeFile, tmp_path):
+    pytest.importorskip("networkx")
+    from hdf5_2_json.cluster.cluster import readClustering
+    filename, written = pangenomeFile(orgNames=("orgA", "orgB"))
+    appended = appendOrganisms(filename, ("orgD",))
+    clusters = tmp_path / "clusters.tsv"
+    expected = familyGenes(written)
+    with open(clusters, "w") as clusterFile:
+        for gene in appended.genes:
+            # the genes of the first contig join the families of the file, the others are in new families
+            family = f"fam{gene.position}" if gene.contig.name.endswith("contig0") else f"new{gene.position}"
+            clusterFile.write(f"{family}\t{gene.ID}\n")
+            expected[family] = sorted(expected.get(family, []) + [gene.ID])
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    # as written by 'annotate', the genes have generated identifiers
+    pangenome.parameters["annotation"] = {"read_annotations_from_file": False, "used_local_identifiers": False}
+    readClustering(pangenome, str(clusters), append=True, disable_bar=True)
+    appendClusters(pangenome, disable_bar=True)
+    pangenome = readFile(filename, annotation=True, geneFamilies=True)
+    assert familyGenes(pangenome) == expected
+    assert pangenome.status["unclusteredGenes"] == "No"
+    h5f = tables.open_file(filename, "r")
+    assert h5f.root.info._v_attrs.numberOfClusters == len(expected)
+    h5f.close()
+
+
+def test_append_existing_gene_id(pangenomeFile):
+    filename, _ = pangenomeFile(orgNames=("orgA", "orgB"), families=False, graph=False)
+    pangenome = makePangenome(orgNames=("orgD",), families=False, graph=False)
+    pangenome.genes[0].ID = "orgA_0_0"
+    pangenome.addFile(filename)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    with pytest.raises(KeyError, match="orgA_0_0"):
+        appendPangenome(pangenome, disable_bar=True)
+    assert sorted(org.name for org in readFile(filename, annotation=True).organisms) == ["orgA", "orgB"]
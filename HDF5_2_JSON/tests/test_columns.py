@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# installed libraries
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+# local libraries
+from conftest import PARTITIONS, makePangenome
+
+
+def test_columns_follow_family_changes():
+    pangenome = makePangenome(graph=False)
+    columns = pangenome.getGeneColumns()
+    assert pangenome.getGeneColumns() is columns
+    matrix = pangenome.getPresenceMatrix()
+
+    gene = pangenome.getGene("orgA_0_1")
+    fam = pangenome.getGeneFamily("fam0")
+    fam.addGene(gene)  # as the clustering and the defragmentation do
+    columns = pangenome.getGeneColumns()
+    assert columns.families[columns.family[columns.genes.index(gene)]] is fam
+    assert pangenome.getPresenceMatrix() is not matrix
+    assert pangenome.getPresenceMatrix().columns is columns
+
+
+def test_families_by_ID():
+    pangenome = makePangenome(families=False, graph=False)
+    pangenome.max_fam_id = 3  # the first IDs are given to no family
+    for gene in pangenome.genes:
+        fam = pangenome.addGeneFamily(f"fam{gene.position}")
+        fam.addPartition(PARTITIONS[gene.position])
+        fam.addGene(gene)
+    columns = pangenome.getGeneColumns()
+    assert columns.families[:3] == [None] * 3
+    assert all(columns.families[fam.ID] is fam for fam in pangenome.geneFamilies)
+    for gene in columns:
+        assert gene.family is gene.gene.family
+
+    matrix = pangenome.getPresenceMatrix()
+    assert matrix.familyCounts().tolist() == [0] * 3 + [3] * 4
+    assert numpy.flatnonzero(matrix.partitionMask("persistent")).tolist() == [pangenome.getGeneFamily("fam0").ID]
+    assert numpy.flatnonzero(matrix.partitionMask("accessory")).tolist() == \
+           sorted(pangenome.getGeneFamily(name).ID for name in ["fam1", "fam2", "fam3"])
+    # the first contig of each organism is circular
+    assert len(columns.neighbors()[0]) == 3 * (4 + 3)
+
+
+def test_packed_presence():
+    pangenome = makePangenome(orgNames=[f"org{index}" for index in range(11)], graph=False)
+    columns = pangenome.getGeneColumns()
+    matrix = pangenome.getPresenceMatrix()
+    present = numpy.zeros((len(columns.families), len(columns.organisms)), dtype=bool)
+    for fam in pangenome.geneFamilies:
+        for gene in fam.genes:
+            present[fam.ID, gene.organism.ID] = True
+    assert (matrix.familyBits == numpy.packbits(present, axis=1)).all()
+    assert (matrix.organismBits == numpy.packbits(present.T, axis=1)).all()
+    assert (matrix.present() == present).all()
+    # the blocks of families are the rows of the matrix
+    assert (numpy.concatenate([matrix.present(start=start, stop=start + 3)
+                               for start in range(0, len(columns.families), 3)]) == present).all()
+    shell = matrix.present("shell", start=1, stop=4)
+    assert (shell == present[1:4] & matrix.partitionMask("shell")[1:4, None]).all()
+    assert matrix.familyCounts().tolist() == present.sum(axis=1).tolist()
+    assert matrix.organismCounts().tolist() == present.sum(axis=0).tolist()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# default libraries
+import json
+
+# installed libraries
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("tables")
+
+# local libraries
+from hdf5_2_json.formats import writeFlat
+from conftest import makePangenome
+
+
+def writeGraph(output, cpu=1):
+    """
+        Writes the json graph of a pangenome built by :func:`conftest.makePangenome`, and returns its file.
+    """
+    writeFlat.pan = makePangenome()
+    writeFlat.writeJSON(str(output), False, "pan", cpu=cpu, disable_bar=True)
+    return str(output / "pangenomeGraph.json")
+
+
+@pytest.mark.parametrize("cpu", [1, 2])
+def test_json_graph(tmp_path, cpu):
+    with open(writeGraph(tmp_path, cpu=cpu)) as graphFile:
+        graph = json.load(graphFile)["graph"]
+    nodeIDs = {str(node["id"]) for node in graph["nodes"]}
+    assert set(graph["node_types"]) == nodeIDs
+    # every edge links two nodes of the graph
+    for edge in graph["edges"]:
+        assert str(edge["from"]) in nodeIDs and str(edge["to"]) in nodeIDs
+    types = {}
+    for edge in graph["edges"]:
+        types[edge["type"][0]] = types.get(edge["type"][0], 0) + 1
+    pan = writeFlat.pan
+    assert types == {"NEIGHBOR_OF": pan.number_of_edges(), "IN_TAXA": pan.number_of_geneFamilies(),
+                     "IN_FAMILY": pan.number_of_genes(), "IN_ORG": pan.number_of_genes()}
+    labels = {}
+    for nodeLabels in graph["node_types"].values():
+        labels[nodeLabels[0]] = labels.get(nodeLabels[0], 0) + 1
+    assert labels == {"Taxa": 1, "genome": pan.number_of_organisms(), "GeneFamily": pan.number_of_geneFamilies(),
+                      "gene": pan.number_of_genes()}
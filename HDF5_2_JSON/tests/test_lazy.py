@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# installed libraries
+import pytest
+
+pytest.importorskip("numpy")
+tables = pytest.importorskip("tables")
+
+# local libraries
+from hdf5_2_json.pangenome import Pangenome
+from hdf5_2_json.formats import readPangenome, readGeneIndex, getGeneOrganism
+from conftest import readFile
+
+
+def test_lazy_annotations(pangenomeFile):
+    filename, written = pangenomeFile(families=False, graph=False)
+    pangenome = readFile(filename, annotation=True, lazy=True)
+    assert pangenome.number_of_lazy_organisms() == 3
+    assert pangenome.number_of_organisms() == 3
+
+    gene = pangenome.getGene("orgB_1_2")  # only the organism of the gene is loaded
+    assert gene.organism.name == "orgB"
+    assert (gene.start, gene.stop, gene.strand, gene.position) == (201, 290, "+", 2)
+    assert pangenome.number_of_lazy_organisms() == 2
+    with pytest.raises(KeyError):
+        pangenome.getGene("orgD_0_0")
+    assert pangenome.number_of_lazy_organisms() == 2
+
+    assert pangenome.getOrganism("orgC").name == "orgC"
+    assert pangenome.number_of_lazy_organisms() == 1
+
+    assert sorted(org.name for org in pangenome.organisms) == ["orgA", "orgB", "orgC"]
+    assert pangenome.number_of_lazy_organisms() == 0
+    assert pangenome.number_of_genes() == written.number_of_genes()
+
+
+def test_lazy_then_families(pangenomeFile):
+    filename, written = pangenomeFile()
+    pangenome = readFile(filename, annotation=True, lazy=True)
+    pangenome.getGene("orgA_0_0")
+    # every gene is needed by the gene families, so the organisms that were not loaded are loaded
+    readPangenome(pangenome, geneFamilies=True, disable_bar=True)
+    assert pangenome.number_of_lazy_organisms() == 0
+    assert pangenome.number_of_geneFamilies() == written.number_of_geneFamilies()
+    assert pangenome.getGene("orgC_1_3").family.name == "fam_orgC"
+
+
+def test_gene_organism(pangenomeFile):
+    filename, written = pangenomeFile(families=False, graph=False)
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    geneIndex = readGeneIndex(pangenome)
+    for org in written.organisms:
+        for gene in org.genes:
+            assert getGeneOrganism(pangenome, gene.ID, geneIndex) == org.name
+    assert getGeneOrganism(pangenome, "orgA_9_9", geneIndex) is None
+    assert getGeneOrganism(pangenome, "orgA_0_1") == "orgA"
+
+
+
+def rewriteGeneIndex(filename, chunkshape=None):
+    """
+        Rewrites the gene index of the file with the given chunks, or removes it as in the files written before it.
+    """
+    h5f = tables.open_file(filename, "a")
+    index = h5f.root.annotations.geneIndex.read()
+    h5f.remove_node(h5f.root.annotations, "geneIndex")
+    if chunkshape is not None:
+        h5f.create_table(h5f.root.annotations, "geneIndex", index.dtype, chunkshape=chunkshape).append(index)
+    h5f.close()
+
+
+@pytest.mark.parametrize("chunkshape", [(2,), (5,), None])
+def test_gene_index(pangenomeFile, chunkshape):
+    filename, written = pangenomeFile(families=False, graph=False)
+    h5f = tables.open_file(filename, "r")
+    index = h5f.root.annotations.geneIndex.read()
+    assert index["ID"].tolist() == sorted(index["ID"].tolist())
+    assert h5f.root.annotations.genes.read(field="gene/ID")[index["row"]].tolist() == index["ID"].tolist()
+    h5f.close()
+    rewriteGeneIndex(filename, chunkshape)
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    geneIndex = readGeneIndex(pangenome)
+    if chunkshape is not None:  # only the first identifier of each chunk is read
+        assert len(geneIndex[0]) == -(-len(index) // chunkshape[0])
+    for org in written.organisms:
+        for gene in org.genes:
+            assert getGeneOrganism(pangenome, gene.ID, geneIndex) == org.name
+    for missing in ["orgA_9_9", "a", "zzz"]:
+        assert getGeneOrganism(pangenome, missing, geneIndex) is None
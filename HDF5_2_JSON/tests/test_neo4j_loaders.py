@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# default libraries
+import json
+import os
+import sys
+
+# installed libraries
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("tables")
+pytest.importorskip("neo4j")
+
+# the loaders are scripts at the root of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# local libraries
+import JSON_to_Neo4j_V3
+from test_json import writeGraph
+
+
+class FakeResult(list):
+    def consume(self):
+        pass
+
+
+class FakeDatabase:
+    """
+        Records the queries sent by a loader, with their parameters. existing are the records returned by the queries
+        reading what a previous sync loaded.
+    """
+    def __init__(self, existingNodes=(), existingEdges=()):
+        self.queries = []
+        self.existingNodes = list(existingNodes)
+        self.existingEdges = list(existingEdges)
+
+    def driver(self, uri, auth=None):
+        return FakeDriver(self)
+
+    def rows(self, start):
+        """the rows sent by the queries whose text starts with the given string"""
+        return [row for query, params in self.queries if query.startswith(start) for row in params.get("rows", [])]
+
+
+class FakeDriver:
+    def __init__(self, database):
+        self.database = database
+
+    def session(self):
+        return FakeSession(self.database)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, database):
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def run(self, query, **params):
+        self.database.queries.append((query, params))
+        if query.startswith("MATCH (n) WHERE n.graph"):
+            return FakeResult(self.database.existingNodes)
+        if query.startswith("MATCH (s)-[r]->(t) WHERE r.graph"):
+            return FakeResult(self.database.existingEdges)
+        return FakeResult()
+
+    def execute_write(self, function, *args):
+        return function(self, *args)
+
+
+def loadV3(monkeypatch, graphFile, *options, database=None):
+    database = FakeDatabase() if database is None else database
+    monkeypatch.setattr(JSON_to_Neo4j_V3.GraphDatabase, "driver", database.driver)
+    JSON_to_Neo4j_V3.configure(["bolt://localhost:7687", "neo4j", "password", graphFile, *options])
+    JSON_to_Neo4j_V3.load_data()
+    return database
+
+
+def readGraph(graphFile):
+    with open(graphFile) as f:
+        return json.load(f)["graph"]
+
+
+def test_v3_load(tmp_path, monkeypatch):
+    graphFile = writeGraph(tmp_path)
+    graph = readGraph(graphFile)
+    database = loadV3(monkeypatch, graphFile)
+
+    constraints = [index for index, (query, _) in enumerate(database.queries) if query.startswith("CREATE CONSTRAINT")]
+    assert sorted(database.queries[index][0].split()[2] for index in constraints) == \
+           sorted(label + "_id" for label in JSON_to_Neo4j_V3.LOADED_LABELS)
+    # the ids are indexed before the edges are loaded
+    firstEdge = min(index for index, (query, _) in enumerate(database.queries) if "MERGE (s)-[r:" in query)
+    assert max(constraints) < firstEdge
+
+    assert sorted(str(row["id"]) for row in database.rows("UNWIND $rows AS row\nCREATE (n:")) == \
+           sorted(str(node["id"]) for node in graph["nodes"])
+    loadedTypes = {}
+    for query, params in database.queries:
+        if "MERGE (s)-[r:" in query:
+            relType = query.split("MERGE (s)-[r:")[1].split("]")[0]
+            loadedTypes[relType] = loadedTypes.get(relType, 0) + len(params["rows"])
+    fileTypes = {}
+    for edge in graph["edges"]:
+        fileTypes[edge["type"][0]] = fileTypes.get(edge["type"][0], 0) + 1
+    assert loadedTypes == fileTypes
+
+
+def test_v3_batches(tmp_path, monkeypatch, capsys):
+    graphFile = writeGraph(tmp_path)
+    graph = readGraph(graphFile)
+    database = loadV3(monkeypatch, graphFile, "--batch_size", "7")
+    batches = [params["rows"] for query, params in database.queries if query.startswith("UNWIND $rows")]
+    assert all(0 < len(rows) <= 7 for rows in batches)
+    # a batch holds the rows of a single query text, the statements only differ by label and relationship type
+    texts = [query for query, params in database.queries if query.startswith("UNWIND $rows")]
+    assert len(set(texts)) <= 2 * len(JSON_to_Neo4j_V3.LOADED_LABELS) + 2 * len(JSON_to_Neo4j_V3.LOADED_TYPES)
+    out = capsys.readouterr().out
+    assert f"Nodes: {len(graph['nodes'])} nodes in " in out
+    assert f"Constraints: {len(JSON_to_Neo4j_V3.LOADED_LABELS)} labels in " in out
+    assert f"Edges: {len(graph['edges'])} edges in " in out
+
+
+def test_v3_sync_deletes(tmp_path, monkeypatch):
+    graphFile = writeGraph(tmp_path)
+    # labels() comes back in any order, the loader matches on the primary label stored with the node
+    existingNodes = [{"id": "F_old", "label": "GeneFamily", "labels": ["shell", "GeneFamily"], "hash": "x"},
+                     {"id": "old_gene", "label": None, "labels": ["gene"], "hash": "x"}]
+    existingEdges = [{"source": "old_gene", "source_label": None, "source_labels": ["gene"], "type": "IN_FAMILY",
+                      "target": "F_old", "target_label": "GeneFamily", "target_labels": ["shell", "GeneFamily"], "hash": "x"}]
+    database = loadV3(monkeypatch, graphFile, "--sync", "--graph_name", "pan",
+                      database=FakeDatabase(existingNodes, existingEdges))
+    deleteQueries = [query for query, params in database.queries if "DELETE" in query]
+    assert "MATCH (s:gene {id: row.from})-[r:IN_FAMILY]->(t:GeneFamily {id: row.to})" in deleteQueries[0]
+    assert all("WHERE n.graph = row.graph" in query for query in deleteQueries if "DETACH DELETE" in query)
+    deletedNodes = [row for query, params in database.queries if "DETACH DELETE" in query for row in params["rows"]]
+    assert sorted(deletedNodes, key=lambda row: row["id"]) == [{"id": "F_old", "graph": "pan"}, {"id": "old_gene", "graph": "pan"}]
+    synced = [row for query, params in database.queries if query.startswith("UNWIND $rows AS row\nMERGE (n:") for row in params["rows"]]
+    assert all(row["label"] in JSON_to_Neo4j_V3.LOADED_LABELS and row["graph"] == "pan" for row in synced)
+
+
+def test_json_requires_ijson(tmp_path, monkeypatch):
+    import graph_stream
+    graphFile = writeGraph(tmp_path)
+    monkeypatch.setattr(graph_stream, "ijson", None)
+    with pytest.raises(Exception, match="ijson is required"):
+        next(graph_stream.iter_nodes(graphFile))
+
+
+def test_v2_loads_its_labels(tmp_path, monkeypatch):
+    graphFile = writeGraph(tmp_path)
+    graph = readGraph(graphFile)
+    # the V2 loader reads its arguments when it is imported
+    monkeypatch.setattr(sys, "argv", ["JSON_to_Neo4j_V2.py", "bolt://localhost:7687", "neo4j", "password", graphFile])
+    import JSON_to_Neo4j_V2
+    database = FakeDatabase()
+    monkeypatch.setattr(JSON_to_Neo4j_V2.GraphDatabase, "driver", database.driver)
+    JSON_to_Neo4j_V2.load_data()
+    loaded = {str(node_id) for node_id, labels in graph["node_types"].items()
+              if any(x in JSON_to_Neo4j_V2.LOADED_LABELS for x in labels)}
+    assert len([query for query, params in database.queries if query.startswith("CREATE")]) == len(loaded)
+    edges = [e for e in graph["edges"] if str(e["from"]) in loaded and str(e["to"]) in loaded]
+    assert len([query for query, params in database.queries if query.startswith("MATCH (s:")]) == len(edges)
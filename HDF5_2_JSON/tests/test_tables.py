@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# coding:utf-8
+
+# installed libraries
+import pytest
+
+pytest.importorskip("numpy")
+tables = pytest.importorskip("tables")
+
+# local libraries
+from hdf5_2_json.formats import is_coded, readGeneIDs, getRowGenes, getGeneRows
+from conftest import makePangenome, readFile
+
+
+def familyGenes(pangenome):
+    return {fam.name: sorted(gene.ID for gene in fam.genes) for fam in pangenome.geneFamilies}
+
+
+def edgeGenes(pangenome):
+    return sorted(tuple(sorted((gene1.ID, gene2.ID))) for edge in pangenome.edges
+                  for pairs in edge.organisms.values() for gene1, gene2 in pairs)
+
+
+def test_coded_tables(pangenomeFile):
+    filename, _ = pangenomeFile()
+    h5f = tables.open_file(filename, "r")
+    assert is_coded(h5f.root.geneFamilies, "gene")
+    assert is_coded(h5f.root.geneFamilies, "geneFam")
+    assert is_coded(h5f.root.edges, "geneSource")
+    assert is_coded(h5f.root.edges, "geneTarget")
+    h5f.close()
+
+
+def test_families_and_graph(pangenomeFile):
+    filename, written = pangenomeFile()
+    pangenome = readFile(filename, annotation=True, geneFamilies=True, graph=True)
+    assert familyGenes(pangenome) == familyGenes(written)
+    assert {fam.name: fam.partition for fam in pangenome.geneFamilies} == \
+           {fam.name: fam.partition for fam in written.geneFamilies}
+    assert edgeGenes(pangenome) == edgeGenes(written)
+    for gene in pangenome.genes:
+        assert gene.family.name == written.getGene(gene.ID).family.name
+
+
+def test_families_without_annotations(pangenomeFile):
+    filename, written = pangenomeFile(graph=False)
+    pangenome = readFile(filename, geneFamilies=True)  # the genes are not linked to their organisms
+    assert familyGenes(pangenome) == familyGenes(written)
+
+
+def test_gene_rows(pangenomeFile):
+    filename, _ = pangenomeFile()
+    pangenome = readFile(filename, annotation=True)
+    h5f = tables.open_file(filename, "r")
+    geneIDs = readGeneIDs(h5f)
+    # the rows are found from the contig index, they are those of the gene identifiers in the annotation table
+    rowGenes = getRowGenes(pangenome, h5f)
+    assert [gene.ID if gene is not None else None for gene in rowGenes] == \
+           [geneID if not geneID.endswith("tRNA") else None for geneID in geneIDs]
+    geneRows = getGeneRows(h5f)
+    assert [geneIDs[geneRows(gene)] for gene in pangenome.genes] == [gene.ID for gene in pangenome.genes]
+    h5f.close()
+
+
+def featureAnnotations(pangenome):
+    features = {}
+    for org in pangenome.organisms:
+        for contig in org.contigs:
+            for feature in list(contig.genes) + list(contig.RNAs):
+                features[feature.ID] = (org.name, contig.name, contig.is_circular, feature.type, feature.start,
+                                        feature.stop, feature.strand, feature.name, feature.product,
+                                        feature.is_fragment, getattr(feature, "position", None))
+    return features
+
+
+def test_dictionary_encoded_annotations(pangenomeFile):
+    filename, written = pangenomeFile(families=False, graph=False)
+    h5f = tables.open_file(filename, "r")
+    for column in ["contig/name", "gene/type", "gene/name", "gene/product"]:
+        assert is_coded(h5f.root.annotations.genes, column)
+    # each distinct string is written once, in the dictionary of its column
+    assert sorted(h5f.root.annotations.geneTypes.read(field="string").tolist()) == [b"CDS", b"tRNA"]
+    assert sorted(h5f.root.annotations.geneNames.read(field="string").tolist()) == \
+           [b"gene0", b"gene1", b"gene2", b"trnA"]
+    assert sorted(h5f.root.annotations.geneProducts.read(field="string").tolist()) == \
+           [b"product 0", b"product 1", b"tRNA-Ala"]
+    h5f.close()
+    pangenome = readFile(filename, annotation=True)
+    assert featureAnnotations(pangenome) == featureAnnotations(written)
+
+
+def test_parallel_annotations(pangenomeFile):
+    filename, written = pangenomeFile(families=False, graph=False)
+    pangenome = readFile(filename, annotation=True, cpu=2)
+    assert featureAnnotations(pangenome) == featureAnnotations(written)
+    # the organisms are added in the order of the file, whatever the process that read them
+    assert [org.name for org in pangenome.organisms] == [org.name for org in written.organisms]
+
+
+def test_edge_gene_pairs():
+    pangenome = makePangenome()
+    for edge in pangenome.edges:
+        orgDict = edge.getOrgDict()
+        assert edge.number_of_organisms() == len(orgDict)
+        assert [pair for pairs in orgDict.values() for pair in pairs] == edge.genePairs
+        for org, pairs in orgDict.items():
+            assert all(gene1.organism == org and gene2.organism == org for gene1, gene2 in pairs)
+            assert all({gene1.family, gene2.family} == {edge.source, edge.target} for gene1, gene2 in pairs)
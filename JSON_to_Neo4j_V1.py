@@ -1,28 +1,53 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import json
-import pdb
+import argparse
+import queue
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 from tqdm import tqdm
 
-# import numpy
-
 from neo4j import GraphDatabase
 
+from graph_stream import iter_node_types, iter_nodes, iter_edges
+
+parser = argparse.ArgumentParser(description="Load several pangenome graphs (one per species) in a single database")
+parser.add_argument('URI')
+parser.add_argument('USER')
+parser.add_argument('PASSWORD')
+parser.add_argument('PATHS', nargs="+", help="The pangenome graph files, in any form read by graph_stream")
+parser.add_argument('--workers', type=int, default=4, help="Number of pangenomes loaded at the same time, "
+                                                            "and of writers of the relationships to shared nodes")
+parser.add_argument('--batch_size', type=int, default=10000,
+                    help="Number of nodes or edges sent to the database in a single transaction")
+parser.add_argument('--similarities', required=False,
+                    help="Tabulated file of similar gene families (such as a PanFAM output), "
+                         "loaded as SIMILAR_TO relationships between the families of the different pangenomes")
+parser.add_argument('--clean', action="store_true", help="Delete everything in the database before loading")
+args = parser.parse_args()
+
 # Here substitute with your uri, user and pwd, if necessary
 
-URI = "bolt://localhost:7687"
+URI = args.URI
+
+USER = args.USER
 
-USER = "neo4j"
+PASSWORD = args.PASSWORD
 
-PASSWORD = "1234"
+FILENAMES = args.PATHS
 
-# Here change filename if necessary
+BATCH_SIZE = args.batch_size
 
-import glob
+# nodes with one of these labels are loaded
+LOADED_LABELS = ["GeneFamily", "Module", "Taxa"]
 
-FILENAMES = ["PanGenome/Acinetobacter_nosocomialis/pangenomeGraph.json","PanGenome/Acinetobacter_nosocomialis/pangenomeGraph.json"]
+# relationships of these types are loaded, if both of their ends are loaded
+LOADED_TYPES = ["IN_MODULE", "NEIGHBOR_OF", "IN_TAXA", "SIMILAR_TO"]
+
+# nodes with one of these labels can be found in several pangenomes. Only one writer at a time may touch each of them.
+SHARED_LABELS = ["Taxa", "genome", "Genome"]
 
 
 def execute(driver, query):
@@ -35,96 +60,214 @@ def execute(driver, query):
             return result
 
 
-def load_data():
-    """Load the dataset from json."""
-
-    driver = GraphDatabase.driver(
-
-        URI, auth=(USER, PASSWORD))
-
-    # clean_query = "MATCH (n) DETACH DELETE n"
-    #
-    # execute(driver, clean_query)
-    json_data = {"graph": {"edges": [], "nodes": [], "node_types": {}}}
-    for path in FILENAMES:
-        print(path)
-        with open(path, "r+") as f:
-            json_data_local = json.load(f)
-            json_data["graph"]["edges"] += json_data_local["graph"]["edges"]
-            json_data["graph"]["nodes"] += json_data_local["graph"]["nodes"]
-            json_data["graph"]["node_types"].update(json_data_local["graph"]["node_types"])
+def write_batch(tx, query, rows):
+    """Run a parameterised query over a batch of rows in a transaction."""
 
-    nodes_to_remove = []
+    tx.run(query, rows=rows).consume()
 
-    # If the dataset is too large and everything is slow, uncomment the following code,
 
-    # it will remove N (by default 700) random nodes from the data)
+def node_attributes(n):
+    attr = {}
+    for k, v in n["attr"].items():
+        if k == "nb_genes" or k == "nb_genomes" or k == "nb_fam":
+            attr[k] = int(v)
+        else:
+            attr[k] = str(v)
+    return attr
 
-    # (do not forget to uncomment 'import numpy' on the top)
 
-    # N = 700 # number of nodes to remove
+def edge_attributes(e):
+    attr = {}
+    for k, v in e["attr"].items():
+        if k == "weight":
+            attr[k] = int(v)
+        else:
+            attr[k] = str(v)
+    return attr
 
-    # nodes_to_remove = numpy.random.choice(
 
-    #     [n["id"] for n in json_data["graph"]["nodes"]], N, replace=False)
-    import pdb
-    with open("panfam_output_DATE2022-05-21_HOUR08.56.36_PID17689/PanFAM5080.tsv",'r') as panfam_file:
-        for line in panfam_file:
-            elements = line.split()
-            json_data["graph"]["edges"].append({"from": "F_" + elements[1].strip('"'), "to": "F_" + elements[0].strip('"'), "type": ["SIMILAR_TO"], "attr": {}})
+class BatchWriter:
+    """Buffers rows per parameterised query, and sends each buffer to the database once it is full."""
 
-    # Create nodes
-    for n in tqdm(json_data["graph"]["nodes"], unit="node"):
-        print(json_data["graph"]["node_types"]["s_Acinetobacter_pittii"]) if str(n["id"]) == "s_Acinetobacter_pittii" else None
-        if n["id"] not in nodes_to_remove:
-            if any([x in ["GeneFamily", "Module", "Taxa"] for x in json_data["graph"]["node_types"][str(n["id"])]]):
-                query = (
+    def __init__(self, session):
+        self.session = session
+        self.buffers = {}
+        self.count = 0
 
-                    "CREATE (n:{}) \n".format(":".join(json_data["graph"]["node_types"][str(n["id"])])) +
+    def node(self, labels, row):
+        self.add("UNWIND $rows AS row\nMERGE (n:{} {{id: row.id}})\nSET n += row.attr".format(":".join(labels)), row)
 
-                    f'SET n.id = "{n["id"]}"' + "\n"
+    def edge(self, source_labels, target_labels, rel_type, row):
+        self.add("UNWIND $rows AS row\nMATCH (s:{} {{id: row.from}}), (t:{} {{id: row.to}})\n"
+                 "MERGE (s)-[r:{}]->(t)\nSET r += row.attr".format(":".join(source_labels), ":".join(target_labels),
+                                                                   rel_type), row)
 
-                )
-                print(json_data["graph"]["node_types"]["s_Acinetobacter_pittii"]) if str(n["id"]) == "s_Acinetobacter_pittii" else None
+    def add(self, query, row):
+        self.buffers.setdefault(query, []).append(row)
+        self.count += 1
+        if len(self.buffers[query]) >= BATCH_SIZE:
+            self.flush(query)
 
-                for k, v in n["attr"].items():
+    def flush(self, query=None):
+        for key in [query] if query is not None else list(self.buffers):
+            if len(self.buffers[key]) > 0:
+                # managed transactions are retried on transient errors, such as deadlocks
+                self.session.execute_write(write_batch, key, self.buffers[key])
+                self.buffers[key] = []
 
-                    if k == "nb_genes" or k == "nb_genomes" or k == "nb_fam":
 
-                        query += "SET n.{} = {}\n".format(k, v)
+def report(name, nb_nodes, nb_edges, start):
+    """Print the throughput of the loading of a file."""
 
-                    else:
+    elapsed = time.time() - start
+    print("{}: {} nodes and {} edges in {:.2f}s ({:.0f} records/s)".format(
+        name, nb_nodes, nb_edges, elapsed, (nb_nodes + nb_edges) / elapsed if elapsed > 0 else 0))
 
-                        query += "SET n.{} = \"{}\"\n".format(k, v)
 
-                execute(driver, query)
+def shared_partition(e, node_types):
+    """Returns the partition of an edge that touches a shared node, or None if it does not touch any."""
 
-    # Create relationships
+    for node_id in [str(e["to"]), str(e["from"])]:
+        if any([x in SHARED_LABELS for x in node_types[node_id]]):
+            return zlib.crc32(node_id.encode()) % args.workers
+    return None
 
-    for e in tqdm(json_data["graph"]["edges"], unit="edges"):
-        if any([x in ["IN_MODULE", "NEIGHBOR_OF", "IN_TAXA", "SIMILAR_TO"] for x in e["type"]]):
-            query = (
 
-                    'MATCH (s:{} {{id: "{}"}}), (t:{} {{id: "{}"}}) \n'.format(
+def shared_writer(driver, partition_queue):
+    """Writes the edges of a partition of the shared nodes. Each partition has a single writer, so that two writers
+    never lock the same shared node."""
 
-                        ":".join(json_data["graph"]["node_types"][str(e["from"])]), e["from"],
-
-                        ":".join(json_data["graph"]["node_types"][str(e["to"])]), e["to"]) +
+    with driver.session() as session:
+        writer = BatchWriter(session)
+        while True:
+            item = partition_queue.get()
+            if item is None:
+                break
+            writer.edge(*item)
+        writer.flush()
+
+
+def put_shared(partition_queues, shared_writers, partition, item):
+    """Send an item to the writer of a partition. The writer is checked while the queue is full, so that the loading
+    fails with the error of the writer instead of waiting forever for it if it stopped."""
+
+    while True:
+        try:
+            partition_queues[partition].put(item, timeout=1)
+            return
+        except queue.Full:
+            if shared_writers[partition].done():
+                shared_writers[partition].result()  # raises the error that stopped the writer
+                raise Exception("The writer of the shared nodes partition {} stopped".format(partition))
+
+
+def load_file(driver, path, node_types, partition_queues, shared_writers):
+    """Load the nodes of a pangenome that no other pangenome shares, and the relationships between them.
+    The relationships to shared nodes are sent to the writer of the partition of the shared node."""
+
+    start = time.time()
+    nb_edges = 0
+    with driver.session() as session:
+        writer = BatchWriter(session)
+        for n in iter_nodes(path):
+            labels = node_types.get(str(n["id"]))
+            if labels is not None and not any([x in SHARED_LABELS for x in labels]):
+                writer.node(labels, {"id": str(n["id"]), "attr": node_attributes(n)})
+        writer.flush()
+        nb_nodes = writer.count
+
+        for e in iter_edges(path):
+            if any([x in LOADED_TYPES for x in e["type"]]) and \
+                    str(e["from"]) in node_types and str(e["to"]) in node_types:
+                item = (node_types[str(e["from"])], node_types[str(e["to"])], e["type"][0],
+                        {"from": str(e["from"]), "to": str(e["to"]), "attr": edge_attributes(e)})
+                partition = shared_partition(e, node_types)
+                if partition is None:
+                    writer.edge(*item)
+                else:
+                    put_shared(partition_queues, shared_writers, partition, item)
+                nb_edges += 1
+        writer.flush()
+    report(path, nb_nodes, nb_edges, start)
+    return nb_nodes, nb_edges
 
-                    'MERGE (s)-[r:{}]->(t)\n'.format(e["type"][0])
 
-            )
-            for k, v in e["attr"].items():
+def load_data():
+    """Load the datasets from json."""
 
-                if k == "weight":
+    driver = GraphDatabase.driver(
 
-                    query += "SET r.{} = {}\n".format(k, v)
+        URI, auth=(USER, PASSWORD))
 
-                else:
+    if args.clean:
+        execute(driver, "MATCH (n) DETACH DELETE n")
 
-                    query += "SET r.{} = \"{}\"\n".format(k, v)
+    # The graph files are read incrementally. Only the types of the nodes that are loaded are kept in memory,
+    # the edges that are loaded link these nodes only.
+    node_types = {}
+    for path in tqdm(FILENAMES, unit="file"):
+        for node_id, labels in iter_node_types(path):
+            if any([x in LOADED_LABELS for x in labels]):
+                node_types[str(node_id)] = labels
 
-            execute(driver, query)
+    with driver.session() as session:
+        for label in sorted({label for labels in node_types.values() for label in labels}):
+            session.run("CREATE CONSTRAINT {}_id IF NOT EXISTS FOR (n:{}) REQUIRE n.id IS UNIQUE".format(label, label)).consume()
+        session.run("CALL db.awaitIndexes()").consume()
+
+        # Shared nodes are created first, by a single writer
+        start = time.time()
+        writer = BatchWriter(session)
+        for path in FILENAMES:
+            for n in iter_nodes(path):
+                labels = node_types.get(str(n["id"]))
+                if labels is not None and any([x in SHARED_LABELS for x in labels]):
+                    writer.node(labels, {"id": str(n["id"]), "attr": node_attributes(n)})
+        writer.flush()
+        report("Shared nodes", writer.count, 0, start)
+
+    # Then the pangenomes are loaded concurrently, the relationships to the shared nodes being partitioned
+    # between writers by shared node.
+    partition_queues = [queue.Queue(maxsize=BATCH_SIZE * 4) for _ in range(args.workers)]
+    start = time.time()
+    nb_nodes, nb_edges = 0, 0
+    with ThreadPoolExecutor(max_workers=args.workers) as writer_executor:
+        shared_writers = [writer_executor.submit(shared_writer, driver, partition_queue)
+                          for partition_queue in partition_queues]
+        try:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                for future in [executor.submit(load_file, driver, path, node_types, partition_queues, shared_writers)
+                               for path in FILENAMES]:
+                    file_nodes, file_edges = future.result()
+                    nb_nodes += file_nodes
+                    nb_edges += file_edges
+        finally:
+            for partition in range(len(partition_queues)):
+                try:
+                    put_shared(partition_queues, shared_writers, partition, None)
+                except Exception:
+                    pass  # the writer stopped on an error, which is raised below
+    # the loading fails if any of the writers of the shared nodes did
+    for future in shared_writers:
+        future.result()
+    report("All pangenomes", nb_nodes, nb_edges, start)
+
+    # Similarities link families of different pangenomes, so they are loaded once all of the pangenomes are.
+    if args.similarities is not None:
+        start = time.time()
+        with driver.session() as session:
+            writer = BatchWriter(session)
+            with open(args.similarities, 'r') as panfam_file:
+                for line in panfam_file:
+                    elements = line.split()
+                    source, target = "F_" + elements[1].strip('"'), "F_" + elements[0].strip('"')
+                    if source in node_types and target in node_types:
+                        writer.edge(node_types[source], node_types[target], "SIMILAR_TO",
+                                    {"from": source, "to": target, "attr": {}})
+            writer.flush()
+        report(args.similarities, 0, writer.count, start)
+
+    driver.close()
 
 
 if __name__ == '__main__':
@@ -7,8 +7,11 @@
 
 
 import json
+
 import re
 
+from graph_stream import iter_node_types, iter_nodes, iter_edges
+
 # import numpy
 
 from neo4j import GraphDatabase
@@ -39,6 +42,9 @@ PASSWORD=args.PASSWORD
 #FILENAME = "test_V2.json"
 FILENAME=args.PATH
 
+# nodes with one of these labels are loaded, the relationships between them too
+LOADED_LABELS = ["GeneFamily", "Module", "Taxa", "genome"]
+
 
 
 
@@ -75,9 +81,15 @@ def load_data():
 
 
 
-    with open(FILENAME, "r+") as f:
+    # The graph file is read incrementally, only the types of the loaded nodes are kept in memory to match the edges endpoints.
+
+    node_types = {}
 
-        json_data = json.load(f)
+    for node_id, labels in iter_node_types(FILENAME):
+
+        if any([x in LOADED_LABELS for x in labels]):
+
+            node_types[str(node_id)] = labels
 
 
 
@@ -95,7 +107,7 @@ def load_data():
 
     # nodes_to_remove = numpy.random.choice(
 
-    #     [n["id"] for n in json_data["graph"]["nodes"]], N, replace=False)
+    #     list(node_types.keys()), N, replace=False)
 
     entier = re.compile("^[1-9][0-9]*$")
     chaine = re.compile("^.*$")
@@ -105,8 +117,10 @@ def load_data():
     Attributes["nb_genes"] = entier
     Attributes["nb_genomes"] = entier
     Attributes["nb_fam"] = entier
+    Attributes["nb_fams"] = entier
     Attributes["partition"] = re.compile("[pP]ersistent|[sS]hell|[cC]loud|[uU]ndefined")
     Attributes["subpart"] = chaine
+    Attributes["subpartition"] = chaine
     Attributes["From"] = entier
     Attributes["Id"] = entier
     Attributes["weight"] = entier
@@ -114,15 +128,15 @@ def load_data():
 
     # Create nodes
 
-    for n in json_data["graph"]["nodes"]:
+    for n in iter_nodes(FILENAME):
 
-        if n["id"] not in nodes_to_remove:
+        if str(n["id"]) in node_types and n["id"] not in nodes_to_remove:
 
             query = (
 
-                "CREATE (n:{}) \n".format(json_data["graph"]["node_types"][str(n["id"])]) +
+                "CREATE (n:{}) \n".format(":".join(node_types[str(n["id"])])) +
 
-                "SET n.id = {} \n".format(n["id"])
+                "SET n.id = {} \n".format(json.dumps(n["id"]))
 
             )
 
@@ -132,7 +146,7 @@ def load_data():
 
                 if not(bool(Attributes[k].match(str(v)))): raise Exception("Wrong format for attribute " + str(k) + " : " + str(v))
 
-                if k == "nb_genes" or k == "nb_genomes" or k == "nb_fam":
+                if k == "nb_genes" or k == "nb_genomes" or k == "nb_fam" or k == "nb_fams":
 
                     query += "SET n.{} = {}\n".format(k, v)
 
@@ -146,18 +160,21 @@ def load_data():
 
     # Create relationships
 
-    for e in json_data["graph"]["edges"]:
+    for e in iter_edges(FILENAME):
+
+        if str(e["from"]) not in node_types or str(e["to"]) not in node_types:
 
+            continue
 
         query = (
 
             "MATCH (s:{} {{id: {}}}), (t:{} {{id: {}}}) \n".format(
 
-                json_data["graph"]["node_types"][str(e["from"])], e["from"],
+                ":".join(node_types[str(e["from"])]), json.dumps(e["from"]),
 
-                json_data["graph"]["node_types"][str(e["to"])], e["to"]) +
+                ":".join(node_types[str(e["to"])]), json.dumps(e["to"])) +
 
-            "MERGE (s)-[r:{}]->(t)\n".format(e["type"])
+            "MERGE (s)-[r:{}]->(t)\n".format(e["type"][0] if isinstance(e["type"], list) else e["type"])
 
         )
 
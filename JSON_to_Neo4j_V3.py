@@ -6,10 +6,14 @@
 
 
 
-import json
 import re
+import time
+import json
+import hashlib
 from tqdm import tqdm
 
+from graph_stream import iter_node_types, iter_nodes, iter_edges
+
 
 # import numpy
 
@@ -22,24 +26,55 @@ parser.add_argument('URI')
 parser.add_argument('USER')
 parser.add_argument('PASSWORD')
 parser.add_argument('PATH')
-args=parser.parse_args()
+parser.add_argument('--batch_size', type=int, default=10000, help="Number of nodes or edges sent to the database in a single transaction")
+parser.add_argument('--sync', action="store_true", help="Instead of emptying the database and loading the whole graph, only create, update or delete the nodes and relationships that changed since the graph was last loaded")
+parser.add_argument('--graph_name', default=None, help="Name under which the nodes and relationships of the graph are tracked by --sync (default: PATH)")
+
+
+# nodes with one of these labels are loaded, as written by 'hdf5_2_json write', and their ids are unique per label
+LOADED_LABELS = ["GeneFamily", "Module", "gene", "genome", "Taxa"]
+
+# edges of one of these types are loaded, between loaded nodes
+LOADED_TYPES = ["NEIGHBOR_OF", "IN_MODULE", "IN_TAXA", "IN_FAMILY", "IN_ORG"]
+
+
+
+def configure(argv=None):
+
+    """Set the connection, the graph file and the loading options from the command line arguments."""
+
+    global URI, USER, PASSWORD, FILENAME, BATCH_SIZE, SYNC, GRAPH_NAME
+
+    args=parser.parse_args(argv)
+
+    # Here substitute with your uri, user and pwd, if necessary
+
+    #URI = "bolt://localhost:7687"
+    URI=args.URI
+    #USER = "neo4j"
+    USER=args.USER
 
-# Here substitute with your uri, user and pwd, if necessary
+    #PASSWORD = "neoforj"
+    PASSWORD=args.PASSWORD
 
-#URI = "bolt://localhost:7687"
-URI=args.URI
-#USER = "neo4j"
-USER=args.USER
+    # Here change filename if necessary
 
-#PASSWORD = "neoforj"
-PASSWORD=args.PASSWORD
+    #FILENAME = "test_V2.json"
+    FILENAME=args.PATH
 
+    BATCH_SIZE=args.batch_size
 
+    SYNC=args.sync
 
-# Here change filename if necessary
+    GRAPH_NAME=args.graph_name if args.graph_name is not None else args.PATH
 
-#FILENAME = "test_V2.json"
-FILENAME=args.PATH
+
+
+def relationship_type(e):
+
+    """The type of the relationship of an edge, which is the first of its types."""
+
+    return e["type"][0] if isinstance(e["type"], list) else e["type"]
 
 
 
@@ -61,6 +96,217 @@ def execute(driver, query):
 
 
 
+def write_batch(tx, query, rows):
+
+    """Run a parameterised query over a batch of rows in a transaction."""
+
+    tx.run(query, rows=rows).consume()
+
+
+
+def flush(session, queries, buffers, key):
+
+    """Send the buffered rows of a query to the database, in a single transaction."""
+
+    if len(buffers[key]) > 0:
+
+        session.execute_write(write_batch, queries[key], buffers[key])
+
+        buffers[key] = []
+
+
+
+def create_constraints(session, labels):
+
+    """Create a uniqueness constraint (and its backing index) on the id of each given node label, and wait for the indexes to be online."""
+
+    for label in sorted(labels):
+
+        session.run("CREATE CONSTRAINT {}_id IF NOT EXISTS FOR (n:{}) REQUIRE n.id IS UNIQUE".format(label, label)).consume()
+
+    session.run("CALL db.awaitIndexes()").consume()
+
+
+
+# Schema of the node and edge attributes. Each attribute has a check, which is given the values of the attribute for a
+# whole batch of records (a column) and returns the positions of the wrong values.
+
+entier = re.compile("^[1-9][0-9]*$")
+
+chaine = re.compile("^.*$")
+
+
+
+def integer_column(values):
+
+    """Positions of the values that are not strictly positive integers."""
+
+    return [i for i, v in enumerate(values) if not (type(v) is int and v > 0) and not entier.match(str(v))]
+
+
+
+def pattern_column(pattern, few_values=False):
+
+    """Check of the columns whose values must match the given regular expression. When the column only has a few distinct values (few_values=True), each of them is only matched once."""
+
+    if not few_values:
+
+        return lambda values: [i for i, v in enumerate(values) if not pattern.match(str(v))]
+
+    known = {}
+
+    def check(values):
+
+        bad = []
+
+        for i, v in enumerate(values):
+
+            ok = known.get(v)
+
+            if ok is None:
+
+                ok = known[v] = bool(pattern.match(str(v)))
+
+            if not ok:
+
+                bad.append(i)
+
+        return bad
+
+    return check
+
+
+
+Attributes = {}
+Attributes["name"] = pattern_column(chaine)
+Attributes["nb_genes"] = integer_column
+Attributes["nb_genomes"] = integer_column
+Attributes["nb_fams"] = integer_column
+Attributes["partition"] = pattern_column(re.compile("[pP]ersistent|[sS]hell|[cC]loud|[uU]ndefined"), few_values=True)
+Attributes["subpartition"] = pattern_column(chaine, few_values=True)
+Attributes["From"] = integer_column
+Attributes["To"] = integer_column
+Attributes["Id"] = integer_column
+Attributes["weight"] = integer_column
+Attributes["type"] = pattern_column(re.compile("GeneFamily|Module|Gene|Genome"), few_values=True)
+Attributes["genomic_type"] = pattern_column(re.compile("^CDS$|RNA"), few_values=True)
+Attributes["is_fragment"] = pattern_column(re.compile("^[01]$"), few_values=True)
+
+
+
+def validate_batch(batch, unit):
+
+    """Check the attributes of a batch of (record number, record) pairs against the schema, column by column, and report all of the errors of the batch at once."""
+
+    columns = {}
+
+    for number, record in batch:
+
+        for k, v in record["attr"].items():
+
+            if k not in columns:
+
+                columns[k] = ([], [])
+
+            columns[k][0].append(number)
+
+            columns[k][1].append(v)
+
+    errors = []
+
+    for k, (numbers, values) in columns.items():
+
+        if k not in Attributes:
+
+            errors.extend((number, "unknown attribute : {}".format(k)) for number in numbers)
+
+        else:
+
+            errors.extend((numbers[i], "wrong format for attribute {} : {}".format(k, values[i])) for i in Attributes[k](values))
+
+    if len(errors) > 0:
+
+        raise Exception("{} error(s) in the {}s {} to {}:\n".format(len(errors), unit, batch[0][0], batch[-1][0]) + "\n".join("{} {}: {}".format(unit, number, message) for number, message in sorted(errors)))
+
+
+
+def validated(records, unit):
+
+    """Yield the given (record number, record) pairs, once the batch they belong to has been validated."""
+
+    batch = []
+
+    for item in records:
+
+        batch.append(item)
+
+        if len(batch) >= BATCH_SIZE:
+
+            validate_batch(batch, unit)
+
+            yield from batch
+
+            batch = []
+
+    if len(batch) > 0:
+
+        validate_batch(batch, unit)
+
+        yield from batch
+
+
+
+def content_hash(*values):
+
+    """Hash of the content of a node or relationship, to find out whether it changed since it was loaded."""
+
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+
+def primary_label(label, labels):
+
+    """The label a node is matched on, as stored when it was synced, or its loaded label for nodes synced before it was stored."""
+
+    if label is not None:
+
+        return label
+
+    return next(x for x in labels if x in LOADED_LABELS)
+
+
+
+def read_existing(session, graph):
+
+    """Read the id, labels and content hash of the nodes and relationships previously loaded from the given graph.
+    labels() has no guaranteed order, so the endpoints are matched on the primary label stored with each node."""
+
+    nodes = {}
+
+    for record in session.run("MATCH (n) WHERE n.graph = $graph\nRETURN n.id AS id, n.label AS label, labels(n) AS labels, n.hash AS hash", graph=graph):
+
+        nodes[str(record["id"])] = (record["id"], primary_label(record["label"], record["labels"]), record["labels"], record["hash"])
+
+    edges = {}
+
+    for record in session.run("MATCH (s)-[r]->(t) WHERE r.graph = $graph\nRETURN s.id AS source, s.label AS source_label, labels(s) AS source_labels, type(r) AS type, t.id AS target, t.label AS target_label, labels(t) AS target_labels, r.hash AS hash", graph=graph):
+
+        edges[(str(record["source"]), record["type"], str(record["target"]))] = (record["source"], primary_label(record["source_label"], record["source_labels"]), record["target"], primary_label(record["target_label"], record["target_labels"]), record["hash"])
+
+    return nodes, edges
+
+
+
+def report(phase, count, unit, start):
+
+    """Print the throughput of a loading phase."""
+
+    elapsed = time.time() - start
+
+    print("{}: {} {} in {:.2f}s ({:.0f} {}/s)".format(phase, count, unit, elapsed, count / elapsed if elapsed > 0 else 0, unit))
+
+
+
 def load_data():
 
     """Load the dataset from json."""
@@ -71,13 +317,24 @@ def load_data():
 
 
 
-    clean_query = "MATCH (n) DETACH DELETE n"
+    if not SYNC:
+
+        clean_query = "MATCH (n) DETACH DELETE n"
+
+        execute(driver, clean_query)
+
+    # The graph file is read incrementally. Only the types of the nodes that are loaded are kept in memory,
+    # the edges that are loaded link these nodes only.
 
-    execute(driver, clean_query)
+    node_types = {}
 
-    with open(FILENAME, "r+") as f:
+    label_sets = {}  # the nodes share the tuples of their labels, there are only a few distinct ones
 
-        json_data = json.load(f)
+    for node_id, labels in iter_node_types(FILENAME):
+
+        if any([x in LOADED_LABELS for x in labels]):
+
+            node_types[str(node_id)] = label_sets.setdefault(tuple(labels), tuple(labels))
 
 
 
@@ -95,78 +352,237 @@ def load_data():
 
     # nodes_to_remove = numpy.random.choice(
 
-    #     [n["id"] for n in json_data["graph"]["nodes"]], N, replace=False)
+    #     list(node_types.keys()), N, replace=False)
 
-    entier = re.compile("^[1-9][0-9]*$")
-    chaine = re.compile("^.*$")
+    # Labels and relationship types cannot be query parameters, so there is one query per label set
+    # (or per relationship type and endpoint label sets), and rows are buffered per query until a batch is full.
 
-    Attributes = {}
-    Attributes["name"] = chaine
-    Attributes["nb_genes"] = entier
-    Attributes["nb_genomes"] = entier
-    Attributes["nb_fams"] = entier
-    Attributes["partition"] = re.compile("[pP]ersistent|[sS]hell|[cC]loud|[uU]ndefined")
-    Attributes["subpartition"] = chaine
-    Attributes["From"] = entier
-    Attributes["To"] = entier
-    Attributes["Id"] = entier
-    Attributes["weight"] = entier
-    Attributes["type"] = re.compile("GeneFamily|Module|Gene|Genome")
+    queries = {}
 
-    # Create nodes
+    buffers = {}
 
-    for n in tqdm(json_data["graph"]["nodes"], unit="node"):
+    existing_nodes, existing_edges = {}, {}
 
-        if n["id"] not in nodes_to_remove:
+    nb_unchanged = 0
 
-            if any([x in ["GeneFamilies", "module"] for x in json_data["graph"]["node_types"][str(n["id"])]]):
+    with driver.session() as session:
 
-                query = "CREATE (n:{})\n".format(":".join(json_data["graph"]["node_types"][str(n["id"])])) + "SET n.id = {} \n".format(n["id"])
+        if SYNC:
 
-                for k, v in n["attr"].items():
+            # MERGE looks the nodes up by id, so the constraints are needed from the start
 
-                    if k not in Attributes: raise Exception("Unknown attribute : " + str(k))
+            create_constraints(session, LOADED_LABELS)
 
-                    if not(bool(Attributes[k].match(str(v)))): raise Exception("Wrong format for attribute " + str(k) + " : " + str(v))
+            existing_nodes, existing_edges = read_existing(session, GRAPH_NAME)
 
-                    if k == "nb_genes" or k == "nb_genomes" or k == "nb_fam":
+        # Create nodes
 
-                        query += "SET n.{} = {}\n".format(k, v)
+        start = time.time()
 
-                    else:
+        nb_nodes = 0
 
-                        query += "SET n.{} = \"{}\"\n".format(k, v)
+        nodes = ((number, n) for number, n in enumerate(tqdm(iter_nodes(FILENAME), unit="node"), 1) if n["id"] not in nodes_to_remove and str(n["id"]) in node_types)
 
-                execute(driver, query)
+        for number, n in validated(nodes, "node"):
 
+            labels = node_types[str(n["id"])]
 
+            attr = {}
 
-    # Create relationships
+            for k, v in n["attr"].items():
 
-    for e in tqdm(json_data["graph"]["edges"], unit="edges"):
+                if k == "nb_genes" or k == "nb_genomes" or k == "nb_fams" or k == "is_fragment":
 
-        if any([x in ["IN_MODULE", "NEIGHBOR_OF"] for x in e["type"]]):
+                    attr[k] = int(v)
 
-            query = "MATCH (s:{} {{id: {}}}), (t:{} {{id: {}}}) \n".format(":".join(json_data["graph"]["node_types"][str(e["from"])]), e["from"], ":".join(json_data["graph"]["node_types"][str(e["to"])]), e["to"]) + "MERGE (s)-[r:{}]->(t)\n".format(e["type"][0])
+                else:
 
-            for k, v in e["attr"].items():
+                    attr[k] = str(v)
+
+            if SYNC:
+
+                row = {"id": n["id"], "attr": attr, "hash": content_hash(labels, attr), "graph": GRAPH_NAME, "label": labels[0]}
+
+                old = existing_nodes.pop(str(n["id"]), None)
+
+                if old is not None and old[3] == row["hash"]:
+
+                    nb_unchanged += 1
+
+                    continue
+
+                # the labels of a node change with its partition, the labels it lost are removed
+
+                stale = tuple(sorted(set(old[2]) - set(labels))) if old is not None else ()
+
+                key = ("sync_node", tuple(labels), stale)
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nMERGE (n:{} {{id: row.id}})\nSET n = row.attr, n.id = row.id, n.hash = row.hash, n.graph = row.graph, n.label = row.label\nSET n:{}".format(labels[0], ":".join(labels)) + ("\nREMOVE n:{}".format(":".join(stale)) if stale else "")
+
+                    buffers[key] = []
+
+            else:
+
+                row = {"id": n["id"], "attr": attr}
+
+                key = ("node", tuple(labels))
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nCREATE (n:{})\nSET n = row.attr, n.id = row.id".format(":".join(labels))
+
+                    buffers[key] = []
+
+            buffers[key].append(row)
+
+            nb_nodes += 1
+
+            if len(buffers[key]) >= BATCH_SIZE:
+
+                flush(session, queries, buffers, key)
+
+        for key in list(buffers):
+
+            flush(session, queries, buffers, key)
+
+        report("Nodes", nb_nodes, "nodes", start)
+
+        if not SYNC:
+
+            # Index the ids of every loaded label, otherwise each edge endpoint lookup is a label scan
+
+            start = time.time()
+
+            create_constraints(session, LOADED_LABELS)
+
+            report("Constraints", len(LOADED_LABELS), "labels", start)
 
-                if k not in Attributes: raise Exception("Unknown attribute : " + str(k))
+        # Create relationships
 
-                if not(bool(Attributes[k].match(str(v)))): raise Exception("Wrong format for attribute " + str(k) + " : " + str(v))
+        start = time.time()
+
+        nb_edges = 0
+
+        edges = ((number, e) for number, e in enumerate(tqdm(iter_edges(FILENAME), unit="edges"), 1) if relationship_type(e) in LOADED_TYPES and str(e["from"]) in node_types and str(e["to"]) in node_types)
+
+        for number, e in validated(edges, "edge"):
+
+            attr = {}
+
+            for k, v in e["attr"].items():
 
                 if k == "weight":
 
-                    query += "SET r.{} = {}\n".format(k, v)
+                    attr[k] = int(v)
 
                 else:
 
-                    query += "SET r.{} = \"{}\"\n".format(k, v)
+                    attr[k] = str(v)
+
+            source_labels = node_types[str(e["from"])]
+
+            target_labels = node_types[str(e["to"])]
+
+            if SYNC:
+
+                row = {"from": e["from"], "to": e["to"], "attr": attr, "hash": content_hash(attr), "graph": GRAPH_NAME}
+
+                old = existing_edges.pop((str(e["from"]), relationship_type(e), str(e["to"])), None)
+
+                if old is not None and old[4] == row["hash"]:
+
+                    nb_unchanged += 1
+
+                    continue
+
+                key = ("sync_edge", tuple(source_labels), tuple(target_labels), relationship_type(e))
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nMATCH (s:{} {{id: row.from}}), (t:{} {{id: row.to}})\nMERGE (s)-[r:{}]->(t)\nSET r = row.attr, r.hash = row.hash, r.graph = row.graph".format(":".join(source_labels), ":".join(target_labels), relationship_type(e))
+
+                    buffers[key] = []
+
+            else:
+
+                row = {"from": e["from"], "to": e["to"], "attr": attr}
+
+                key = ("edge", tuple(source_labels), tuple(target_labels), relationship_type(e))
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nMATCH (s:{} {{id: row.from}}), (t:{} {{id: row.to}})\nMERGE (s)-[r:{}]->(t)\nSET r += row.attr".format(":".join(source_labels), ":".join(target_labels), relationship_type(e))
+
+                    buffers[key] = []
+
+            buffers[key].append(row)
+
+            nb_edges += 1
+
+            if len(buffers[key]) >= BATCH_SIZE:
+
+                flush(session, queries, buffers, key)
 
-            execute(driver, query)
+        for key in list(buffers):
+
+            flush(session, queries, buffers, key)
+
+        report("Edges", nb_edges, "edges", start)
+
+        if SYNC:
+
+            # What was loaded from the graph before but is not in it anymore is deleted, the relationships first
+
+            start = time.time()
+
+            for (_, rel_type, _), (source, source_label, target, target_label, _) in existing_edges.items():
+
+                key = ("delete_edge", source_label, target_label, rel_type)
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nMATCH (s:{} {{id: row.from}})-[r:{}]->(t:{} {{id: row.to}})\nWHERE r.graph = row.graph\nDELETE r".format(source_label, rel_type, target_label)
+
+                    buffers[key] = []
+
+                buffers[key].append({"from": source, "to": target, "graph": GRAPH_NAME})
+
+                if len(buffers[key]) >= BATCH_SIZE:
+
+                    flush(session, queries, buffers, key)
+
+            for node_id, label, _, _ in existing_nodes.values():
+
+                key = ("delete_node", label)
+
+                if key not in queries:
+
+                    queries[key] = "UNWIND $rows AS row\nMATCH (n:{} {{id: row.id}})\nWHERE n.graph = row.graph\nDETACH DELETE n".format(label)
+
+                    buffers[key] = []
+
+                buffers[key].append({"id": node_id, "graph": GRAPH_NAME})
+
+                if len(buffers[key]) >= BATCH_SIZE:
+
+                    flush(session, queries, buffers, key)
+
+            for key in list(buffers):
+
+                flush(session, queries, buffers, key)
+
+            report("Deletions", len(existing_edges) + len(existing_nodes), "nodes and edges", start)
+
+            print("{} nodes and edges were unchanged".format(nb_unchanged))
+
+    driver.close()
 
 
 if __name__ == '__main__':
 
+    configure()
+
     load_data()
 
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""Benchmark of the accessors of the pangenome collections.
+
+The given pangenome files, written by the 'all' workflow, are read entirely and written again as the workflow does at
+its end, while tracing the allocations. This is done with the cached accessors of the pangenome, and with accessors
+that copy the collection on each access, as they did before. The time, the peak of memory and the number of copies of
+the collections made by the accessors are reported.
+
+    python benchmarks/benchmark_accessors.py A_baumannii.h5 A_pittii.h5 --tmpdir /tmp
+"""
+
+import argparse
+from collections import Counter
+import os
+import tempfile
+import time
+import tracemalloc
+
+from hdf5_2_json.formats import readPangenome, writePangenome
+from hdf5_2_json.pangenome import Pangenome
+
+
+class CountingPangenome(Pangenome):
+    """A pangenome counting the copies of its collections made by the accessors"""
+
+    def __init__(self):
+        super().__init__()
+        self.copies = Counter()
+
+    def _cachedValues(self, collection, getter):
+        if collection not in self._views:
+            self.copies[collection] += 1
+        return super()._cachedValues(collection, getter)
+
+
+class CopyingPangenome(CountingPangenome):
+    """A pangenome whose accessors copy the collection on each access"""
+
+    def _cachedValues(self, collection, getter):
+        self.copies[collection] += 1
+        return list(getter.values())
+
+    def number_of_genes(self):
+        return len(self.genes)
+
+    def number_of_geneFamilies(self):
+        return len(self.geneFamilies)
+
+    def number_of_edges(self):
+        return len(self.edges)
+
+    def number_of_regions(self):
+        return len(self.regions)
+
+
+def measure(pangenomeClass, filename, destination):
+    """Read the whole pangenome file and write it to the destination.
+
+    :return: the pangenome, the time it took and the peak of memory
+    """
+
+    pangenome = pangenomeClass()
+    pangenome.addFile(filename)
+    tracemalloc.start()
+    start = time.perf_counter()
+    inFile = {key for key, value in pangenome.status.items() if value == "inFile"}
+    readPangenome(pangenome, annotation=True, geneFamilies="genesClustered" in inFile,
+                  graph="neighborsGraph" in inFile, rgp="predictedRGP" in inFile, spots="spots" in inFile,
+                  geneSequences="geneSequences" in inFile, modules="modules" in inFile, disable_bar=True)
+    for key, value in pangenome.status.items():
+        if value == "Loaded":  # everything is written again, as when it was computed by the workflow
+            pangenome.status[key] = "Computed"
+    writePangenome(pangenome, destination, force=True, disable_bar=True)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(destination)
+    return pangenome, duration, peak
+
+
+def benchmark(filename, tmpdir):
+    print(f"{os.path.basename(filename)}: {os.path.getsize(filename) / 1e6:.1f} MB")
+    print("accessors\ttime (s)\tpeak memory (MB)\tcopies")
+    destination = os.path.join(tmpdir, f"accessors_{os.path.basename(filename)}")
+    for name, pangenomeClass in [("cached", CountingPangenome), ("copying", CopyingPangenome)]:
+        pangenome, duration, peak = measure(pangenomeClass, filename, destination)
+        copies = ", ".join(f"{collection}: {number}" for collection, number in sorted(pangenome.copies.items()))
+        print(f"{name}\t{duration:.1f}\t{peak / 1e6:.1f}\t{copies}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the copies of the pangenome collections made by their "
+                                                 "accessors when reading and writing pangenome files")
+    parser.add_argument("pangenomes", nargs="+", help="pangenome .h5 files written by the 'all' workflow")
+    parser.add_argument("--tmpdir", default=tempfile.gettempdir(), help="directory of the rewritten files")
+    args = parser.parse_args()
+    for filename in args.pangenomes:
+        benchmark(filename, args.tmpdir)
+
+
+if __name__ == "__main__":
+    main()
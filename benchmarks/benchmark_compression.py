@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""Benchmark of the compression presets of the pangenome .h5 files.
+
+Each table of the given pangenome files (such as those built from the genome lists of the PanGenome directory) is
+rewritten in a new file with the settings of each preset of hdf5_2_json.formats.COMPRESSION_PRESETS. For each preset,
+the size of the file and the throughput of the write and of a full chunk by chunk read are reported, the throughputs
+being computed on the uncompressed size of the tables.
+
+    python benchmarks/benchmark_compression.py A_baumannii.h5 A_pittii.h5 --tmpdir /tmp
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import tables
+
+from hdf5_2_json.formats import COMPRESSION_PRESETS, setCompression, tableOptions, read_chunk_arrays
+from hdf5_2_json.pangenome import Pangenome
+
+
+def rewrite(source, destination, preset, chunk=100000):
+    """Copy every table of the source file in the destination file, with the settings of the preset.
+
+    :return: the uncompressed size of the tables, in bytes
+    """
+
+    pangenome = Pangenome()
+    setCompression(pangenome, preset)
+    size = 0
+    with tables.open_file(source, "r") as src, \
+            tables.open_file(destination, "w", filters=tableOptions(pangenome, "default")["filters"]) as dest:
+        for table in src.walk_nodes("/", "Table"):
+            copy = dest.create_table(table._v_parent._v_pathname, table.name, table.description,
+                                     expectedrows=table.nrows, createparents=True,
+                                     **tableOptions(pangenome, table.name))
+            for start in range(0, table.nrows, chunk):
+                copy.append(table.read(start=start, stop=start + chunk))
+            copy.flush()
+            size += table.nrows * table.rowsize
+    return size
+
+
+def read(filename):
+    """Read every table of the file chunk by chunk, as the pangenome readers do."""
+
+    with tables.open_file(filename, "r") as h5f:
+        for table in h5f.walk_nodes("/", "Table"):
+            for _ in read_chunk_arrays(table):
+                pass
+
+
+def benchmark(filename, tmpdir):
+    print(f"{os.path.basename(filename)}: {os.path.getsize(filename) / 1e6:.1f} MB")
+    print("preset\tsize (MB)\tratio\twrite (MB/s)\tread (MB/s)")
+    for preset in COMPRESSION_PRESETS:
+        destination = os.path.join(tmpdir, f"{preset}_{os.path.basename(filename)}")
+        start = time.perf_counter()
+        size = rewrite(filename, destination, preset)
+        write_time = time.perf_counter() - start
+        start = time.perf_counter()
+        read(destination)
+        read_time = time.perf_counter() - start
+        file_size = os.path.getsize(destination)
+        print(f"{preset}\t{file_size / 1e6:.1f}\t{size / file_size:.2f}\t{size / 1e6 / write_time:.1f}\t"
+              f"{size / 1e6 / read_time:.1f}")
+        os.remove(destination)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the file size and the read and write throughputs of each "
+                                                 "compression preset of the pangenome files")
+    parser.add_argument("pangenomes", nargs="+", help="pangenome .h5 files")
+    parser.add_argument("--tmpdir", default=tempfile.gettempdir(), help="directory of the rewritten files")
+    args = parser.parse_args()
+    for filename in args.pangenomes:
+        benchmark(filename, args.tmpdir)
+
+
+if __name__ == "__main__":
+    main()
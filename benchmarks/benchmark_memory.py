@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""Benchmark of the memory used by the genes of a pangenome.
+
+The annotations, gene families and graph of the given pangenome files (such as those built from the genome lists of
+the PanGenome directory) are read while tracing the allocations, and the number of bytes per gene is reported. The
+same figure is given for the classes with a __dict__ per instance and a RGP set allocated for every gene, as they were
+before the slots, by reading the file a second time with such classes in place of the slot-based ones.
+
+    python benchmarks/benchmark_memory.py A_baumannii.h5 A_pittii.h5
+"""
+
+import argparse
+import gc
+import os
+import tracemalloc
+
+from hdf5_2_json import genome
+from hdf5_2_json.formats import readBinaries
+from hdf5_2_json.pangenome import Pangenome
+
+
+class DictGene(genome.Gene):
+    """A gene with a __dict__, and a RGP set allocated on creation"""
+
+    def __init__(self, ID):
+        super().__init__(ID)
+        self._RGP = set()
+
+
+class DictRNA(genome.RNA):
+    """A RNA with a __dict__"""
+
+
+def measure(filename):
+    """Read the annotations, gene families and graph of the file.
+
+    :return: the number of genes, and the number of bytes allocated to read them
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    pangenome = Pangenome()
+    pangenome.addFile(filename)
+    readBinaries.readPangenome(pangenome, annotation=True, geneFamilies=pangenome.status["genesClustered"] != "No",
+                               graph=pangenome.status["neighborsGraph"] != "No", disable_bar=True)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(pangenome.genes), size
+
+
+def benchmark(filename):
+    print(f"{os.path.basename(filename)}: {os.path.getsize(filename) / 1e6:.1f} MB")
+    print("classes\tgenes\tmemory (MB)\tbytes per gene")
+    classes = {"slots": (genome.Gene, genome.RNA), "dict": (DictGene, DictRNA)}
+    for name, (gene_class, rna_class) in classes.items():
+        readBinaries.Gene, readBinaries.RNA = gene_class, rna_class
+        try:
+            genes, size = measure(filename)
+        finally:
+            readBinaries.Gene, readBinaries.RNA = genome.Gene, genome.RNA
+        print(f"{name}\t{genes}\t{size / 1e6:.1f}\t{size / genes:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the memory used per gene when reading pangenome files")
+    parser.add_argument("pangenomes", nargs="+", help="pangenome .h5 files")
+    args = parser.parse_args()
+    for filename in args.pangenomes:
+        benchmark(filename)
+
+
+if __name__ == "__main__":
+    main()
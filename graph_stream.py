@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+# coding: utf-8
+
+"""Incremental reading of the pangenome graph files written by 'hdf5_2_json write'.
+
+The graph is never loaded as a whole: nodes, node types and edges are yielded one by one, so that the memory used by a
+loader only depends on what it keeps. The following inputs are understood:
+
+- a json file ('--json'), parsed event by event with ijson, which is then required,
+- a newline-delimited json file ('--ndjson'),
+- a directory holding the nodes.ndjson, node_types.ndjson and edges.ndjson files ('--ndjson --split_ndjson'),
+- the manifest of a sharded newline-delimited json export ('--ndjson --cpu N').
+
+Any of these files can be compressed in .gz.
+"""
+
+import gzip
+import json
+import os
+
+try:
+    import ijson
+except ImportError:  # only the newline-delimited json files can be read
+    ijson = None
+
+
+def open_graph_file(path, mode="r"):
+    """Open a graph file, uncompressing it if needed."""
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t" if mode == "r" else mode)
+    return open(path, mode)
+
+
+def _ndjson_records(path, record):
+    """Yield the records of the given kind ('node', 'node_type' or 'edge') from newline-delimited json file(s)."""
+
+    if os.path.isdir(path):
+        for name in os.listdir(path):
+            if name.endswith("manifest.json"):
+                yield from _ndjson_records(os.path.join(path, name), record)
+                return
+        split_name = {"node": "nodes.ndjson", "node_type": "node_types.ndjson", "edge": "edges.ndjson"}[record]
+        for name in [split_name, split_name + ".gz"]:
+            if os.path.exists(os.path.join(path, name)):
+                yield from _ndjson_lines(os.path.join(path, name), None)
+        return
+    if path.endswith("manifest.json"):
+        with open(path) as manifest_file:
+            manifest = json.load(manifest_file)
+        directory = os.path.dirname(path)
+        for part in manifest["parts"]:
+            for name in part["files"]:
+                if not manifest["split"]:
+                    yield from _ndjson_lines(os.path.join(directory, name), record)
+                elif os.path.basename(name).split(".")[1] == {"node": "nodes", "node_type": "node_types",
+                                                               "edge": "edges"}[record]:
+                    yield from _ndjson_lines(os.path.join(directory, name), None)
+        return
+    yield from _ndjson_lines(path, record)
+
+
+def _ndjson_lines(path, record):
+    """Yield the records of a newline-delimited json file. If `record` is given, only the tagged records of this kind
+    are yielded, without their tag."""
+
+    with open_graph_file(path) as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+            data = json.loads(line)
+            if record is None:
+                yield data
+            elif data.pop("record") == record:
+                yield data
+
+
+def is_ndjson(path):
+    """Whether the given path is one of the newline-delimited json forms of the graph."""
+
+    return os.path.isdir(path) or path.endswith((".ndjson", ".ndjson.gz", "manifest.json"))
+
+
+def _json_items(path, prefix):
+    """Yield the items of a json array (or the key, value pairs of a json object) of a json graph file."""
+
+    if ijson is None:
+        raise Exception(f"ijson is required to stream the json graph file '{path}' (pip install ijson). Otherwise, "
+                        f"export the graph with 'hdf5_2_json write --ndjson', which is read without it.")
+    with open_graph_file(path, "rb") as f:
+        if prefix == "graph.node_types":
+            yield from ijson.kvitems(f, prefix, use_float=True)
+        else:
+            yield from ijson.items(f, prefix + ".item", use_float=True)
+
+
+def iter_node_types(path):
+    """Yield the (node id, node labels) pairs of a graph file."""
+
+    if is_ndjson(path):
+        for data in _ndjson_records(path, "node_type"):
+            yield data["id"], data["types"]
+    else:
+        yield from _json_items(path, "graph.node_types")
+
+
+def iter_nodes(path):
+    """Yield the nodes of a graph file."""
+
+    if is_ndjson(path):
+        yield from _ndjson_records(path, "node")
+    else:
+        yield from _json_items(path, "graph.nodes")
+
+
+def iter_edges(path):
+    """Yield the edges of a graph file."""
+
+    if is_ndjson(path):
+        yield from _ndjson_records(path, "edge")
+    else:
+        yield from _json_items(path, "graph.edges")